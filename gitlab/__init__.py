@@ -18,14 +18,31 @@
 
 from __future__ import print_function
 from __future__ import absolute_import
+import functools
+import hashlib
 import importlib
+import os
+import threading
 import time
 import warnings
 
 import requests
 import six
+try:
+    import urllib3
+except ImportError:
+    from requests.packages import urllib3
 
+import gitlab.cache
+import gitlab.compression
 import gitlab.config
+import gitlab.deadline
+import gitlab.isolation
+import gitlab.metrics
+import gitlab.middleware
+import gitlab.ratelimit
+import gitlab.retry
+import gitlab.singleflight
 from gitlab.const import *  # noqa
 from gitlab.exceptions import *  # noqa
 from gitlab import utils  # noqa
@@ -69,12 +86,54 @@ class Gitlab(object):
         http_username (str): Username for HTTP authentication
         http_password (str): Password for HTTP authentication
         api_version (str): Gitlab API version to use (support for 4 only)
+        cache (gitlab.cache.BaseCache): Cache used for conditional GET
+            requests (disabled by default)
+        pool_connections (int): Number of connection pools to cache (one pool
+            per host)
+        pool_maxsize (int): Maximum number of connections kept open in each
+            pool. Use at least the number of threads sharing the object.
+        pool_block (bool): If True, wait for a free connection when the pool
+            is full instead of opening a connection that will be discarded
+        keep_alive (bool): If False, close the connection after each request
+        rate_limiter (gitlab.ratelimit.RateLimiter): Limiter pacing the
+            requests (disabled by default)
+        retry_policy (gitlab.retry.RetryPolicy): Defines how failed requests
+            are retried. The default policy retries up to 10 times on 429,
+            502, 503 and 504 responses and on connection errors, except SSL
+            and proxy errors. Non-idempotent requests (POST, PATCH) are only
+            retried when the connection could not be established.
+        blob_cache (gitlab.cache.BlobCache): Cache holding the content of the
+            repository blobs (disabled by default)
+        compression (bool|list): True to accept all the supported content
+            encodings (gzip, deflate, and br or zstd when the brotli and
+            zstandard packages are installed), False to disable compression,
+            or a list of encodings. By default the requests defaults are
+            used.
+        transfer_stats (gitlab.compression.TransferStats): Counters of the
+            bytes received, created if not provided
+        metrics (gitlab.metrics.Metrics): Registry recording the metrics of
+            the requests, created if not provided
+        middlewares (list): :class:`~gitlab.middleware.Middleware` objects
+            called around each request
+        single_flight (bool): If True, identical GET requests made at the
+            same time (e.g. by several threads) are sent only once, and each
+            caller gets a copy of the result
+        circuit_breaker (gitlab.isolation.CircuitBreaker): Breaker failing
+            the requests immediately while an endpoint family of the server
+            keeps failing (disabled by default)
+        bulkhead (gitlab.isolation.Bulkhead): Limits of the number of
+            requests in flight, by endpoint family (disabled by default)
     """
 
     def __init__(self, url, private_token=None, oauth_token=None, email=None,
                  password=None, ssl_verify=True, http_username=None,
                  http_password=None, timeout=None, api_version='4',
-                 session=None, per_page=None):
+                 session=None, per_page=None, cache=None,
+                 pool_connections=None, pool_maxsize=None, pool_block=None,
+                 keep_alive=True, rate_limiter=None, retry_policy=None,
+                 blob_cache=None, compression=None, transfer_stats=None,
+                 metrics=None, middlewares=None, single_flight=False,
+                 circuit_breaker=None, bulkhead=None):
 
         self._api_version = str(api_version)
         self._server_version = self._server_revision = None
@@ -100,9 +159,49 @@ class Gitlab(object):
 
         #: Create a session object for requests
         self.session = session or requests.Session()
+        pool_options = (pool_connections, pool_maxsize, pool_block)
+        if session is None or pool_options != (None, None, None):
+            self._mount_adapter(*pool_options)
+        if not keep_alive:
+            self.headers['Connection'] = 'close'
+        if compression is not None:
+            self.headers['Accept-Encoding'] = \
+                gitlab.compression.accept_encoding(compression)
 
         self.per_page = per_page
 
+        #: The cache used for conditional GET requests
+        self.cache = cache
+
+        #: The limiter pacing the requests
+        self.rate_limiter = rate_limiter
+
+        #: The policy used to retry the failed requests
+        self.retry_policy = retry_policy or gitlab.retry.RetryPolicy()
+
+        #: The cache holding the repository blobs
+        self.blob_cache = blob_cache
+
+        #: The counters of the bytes received
+        self.transfer_stats = (transfer_stats or
+                               gitlab.compression.TransferStats())
+
+        #: The metrics of the requests, by endpoint
+        self.metrics = metrics or gitlab.metrics.Metrics()
+
+        #: The middlewares called around each request
+        self.middlewares = list(middlewares or [])
+
+        self._single_flight = None
+        if single_flight:
+            self._single_flight = gitlab.singleflight.SingleFlight()
+
+        #: The circuit breaker of the requests
+        self.circuit_breaker = circuit_breaker
+
+        #: The limits of the requests in flight
+        self.bulkhead = bulkhead
+
         objects = importlib.import_module('gitlab.v%s.objects' %
                                           self._api_version)
         self._objects = objects
@@ -150,6 +249,17 @@ class Gitlab(object):
                                           self._api_version)
         self._objects = objects
 
+    def _mount_adapter(self, pool_connections, pool_maxsize, pool_block):
+        # The urllib3 connection pools are thread-safe, a single Gitlab object
+        # can be used by several threads as long as the pools are big enough
+        adapter = gitlab.metrics.TimedHTTPAdapter(
+            pool_connections=pool_connections or
+            requests.adapters.DEFAULT_POOLSIZE,
+            pool_maxsize=pool_maxsize or requests.adapters.DEFAULT_POOLSIZE,
+            pool_block=bool(pool_block))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
     @property
     def url(self):
         """The user-provided server URL."""
@@ -165,8 +275,8 @@ class Gitlab(object):
         """The API version used (4 only)."""
         return self._api_version
 
-    @staticmethod
-    def from_config(gitlab_id=None, config_files=None):
+    @classmethod
+    def from_config(cls, gitlab_id=None, config_files=None):
         """Create a Gitlab connection from configuration files.
 
         Args:
@@ -174,20 +284,32 @@ class Gitlab(object):
             config_files list[str]: List of paths to configuration files.
 
         Returns:
-            (gitlab.Gitlab): A Gitlab connection.
+            (gitlab.Gitlab): A Gitlab connection (an instance of the class
+                the method is called on).
 
         Raises:
             gitlab.config.GitlabDataError: If the configuration is not correct.
         """
         config = gitlab.config.GitlabConfigParser(gitlab_id=gitlab_id,
                                                   config_files=config_files)
-        return Gitlab(config.url, private_token=config.private_token,
-                      oauth_token=config.oauth_token,
-                      ssl_verify=config.ssl_verify, timeout=config.timeout,
-                      http_username=config.http_username,
-                      http_password=config.http_password,
-                      api_version=config.api_version,
-                      per_page=config.per_page)
+        retry_options = {}
+        for option in ('max_retries', 'statuses', 'backoff_factor'):
+            value = getattr(config, 'retry_%s' % option)
+            if value is not None:
+                retry_options[option] = value
+        retry_policy = gitlab.retry.RetryPolicy(**retry_options)
+        return cls(config.url, private_token=config.private_token,
+                   oauth_token=config.oauth_token,
+                   ssl_verify=config.ssl_verify, timeout=config.timeout,
+                   http_username=config.http_username,
+                   http_password=config.http_password,
+                   api_version=config.api_version,
+                   per_page=config.per_page,
+                   pool_connections=config.pool_connections,
+                   pool_maxsize=config.pool_maxsize,
+                   pool_block=config.pool_block,
+                   keep_alive=config.keep_alive,
+                   retry_policy=retry_policy)
 
     def auth(self):
         """Performs an authentication.
@@ -356,6 +478,16 @@ class Gitlab(object):
             self._http_auth = requests.auth.HTTPBasicAuth(self.http_username,
                                                           self.http_password)
 
+    def stats(self):
+        """Return a snapshot of the request metrics.
+
+        See :meth:`gitlab.metrics.Metrics.snapshot`.
+
+        Returns:
+            dict: The metrics of each endpoint
+        """
+        return self.metrics.snapshot()
+
     def enable_debug(self):
         import logging
         try:
@@ -418,8 +550,49 @@ class Gitlab(object):
                 if location and location.startswith('https://'):
                     raise RedirectError(REDIRECT_MSG)
 
+    def _build_params(self, query_data, kwargs):
+        params = {}
+        utils.copy_dict(params, query_data)
+
+        # Deal with kwargs: by default a user uses kwargs to send data to the
+        # gitlab server, but this generates problems (python keyword conflicts
+        # and python-gitlab/gitlab conflicts).
+        # So we provide a `query_parameters` key: if it's there we use its dict
+        # value as arguments for the gitlab server, and ignore the other
+        # arguments, except pagination ones (per_page and page)
+        if 'query_parameters' in kwargs:
+            utils.copy_dict(params, kwargs['query_parameters'])
+            for arg in ('per_page', 'page'):
+                if arg in kwargs:
+                    params[arg] = kwargs[arg]
+        else:
+            utils.copy_dict(params, kwargs)
+
+        return params
+
+    def _cache_key(self, prepped):
+        # Responses depend on the identity of the user, but we don't want
+        # the credentials to be readable in the cache
+        identity = '%s:%s' % (prepped.headers.get('PRIVATE-TOKEN'),
+                              prepped.headers.get('Authorization'))
+        digest = hashlib.sha256(identity.encode('utf-8')).hexdigest()
+        return '%s %s' % (digest, prepped.url)
+
+    def _allow_circuit(self, circuit):
+        try:
+            self.circuit_breaker.allow(circuit)
+        finally:
+            self.metrics.record_circuit_state(
+                circuit[0], circuit[1], self.circuit_breaker.state(circuit))
+
+    def _record_circuit(self, circuit, status):
+        self.circuit_breaker.record(circuit, status)
+        self.metrics.record_circuit_state(
+            circuit[0], circuit[1], self.circuit_breaker.state(circuit))
+
     def http_request(self, verb, path, query_data={}, post_data=None,
-                     streamed=False, files=None, **kwargs):
+                     streamed=False, files=None, extra_headers=None,
+                     **kwargs):
         """Make an HTTP request to the Gitlab server.
 
         Args:
@@ -429,44 +602,48 @@ class Gitlab(object):
                         'http://whatever/v4/api/projecs')
             query_data (dict): Data to send as query parameters
             post_data (dict): Data to send in the body (will be converted to
-                              json)
+                              json). :class:`~gitlab.utils.MultipartEncoder`
+                              and :class:`~gitlab.utils.JSONStreamEncoder`
+                              objects are sent as is.
             streamed (bool): Whether the data should be streamed
             files (dict): The files to send to the server
-            **kwargs: Extra options to send to the server (e.g. sudo)
+            extra_headers (dict): Additional HTTP headers to send
+            **kwargs: Extra options to send to the server (e.g. sudo). The
+                ``retry_policy`` (a :class:`~gitlab.retry.RetryPolicy`),
+                ``max_retries`` and ``obey_rate_limit`` options override the
+                retry policy for this request. The ``deadline`` option (a
+                number of seconds or a :class:`~gitlab.deadline.Deadline`)
+                limits the time spent by the request, retries included.
 
         Returns:
             A requests result object.
 
         Raises:
             GitlabHttpError: When the return code is not 2xx
+            GitlabTimeoutError: When the deadline is passed
+            GitlabCircuitOpenError: When the circuit breaker is open
+            GitlabBulkheadFullError: When no request slot was freed in time
         """
 
+        retry_policy = gitlab.retry.get_policy(self.retry_policy, kwargs)
+        deadline = gitlab.deadline.get_deadline(kwargs)
         url = self._build_url(path)
-
-        params = {}
-        utils.copy_dict(params, query_data)
-
-        # Deal with kwargs: by default a user uses kwargs to send data to the
-        # gitlab server, but this generates problems (python keyword conflicts
-        # and python-gitlab/gitlab conflicts).
-        # So we provide a `query_parameters` key: if it's there we use its dict
-        # value as arguments for the gitlab server, and ignore the other
-        # arguments, except pagination ones (per_page and page)
-        if 'query_parameters' in kwargs:
-            utils.copy_dict(params, kwargs['query_parameters'])
-            for arg in ('per_page', 'page'):
-                if arg in kwargs:
-                    params[arg] = kwargs[arg]
-        else:
-            utils.copy_dict(params, kwargs)
+        params = self._build_params(query_data, kwargs)
 
         opts = self._get_session_opts(content_type='application/json')
+        if extra_headers:
+            opts['headers'].update(extra_headers)
 
         verify = opts.pop('verify')
         timeout = opts.pop('timeout')
 
         # We need to deal with json vs. data when uploading files
-        if files:
+        if isinstance(post_data, (utils.MultipartEncoder,
+                                  utils.JSONStreamEncoder)):
+            data = post_data
+            json = None
+            opts['headers']['Content-type'] = post_data.content_type
+        elif files:
             data = post_data
             json = None
             del opts["headers"]["Content-type"]
@@ -487,48 +664,152 @@ class Gitlab(object):
         settings = self.session.merge_environment_settings(
             prepped.url, {}, streamed, verify, None)
 
-        # obey the rate limit by default
-        obey_rate_limit = kwargs.get("obey_rate_limit", True)
+        # Streamed responses are not cached, the content is not read. Extra
+        # headers (e.g. Range) can change the response for the same URL.
+        cache_key = cache_entry = None
+        if (self.cache is not None and verb == 'get' and not streamed
+           and not extra_headers):
+            cache_key = self._cache_key(prepped)
+            cache_entry = self.cache.get(cache_key)
+            if cache_entry is not None:
+                if cache_entry['etag']:
+                    prepped.headers['If-None-Match'] = cache_entry['etag']
+                if cache_entry['last_modified']:
+                    prepped.headers['If-Modified-Since'] = \
+                        cache_entry['last_modified']
 
-        # set max_retries to 10 by default, disable by setting it to -1
-        max_retries = kwargs.get("max_retries", 10)
         cur_retries = 0
+        result = error = None
+        endpoint = gitlab.metrics.endpoint_template(prepped.url, self._url)
+        bytes_in = functools.partial(self.metrics.record_bytes_in, verb,
+                                     endpoint)
+        circuit = None
+        if self.circuit_breaker is not None:
+            host = six.moves.urllib.parse.urlparse(prepped.url).netloc
+            circuit = self.circuit_breaker.key(host, endpoint)
+        gitlab.metrics.pop_connect_time()
+        start = time.time()
+
+        sleep = time.sleep if deadline is None else deadline.sleep
 
-        while True:
-            result = self.session.send(prepped, timeout=timeout, **settings)
-
-            self._check_redirects(result)
-
-            if 200 <= result.status_code < 300:
-                return result
-
-            if 429 == result.status_code and obey_rate_limit:
-                if max_retries == -1 or cur_retries < max_retries:
-                    wait_time = 2 ** cur_retries * 0.1
-                    if "Retry-After" in result.headers:
-                        wait_time = int(result.headers["Retry-After"])
+        try:
+            while True:
+                result = None
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire(deadline)
+
+                attempt_timeout = timeout
+                if deadline is not None:
+                    deadline.check()
+                    attempt_timeout = deadline.socket_timeout(timeout)
+
+                if circuit is not None:
+                    self._allow_circuit(circuit)
+                release = None
+                if self.bulkhead is not None:
+                    try:
+                        release = self.bulkhead.acquire(endpoint, deadline)
+                    except GitlabError:
+                        # The attempt is not sent, it is not a trial
+                        if circuit is not None:
+                            self.circuit_breaker.cancel(circuit)
+                        raise
+
+                try:
+                    if self.middlewares:
+                        result = gitlab.middleware.send(
+                            self.middlewares,
+                            functools.partial(self.session.send,
+                                              timeout=attempt_timeout,
+                                              **settings),
+                            prepped)
+                    else:
+                        result = self.session.send(prepped,
+                                                   timeout=attempt_timeout,
+                                                   **settings)
+                except (requests.exceptions.ConnectionError,
+                        requests.exceptions.Timeout) as e:
+                    if circuit is not None:
+                        self._record_circuit(circuit, None)
+                    if deadline is not None:
+                        deadline.check()
+                    sent = not _connection_failed(e)
+                    if (isinstance(e, _PERMANENT_ERRORS) or
+                            not retry_policy.retry_error(verb, cur_retries,
+                                                         sent)):
+                        raise
+                    sleep(retry_policy.wait_time(cur_retries))
+                    cur_retries += 1
+                    continue
+                finally:
+                    # The body of a streamed response is read by the caller
+                    if release is not None:
+                        if (streamed and result is not None
+                                and 200 <= result.status_code < 300):
+                            gitlab.isolation.release_with(result, release)
+                        else:
+                            release()
+
+                if circuit is not None:
+                    self._record_circuit(circuit, result.status_code)
+                self._check_redirects(result)
+                self.transfer_stats.track(result, streamed, bytes_in)
+
+                if self.rate_limiter is not None:
+                    self.rate_limiter.update(result.headers)
+
+                if cache_entry is not None and result.status_code == 304:
+                    self.cache.hit()
+                    return gitlab.cache.build_response(cache_entry, result)
+
+                if 200 <= result.status_code < 300:
+                    if cache_key is not None:
+                        new_entry = gitlab.cache.build_entry(result)
+                        if new_entry is not None:
+                            self.cache.miss()
+                            self.cache.set(cache_key, new_entry)
+                    return result
+
+                if retry_policy.retry_status(verb, result.status_code,
+                                             cur_retries):
+                    sleep(retry_policy.wait_time(cur_retries, result.headers))
                     cur_retries += 1
-                    time.sleep(wait_time)
                     continue
 
-            error_message = result.content
-            try:
-                error_json = result.json()
-                for k in ('message', 'error'):
-                    if k in error_json:
-                        error_message = error_json[k]
-            except (KeyError, ValueError, TypeError):
-                pass
-
-            if result.status_code == 401:
-                raise GitlabAuthenticationError(
-                    response_code=result.status_code,
-                    error_message=error_message,
-                    response_body=result.content)
-
-            raise GitlabHttpError(response_code=result.status_code,
-                                  error_message=error_message,
-                                  response_body=result.content)
+                error_message = result.content
+                try:
+                    error_json = result.json()
+                    for k in ('message', 'error'):
+                        if k in error_json:
+                            error_message = error_json[k]
+                except (KeyError, ValueError, TypeError):
+                    pass
+
+                if result.status_code == 401:
+                    raise GitlabAuthenticationError(
+                        response_code=result.status_code,
+                        error_message=error_message,
+                        response_body=result.content)
+
+                raise GitlabHttpError(response_code=result.status_code,
+                                      error_message=error_message,
+                                      response_body=result.content)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if result is not None:
+                status = result.status_code
+                ttfb = result.elapsed.total_seconds()
+            else:
+                status = type(error).__name__
+                ttfb = None
+            latency = {'connect': gitlab.metrics.pop_connect_time(),
+                       'ttfb': ttfb, 'total': time.time() - start}
+            self.metrics.record(verb, endpoint, status, retries=cur_retries,
+                                bytes_out=gitlab.metrics.body_size(
+                                    prepped.body),
+                                latency=latency)
 
     def http_get(self, path, query_data={}, streamed=False, raw=False,
                  **kwargs):
@@ -551,6 +832,30 @@ class Gitlab(object):
             GitlabHttpError: When the return code is not 2xx
             GitlabParsingError: If the json data could not be parsed
         """
+        if (self._single_flight is not None and not streamed and not raw
+                and 'extra_headers' not in kwargs):
+            key = self._single_flight_key(path, query_data, kwargs)
+            deadline = gitlab.deadline.get_deadline(kwargs)
+            return self._single_flight.do(
+                key, functools.partial(self._http_get, path, query_data,
+                                       deadline=deadline, **kwargs),
+                deadline)
+        return self._http_get(path, query_data, streamed, raw, **kwargs)
+
+    def _single_flight_key(self, path, query_data, kwargs):
+        # The retry options change the way the request is sent, not the
+        # response
+        kwargs = dict((k, v) for k, v in kwargs.items()
+                      if k not in ('retry_policy', 'max_retries',
+                                   'obey_rate_limit', 'deadline'))
+        params = self._build_params(query_data, kwargs)
+        identity = repr((sorted(self.headers.items()), self.http_username,
+                         self.http_password))
+        digest = hashlib.sha256(identity.encode('utf-8')).hexdigest()
+        return (digest, self._build_url(path), repr(sorted(params.items())))
+
+    def _http_get(self, path, query_data={}, streamed=False, raw=False,
+                  **kwargs):
         result = self.http_request('get', path, query_data=query_data,
                                    streamed=streamed, **kwargs)
 
@@ -572,6 +877,13 @@ class Gitlab(object):
             path (str): Path or full URL to query ('/projects' or
                         'http://whatever/v4/api/projecs')
             query_data (dict): Data to send as query parameters
+            streamed (bool): Whether the items should be decoded while the
+                             pages are downloaded
+            concurrency (int): When `all` is True, the number of pages to
+                               fetch in parallel (defaults to 1)
+            pagination (str): Set to 'keyset' to use keyset pagination
+                              instead of offset pagination
+            deadline (float): Time budget for all the pages, in seconds
             **kwargs: Extra options to send to the server (e.g. sudo, page,
                       per_page)
 
@@ -591,10 +903,15 @@ class Gitlab(object):
         as_list = True if as_list is None else as_list
 
         get_all = kwargs.pop('all', False)
+        concurrency = kwargs.pop('concurrency', None)
         url = self._build_url(path)
+        # The same deadline applies to all the pages
+        deadline = gitlab.deadline.get_deadline(kwargs)
+        if deadline is not None:
+            kwargs['deadline'] = deadline
 
         if get_all is True:
-            return list(GitlabList(self, url, query_data, **kwargs))
+            return self._list_all(url, query_data, concurrency, **kwargs)
 
         if 'page' in kwargs or as_list is True:
             # pagination requested, we return a list
@@ -604,6 +921,36 @@ class Gitlab(object):
         # No pagination, generator requested
         return GitlabList(self, url, query_data, **kwargs)
 
+    def _is_keyset(self, query_data, kwargs):
+        params = self._build_params(query_data, kwargs)
+        return params.get('pagination') == 'keyset'
+
+    def _list_all(self, url, query_data, concurrency, **kwargs):
+        first = GitlabList(self, url, query_data, **kwargs)
+
+        # The remaining pages can only be requested in parallel if the server
+        # told us how many there are. GitLab doesn't send the X-Total-Pages
+        # header for large collections, in which case we follow the links.
+        # Keyset pagination has no page numbers, the links are the only way
+        # to get the next pages.
+        if (not concurrency or concurrency < 2 or first._next_url is None
+           or not first._total_pages or not first._current_page
+           or self._is_keyset(query_data, kwargs)):
+            return list(first)
+
+        kwargs.pop('page', None)
+
+        def fetch_page(page):
+            return list(GitlabList(self, url, query_data, get_next=False,
+                                   page=page, **kwargs))
+
+        first._get_next = False
+        items = list(first)
+        pages = range(first.current_page + 1, first.total_pages + 1)
+        for data in utils.parallel_map(fetch_page, pages, concurrency):
+            items.extend(data)
+        return items
+
     def http_post(self, path, query_data={}, post_data={}, files=None,
                   **kwargs):
         """Make a POST request to the Gitlab server.
@@ -679,6 +1026,113 @@ class Gitlab(object):
         """
         return self.http_request('delete', path, **kwargs)
 
+    def http_download(self, path, target, query_data={}, segments=1,
+                      chunk_size=1024 * 1024, max_resumes=5, **kwargs):
+        """Download a file from the Gitlab server.
+
+        If the server supports range requests, an interrupted transfer is
+        resumed where it stopped, and the file can be downloaded in several
+        segments in parallel.
+
+        Args:
+            path (str): Path or full URL to query ('/projects' or
+                        'http://whatever/v4/api/projecs')
+            target (str or file): Path of the destination file, or a file
+                object opened in binary mode. Segmented downloads require a
+                seekable file object. The file created for a path is removed
+                if the download fails.
+            query_data (dict): Data to send as query parameters
+            segments (int): Number of parts of the file to download in
+                parallel
+            chunk_size (int): Size of the blocks written to the file
+            max_resumes (int): Maximum number of times an interrupted
+                transfer is resumed
+            deadline (float): Time budget for the whole transfer, in seconds
+            **kwargs: Extra options to send to the server (e.g. sudo)
+
+        Returns:
+            int: The number of bytes written
+
+        Raises:
+            GitlabHttpError: When the return code is not 2xx, or when the
+                size of the downloaded data doesn't match the size announced
+                by the server
+            GitlabTimeoutError: When the deadline is passed
+        """
+        deadline = gitlab.deadline.get_deadline(kwargs)
+        if deadline is not None:
+            kwargs['deadline'] = deadline
+
+        if isinstance(target, six.string_types):
+            try:
+                with open(target, 'wb') as f:
+                    return self.http_download(path, f, query_data=query_data,
+                                              segments=segments,
+                                              chunk_size=chunk_size,
+                                              max_resumes=max_resumes,
+                                              **kwargs)
+            except Exception:
+                # Don't leave a truncated file behind
+                if os.path.exists(target):
+                    os.remove(target)
+                raise
+
+        def request(start, end):
+            return self._range_request(path, query_data, start, end, kwargs)
+
+        try:
+            result = request(0, None)
+        except GitlabHttpError as e:
+            # Range requests on empty files are rejected
+            if e.response_code != 416:
+                raise
+            result = self.http_request('get', path, query_data=query_data,
+                                       streamed=True, **kwargs)
+        ranged = result.status_code == 206
+        total = _content_size(result)
+
+        if segments > 1 and ranged and total and _seekable(target):
+            result.close()
+            return self._download_segments(request, target, total, segments,
+                                           chunk_size, max_resumes, deadline)
+
+        return _download_range(request, result, target, 0, total, ranged,
+                               chunk_size, max_resumes, deadline=deadline)
+
+    def _range_request(self, path, query_data, start, end, kwargs):
+        # Byte offsets are meaningless for compressed content
+        headers = {
+            'Range': 'bytes=%d-%s' % (start, '' if end is None else end - 1),
+            'Accept-Encoding': 'identity',
+        }
+        return self.http_request('get', path, query_data=query_data,
+                                 streamed=True, extra_headers=headers,
+                                 **kwargs)
+
+    def _download_segments(self, request, f, total, segments, chunk_size,
+                           max_resumes, deadline=None):
+        base = f.tell()
+        lock = threading.Lock()
+
+        def fetch(bounds):
+            start, end = bounds
+            result = request(start, end)
+            if result.status_code != 206:
+                result.close()
+                raise GitlabHttpError(
+                    response_code=result.status_code,
+                    error_message='The server ignored the range request')
+            return _download_range(request, result, f, start, end, True,
+                                   chunk_size, max_resumes, lock, base,
+                                   deadline)
+
+        bounds = [(i * total // segments, (i + 1) * total // segments)
+                  for i in range(segments)]
+        bounds = [(start, end) for start, end in bounds if start < end]
+        size = sum(utils.parallel_map(fetch, bounds, len(bounds)))
+        f.seek(base + total)
+        return size
+
     @on_http_error(GitlabSearchError)
     def search(self, scope, search, **kwargs):
         """Search GitLab resources matching the provided string.'
@@ -699,31 +1153,148 @@ class Gitlab(object):
         return self.http_list('/search', query_data=data, **kwargs)
 
 
+# Connection errors that retrying doesn't fix
+_PERMANENT_ERRORS = (requests.exceptions.SSLError,
+                     requests.exceptions.ProxyError)
+
+
+def _connection_failed(error):
+    """Whether a requests error means the connection wasn't established.
+
+    requests raises a plain ConnectionError for a refused connection or a
+    failed name resolution, the urllib3 reason chain tells them apart from
+    the errors happening once the request is sent.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, (requests.exceptions.ConnectTimeout,
+                              urllib3.exceptions.NewConnectionError,
+                              urllib3.exceptions.ConnectTimeoutError)):
+            return True
+        reason = getattr(error, 'reason', None)
+        if reason is None and error.args:
+            reason = error.args[0]
+        error = reason if isinstance(reason, BaseException) else None
+    return False
+
+
+# Errors raised by requests when a transfer is interrupted
+_TRANSFER_ERRORS = (requests.exceptions.ChunkedEncodingError,
+                    requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout)
+
+
+def _content_size(result):
+    """Return the total size of a download, or None if unknown."""
+    content_range = result.headers.get('Content-Range', '')
+    if result.status_code == 206 and '/' in content_range:
+        total = content_range.rsplit('/', 1)[1]
+        return int(total) if total.isdigit() else None
+    if 'Content-Encoding' not in result.headers:
+        length = result.headers.get('Content-Length', '')
+        if length.isdigit():
+            return int(length)
+    return None
+
+
+def _seekable(f):
+    try:
+        return f.seekable()
+    except (AttributeError, IOError, ValueError):
+        return False
+
+
+def _download_range(request, result, f, start, end, ranged, chunk_size,
+                    max_resumes, lock=None, base=0, deadline=None):
+    """Write the bytes ``start`` to ``end`` of a download in ``f``.
+
+    When the transfer is interrupted a new range request is sent to get the
+    missing data, if ``ranged`` is True. With a ``lock`` the data is written
+    at its position in the file, so that several threads can write in it.
+    The ``deadline`` is checked before writing each chunk.
+    """
+    pos = start
+    resumes = 0
+    while True:
+        try:
+            chunks = result.iter_content(chunk_size=chunk_size)
+            if deadline is not None:
+                chunks = deadline.guard(chunks)
+            for chunk in chunks:
+                if lock is None:
+                    f.write(chunk)
+                else:
+                    with lock:
+                        f.seek(base + pos)
+                        f.write(chunk)
+                pos += len(chunk)
+        except _TRANSFER_ERRORS:
+            if not ranged or resumes >= max_resumes:
+                raise
+        else:
+            if end is None or pos >= end or not ranged \
+                    or resumes >= max_resumes:
+                break
+        finally:
+            result.close()
+
+        resumes += 1
+        result = request(pos, end)
+        if result.status_code != 206:
+            result.close()
+            raise GitlabHttpError(
+                response_code=result.status_code,
+                error_message='The server ignored the range request')
+
+    if end is not None and pos != end:
+        raise GitlabHttpError(
+            error_message='Incomplete download: %d bytes received, %d '
+                          'expected' % (pos - start, end - start))
+    return pos - start
+
+
 class GitlabList(object):
     """Generator representing a list of remote objects.
 
     The object handles the links returned by a query to the API, and will call
     the API again when needed.
+
+    If `streamed` is True, the items of each page are decoded while the page
+    is downloaded, instead of decoding the whole page at once.
+
+    The deadline in effect when the object is created (``deadline`` argument
+    or :func:`~gitlab.deadline.budget`) applies to all the pages.
     """
 
-    def __init__(self, gl, url, query_data, get_next=True, **kwargs):
+    #: Size of the chunks read from the socket in streamed mode
+    chunk_size = 65536
+
+    def __init__(self, gl, url, query_data, get_next=True, streamed=False,
+                 **kwargs):
         self._gl = gl
+        self._streamed = streamed
+        self._deadline = gitlab.deadline.get_deadline(kwargs)
         self._query(url, query_data, **kwargs)
         self._get_next = get_next
 
     def _query(self, url, query_data={}, **kwargs):
         result = self._gl.http_request('get', url, query_data=query_data,
-                                       **kwargs)
+                                       streamed=self._streamed,
+                                       deadline=self._deadline, **kwargs)
         try:
-            self._next_url = result.links['next']['url']
+            next_url = result.links['next']['url']
         except KeyError:
-            self._next_url = None
-        self._current_page = result.headers.get('X-Page')
-        self._prev_page = result.headers.get('X-Prev-Page')
-        self._next_page = result.headers.get('X-Next-Page')
-        self._per_page = result.headers.get('X-Per-Page')
-        self._total_pages = result.headers.get('X-Total-Pages')
-        self._total = result.headers.get('X-Total')
+            next_url = None
+        self._set_pagination(result.headers, next_url)
+
+        if self._streamed:
+            self._data = None
+            chunks = result.iter_content(chunk_size=self.chunk_size)
+            if self._deadline is not None:
+                chunks = self._deadline.guard(chunks)
+            self._items = utils.iter_json_array(chunks)
+            return
 
         try:
             self._data = result.json()
@@ -731,12 +1302,24 @@ class GitlabList(object):
             raise GitlabParsingError(
                 error_message="Failed to parse the server message")
 
-        self._current = 0
+        self._items = iter(self._data)
+
+    def _set_pagination(self, headers, next_url):
+        self._next_url = next_url
+        self._current_page = headers.get('X-Page')
+        self._prev_page = headers.get('X-Prev-Page')
+        self._next_page = headers.get('X-Next-Page')
+        self._per_page = headers.get('X-Per-Page')
+        self._total_pages = headers.get('X-Total-Pages')
+        self._total = headers.get('X-Total')
 
     @property
     def current_page(self):
-        """The current page number."""
-        return int(self._current_page)
+        """The current page number.
+
+        None with keyset pagination.
+        """
+        return int(self._current_page) if self._current_page else None
 
     @property
     def prev_page(self):
@@ -757,35 +1340,49 @@ class GitlabList(object):
     @property
     def per_page(self):
         """The number of items per page."""
-        return int(self._per_page)
+        return int(self._per_page) if self._per_page else None
 
     @property
     def total_pages(self):
-        """The total number of pages."""
-        return int(self._total_pages)
+        """The total number of pages.
+
+        None if the server didn't send it (keyset pagination and large
+        collections).
+        """
+        return int(self._total_pages) if self._total_pages else None
 
     @property
     def total(self):
-        """The total number of items."""
-        return int(self._total)
+        """The total number of items.
+
+        None if the server didn't send it (keyset pagination and large
+        collections).
+        """
+        return int(self._total) if self._total else None
 
     def __iter__(self):
         return self
 
     def __len__(self):
-        return int(self._total)
+        total = self.total
+        if total is None:
+            # TypeError keeps list(obj) working: it only uses len() as a hint
+            raise TypeError("The server didn't send the total number of "
+                            "items (keyset pagination or large collection)")
+        return total
 
     def __next__(self):
         return self.next()
 
     def next(self):
         try:
-            item = self._data[self._current]
-            self._current += 1
-            return item
-        except IndexError:
+            return next(self._items)
+        except StopIteration:
             if self._next_url and self._get_next is True:
                 self._query(self._next_url)
                 return self.next()
 
             raise StopIteration
+        except ValueError:
+            raise GitlabParsingError(
+                error_message="Failed to parse the server message")
@@ -0,0 +1,1237 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Gauvain Pocentek <gauvain@pocentek.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Asynchronous wrapper for the GitLab API.
+
+This module requires python 3.5+ and the ``aiohttp`` package.
+"""
+
+import asyncio
+import copy
+import functools
+import inspect
+import json
+import ssl
+import time
+from urllib.parse import urlencode
+from urllib.parse import urlparse
+
+try:
+    import aiohttp
+    import yarl
+except ImportError:
+    aiohttp = yarl = None
+
+import gitlab
+import gitlab.deadline
+import gitlab.metrics
+from gitlab import base
+from gitlab import cli
+from gitlab import exceptions as exc
+from gitlab import mixins
+from gitlab import utils
+from gitlab.v4 import objects
+
+
+def _on_http_error(error):
+    """Coroutine version of :func:`gitlab.exceptions.on_http_error`."""
+    def wrap(f):
+        @functools.wraps(f)
+        async def wrapped_f(*args, **kwargs):
+            try:
+                return await f(*args, **kwargs)
+            except exc.GitlabHttpError as e:
+                raise error(e.error_message, e.response_code, e.response_body)
+        return wrapped_f
+    return wrap
+
+
+def _encode_params(params):
+    # Mimic the requests encoding: None values are dropped and lists are
+    # sent as repeated keys.
+    items = []
+    for k, v in params.items():
+        if v is None:
+            continue
+        if isinstance(v, (list, tuple)):
+            items.extend((k, str(item)) for item in v)
+        else:
+            items.append((k, str(v)))
+    return urlencode(items)
+
+
+def _error_message(body):
+    error_message = body
+    try:
+        error_json = json.loads(body.decode())
+        for k in ('message', 'error'):
+            if k in error_json:
+                error_message = error_json[k]
+    except (KeyError, ValueError, TypeError, AttributeError):
+        pass
+    return error_message
+
+
+async def _sleep(delay, deadline):
+    # See gitlab.deadline.Deadline.sleep
+    if deadline is not None:
+        deadline.check_delay(delay)
+    await asyncio.sleep(delay)
+
+
+def _unsupported(name):
+    def method(*args, **kwargs):
+        raise NotImplementedError("%s() is not supported by the asynchronous "
+                                  "client" % name)
+    method.__name__ = name
+    return method
+
+
+# Gitlab arguments only used by the synchronous requests
+_UNSUPPORTED_ARGS = ('cache', 'blob_cache', 'middlewares', 'transfer_stats')
+
+
+class _Call(object):
+    def __init__(self):
+        self.future = asyncio.get_event_loop().create_future()
+        self.waiters = 0
+
+
+class AsyncSingleFlight(object):
+    """Coroutine version of :class:`gitlab.singleflight.SingleFlight`."""
+
+    def __init__(self):
+        self._calls = {}
+
+    def __getstate__(self):
+        return {}
+
+    def __setstate__(self, state):
+        self.__init__()
+
+    async def do(self, key, func, deadline=None):
+        """Await ``func()``, or wait for the call in progress for ``key``.
+
+        See :meth:`gitlab.singleflight.SingleFlight.do`.
+        """
+        while True:
+            call = self._calls.get(key)
+            if call is None:
+                break
+            call.waiters += 1
+            timeout = None if deadline is None else deadline.remaining()
+            try:
+                done, result = await asyncio.wait_for(
+                    asyncio.shield(call.future), timeout)
+            except asyncio.TimeoutError:
+                if call.future.done():
+                    # Raised by the call itself
+                    raise
+                call.waiters -= 1
+                raise deadline.error()
+            if done:
+                return copy.deepcopy(result)
+            # The leader ran out of time or was cancelled, try again
+
+        call = self._calls[key] = _Call()
+        try:
+            result = await func()
+        except (exc.GitlabTimeoutError, asyncio.CancelledError):
+            # The deadline and the cancellation of the leader task don't
+            # apply to the waiters: one of them becomes the leader
+            call.future.set_result((False, None))
+            raise
+        except Exception as e:
+            if call.waiters:
+                call.future.set_exception(e)
+            raise
+        except BaseException:
+            call.future.set_result((False, None))
+            raise
+        finally:
+            del self._calls[key]
+        call.future.set_result((True, result))
+        # The waiters copy the original result, it must not be modified
+        return copy.deepcopy(result) if call.waiters else result
+
+
+class AsyncGitlab(gitlab.Gitlab):
+    """Represents a GitLab server connection, using asyncio.
+
+    The HTTP methods, the server-wide helpers (``auth()``, ``version()``,
+    ``search()``...) and the CRUD methods of the managers and objects are
+    coroutines. Custom actions of the v4 objects and ``http_download()`` are
+    not supported and raise ``NotImplementedError``.
+
+    Args:
+        url (str): The URL of the GitLab server.
+        session (aiohttp.ClientSession): The session to use. If not provided
+            a session is created on the first request.
+        **kwargs: Other :class:`~gitlab.Gitlab` arguments. ``pool_maxsize``
+            sets the maximum number of simultaneous connections of the
+            created session. ``cache``, ``blob_cache``, ``middlewares`` and
+            ``transfer_stats`` are not supported.
+
+    Raises:
+        ValueError: If an unsupported argument is given.
+    """
+
+    def __init__(self, url, session=None, **kwargs):
+        if aiohttp is None:
+            raise ImportError("The aiohttp package is required to use "
+                              "AsyncGitlab")
+        for name in _UNSUPPORTED_ARGS:
+            if kwargs.get(name) is not None:
+                raise ValueError("The %s argument is not supported by "
+                                 "AsyncGitlab" % name)
+        super(AsyncGitlab, self).__init__(url, **kwargs)
+        self.session = session
+        self._pool_maxsize = kwargs.get('pool_maxsize')
+        if self._single_flight is not None:
+            self._single_flight = AsyncSingleFlight()
+
+        # Replace the managers with their asynchronous variant
+        for name, value in list(self.__dict__.items()):
+            if isinstance(value, base.RESTManager):
+                setattr(self, name, _async_class(type(value))(self))
+
+    http_download = _unsupported('http_download')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        """Close the underlying aiohttp session."""
+        if self.session is not None:
+            await self.session.close()
+
+    def _get_session(self):
+        if self.session is None:
+            connector = None
+            if self._pool_maxsize:
+                connector = aiohttp.TCPConnector(limit=self._pool_maxsize)
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    async def auth(self):
+        """Performs an authentication.
+
+        See :meth:`gitlab.Gitlab.auth`.
+        """
+        if self.private_token or self.oauth_token:
+            manager = _async_class(self._objects.CurrentUserManager)(self)
+            self.user = await manager.get()
+        else:
+            data = {'email': self.email, 'password': self.password}
+            r = await self.http_post('/session', data)
+            manager = _async_class(self._objects.CurrentUserManager)(self)
+            self.user = manager._obj_cls(manager, r)
+            self.private_token = self.user.private_token
+            self._set_auth_info()
+
+    async def version(self):
+        """Returns the version and revision of the gitlab server.
+
+        See :meth:`gitlab.Gitlab.version`.
+        """
+        if self._server_version is None:
+            try:
+                data = await self.http_get('/version')
+                self._server_version = data['version']
+                self._server_revision = data['revision']
+            except Exception:
+                self._server_version = self._server_revision = 'unknown'
+
+        return self._server_version, self._server_revision
+
+    @_on_http_error(exc.GitlabVerifyError)
+    async def lint(self, content, **kwargs):
+        """Validate a gitlab CI configuration.
+
+        See :meth:`gitlab.Gitlab.lint`.
+        """
+        post_data = {'content': content}
+        data = await self.http_post('/ci/lint', post_data=post_data, **kwargs)
+        return (data['status'] == 'valid', data['errors'])
+
+    @_on_http_error(exc.GitlabMarkdownError)
+    async def markdown(self, text, gfm=False, project=None, **kwargs):
+        """Render an arbitrary Markdown document.
+
+        See :meth:`gitlab.Gitlab.markdown`.
+        """
+        post_data = {'text': text, 'gfm': gfm}
+        if project is not None:
+            post_data['project'] = project
+        data = await self.http_post('/markdown', post_data=post_data,
+                                    **kwargs)
+        return data['html']
+
+    @_on_http_error(exc.GitlabLicenseError)
+    async def get_license(self, **kwargs):
+        """Retrieve information about the current license.
+
+        See :meth:`gitlab.Gitlab.get_license`.
+        """
+        return await self.http_get('/license', **kwargs)
+
+    @_on_http_error(exc.GitlabLicenseError)
+    async def set_license(self, license, **kwargs):
+        """Add a new license.
+
+        See :meth:`gitlab.Gitlab.set_license`.
+        """
+        data = {'license': license}
+        return await self.http_post('/license', post_data=data, **kwargs)
+
+    @_on_http_error(exc.GitlabSearchError)
+    async def search(self, scope, search, **kwargs):
+        """Search GitLab resources matching the provided string.
+
+        See :meth:`gitlab.Gitlab.search`.
+        """
+        data = {'scope': scope, 'search': search}
+        return await self.http_list('/search', query_data=data, **kwargs)
+
+    def _get_request_opts(self):
+        opts = self._get_session_opts(content_type='application/json')
+        if opts['auth'] is not None:
+            opts['auth'] = aiohttp.BasicAuth(opts['auth'].username,
+                                             opts['auth'].password)
+        verify = opts.pop('verify')
+        if verify is True:
+            opts['ssl'] = None
+        elif verify is False:
+            opts['ssl'] = False
+        else:
+            opts['ssl'] = ssl.create_default_context(cafile=verify)
+        if opts['timeout'] is not None:
+            opts['timeout'] = aiohttp.ClientTimeout(total=opts['timeout'])
+        else:
+            del opts['timeout']
+        return opts
+
+    def _check_redirects(self, result):
+        # See Gitlab._check_redirects
+        if result.history and self._base_url.startswith('http:'):
+            for item in result.history:
+                if item.status not in (301, 302):
+                    continue
+                if item.method == 'GET':
+                    continue
+                location = item.headers.get('Location', None)
+                if location and location.startswith('https://'):
+                    raise exc.RedirectError(gitlab.REDIRECT_MSG)
+
+    async def http_request(self, verb, path, query_data={}, post_data=None,
+                           streamed=False, files=None, extra_headers=None,
+                           **kwargs):
+        """Make an HTTP request to the Gitlab server.
+
+        See :meth:`gitlab.Gitlab.http_request`.
+
+        Only the ``deadline`` argument limits the time spent by the request,
+        :func:`gitlab.deadline.budget` is ignored: it is bound to a thread,
+        not to a task. The ``bulkhead`` is ignored too, because waiting for
+        a slot would block the event loop: use an :class:`asyncio.Semaphore`
+        instead.
+
+        Returns:
+            An aiohttp response object. The body has already been read,
+            unless `streamed` is True.
+
+        Raises:
+            GitlabHttpError: When the return code is not 2xx
+            GitlabTimeoutError: When the deadline is passed
+        """
+        retry_policy = gitlab.retry.get_policy(self.retry_policy, kwargs)
+        deadline = gitlab.deadline.get_deadline(kwargs, inherit=False)
+        url = self._build_url(path)
+        params = self._build_params(query_data, kwargs)
+        query_string = _encode_params(params)
+        if query_string:
+            url = '%s%s%s' % (url, '&' if '?' in url else '?', query_string)
+        # See Gitlab.http_request for the reasons of the '.' encoding
+        url = yarl.URL(utils.sanitized_url(url), encoded=True)
+
+        opts = self._get_request_opts()
+        if extra_headers:
+            opts['headers'].update(extra_headers)
+
+        # We need to deal with json vs. data when uploading files
+        if files:
+            json_data = None
+            del opts['headers']['Content-type']
+        else:
+            json_data = post_data
+            data = None
+
+        cur_retries = 0
+        result = error = ttfb = None
+        endpoint = gitlab.metrics.endpoint_template(str(url), self._url)
+        circuit = None
+        if self.circuit_breaker is not None:
+            circuit = self.circuit_breaker.key(urlparse(str(url)).netloc,
+                                               endpoint)
+        start = time.time()
+
+        session = self._get_session()
+        try:
+            while True:
+                result = None
+                if self.rate_limiter is not None:
+                    delay = self.rate_limiter.reserve(deadline)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+                if deadline is not None:
+                    deadline.check()
+                    opts['timeout'] = aiohttp.ClientTimeout(
+                        total=deadline.socket_timeout(self.timeout))
+
+                if files:
+                    # A FormData object can only be sent once
+                    data = aiohttp.FormData()
+                    for k, v in (post_data or {}).items():
+                        data.add_field(k, str(v))
+                    for k, v in files.items():
+                        data.add_field(k, v[1], filename=v[0])
+
+                if circuit is not None:
+                    self._allow_circuit(circuit)
+
+                sent_at = time.time()
+                try:
+                    result = await session.request(verb, url, json=json_data,
+                                                   data=data, **opts)
+                except (aiohttp.ClientConnectionError,
+                        asyncio.TimeoutError) as e:
+                    if circuit is not None:
+                        self._record_circuit(circuit, None)
+                    if deadline is not None:
+                        deadline.check()
+                    sent = not isinstance(e, aiohttp.ClientConnectorError)
+                    # See gitlab._PERMANENT_ERRORS
+                    if (isinstance(e, (aiohttp.ClientSSLError,
+                                       aiohttp.ClientProxyConnectionError)) or
+                            not retry_policy.retry_error(verb, cur_retries,
+                                                         sent)):
+                        raise
+                    await _sleep(retry_policy.wait_time(cur_retries),
+                                 deadline)
+                    cur_retries += 1
+                    continue
+
+                ttfb = time.time() - sent_at
+                if circuit is not None:
+                    self._record_circuit(circuit, result.status)
+                self._check_redirects(result)
+
+                if self.rate_limiter is not None:
+                    self.rate_limiter.update(result.headers)
+
+                if 200 <= result.status < 300:
+                    if not streamed:
+                        content = await result.read()
+                        self.metrics.record_bytes_in(verb, endpoint,
+                                                     len(content))
+                    return result
+
+                if retry_policy.retry_status(verb, result.status, cur_retries):
+                    result.release()
+                    await _sleep(retry_policy.wait_time(cur_retries,
+                                                        result.headers),
+                                 deadline)
+                    cur_retries += 1
+                    continue
+
+                body = await result.read()
+                error_message = _error_message(body)
+
+                if result.status == 401:
+                    raise exc.GitlabAuthenticationError(
+                        response_code=result.status,
+                        error_message=error_message,
+                        response_body=body)
+
+                raise exc.GitlabHttpError(response_code=result.status,
+                                          error_message=error_message,
+                                          response_body=body)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            status = (result.status if result is not None
+                      else type(error).__name__)
+            latency = {'ttfb': ttfb, 'total': time.time() - start}
+            bytes_out = len(json.dumps(json_data)) if json_data else 0
+            self.metrics.record(verb, endpoint, status, retries=cur_retries,
+                                bytes_out=bytes_out, latency=latency)
+
+    async def http_get(self, path, query_data={}, streamed=False, raw=False,
+                       **kwargs):
+        """Make a GET request to the Gitlab server.
+
+        See :meth:`gitlab.Gitlab.http_get`.
+        """
+        if (self._single_flight is not None and not streamed and not raw
+                and 'extra_headers' not in kwargs):
+            key = self._single_flight_key(path, query_data, kwargs)
+            deadline = gitlab.deadline.get_deadline(kwargs, inherit=False)
+            return await self._single_flight.do(
+                key, functools.partial(self._http_get, path, query_data,
+                                       deadline=deadline, **kwargs),
+                deadline)
+        return await self._http_get(path, query_data, streamed, raw,
+                                    **kwargs)
+
+    async def _http_get(self, path, query_data={}, streamed=False, raw=False,
+                        **kwargs):
+        result = await self.http_request('get', path, query_data=query_data,
+                                         streamed=streamed, **kwargs)
+
+        if (result.content_type == 'application/json'
+           and not streamed
+           and not raw):
+            try:
+                return await result.json()
+            except Exception:
+                raise exc.GitlabParsingError(
+                    error_message="Failed to parse the server message")
+        else:
+            return result
+
+    async def http_list(self, path, query_data={}, as_list=None, **kwargs):
+        """Make a GET request to the Gitlab server for list-oriented queries.
+
+        See :meth:`gitlab.Gitlab.http_list`.
+
+        Returns:
+            list: A list of the objects returned by the server. If `as_list` is
+            False and no pagination-related arguments (`page`, `per_page`,
+            `all`) are defined then an AsyncGitlabList object (asynchronous
+            iterator) is returned instead.
+        """
+        as_list = True if as_list is None else as_list
+
+        get_all = kwargs.pop('all', False)
+        concurrency = kwargs.pop('concurrency', None)
+        url = self._build_url(path)
+        # The same deadline applies to all the pages
+        deadline = gitlab.deadline.get_deadline(kwargs, inherit=False)
+        if deadline is not None:
+            kwargs['deadline'] = deadline
+
+        if get_all is True:
+            return await self._list_all(url, query_data, concurrency,
+                                        **kwargs)
+
+        if 'page' in kwargs or as_list is True:
+            # pagination requested, we return a list
+            gl_list = await AsyncGitlabList.create(self, url, query_data,
+                                                   get_next=False, **kwargs)
+            return await gl_list.as_list()
+
+        # No pagination, generator requested
+        return await AsyncGitlabList.create(self, url, query_data, **kwargs)
+
+    async def _list_all(self, url, query_data, concurrency, **kwargs):
+        first = await AsyncGitlabList.create(self, url, query_data, **kwargs)
+
+        # See Gitlab._list_all
+        if (not concurrency or concurrency < 2 or first._next_url is None
+           or not first._total_pages or not first._current_page
+           or self._is_keyset(query_data, kwargs)):
+            return await first.as_list()
+
+        kwargs.pop('page', None)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch_page(page):
+            async with semaphore:
+                gl_list = await AsyncGitlabList.create(
+                    self, url, query_data, get_next=False, page=page,
+                    **kwargs)
+            return gl_list._data
+
+        items = list(first._data)
+        pages = range(first.current_page + 1, first.total_pages + 1)
+        for data in await asyncio.gather(*[fetch_page(p) for p in pages]):
+            items.extend(data)
+        return items
+
+    async def http_post(self, path, query_data={}, post_data={}, files=None,
+                        **kwargs):
+        """Make a POST request to the Gitlab server.
+
+        See :meth:`gitlab.Gitlab.http_post`.
+        """
+        result = await self.http_request('post', path, query_data=query_data,
+                                         post_data=post_data, files=files,
+                                         **kwargs)
+        try:
+            if result.content_type == 'application/json':
+                return await result.json()
+        except Exception:
+            raise exc.GitlabParsingError(
+                error_message="Failed to parse the server message")
+        return result
+
+    async def http_put(self, path, query_data={}, post_data={}, files=None,
+                       **kwargs):
+        """Make a PUT request to the Gitlab server.
+
+        See :meth:`gitlab.Gitlab.http_put`.
+        """
+        result = await self.http_request('put', path, query_data=query_data,
+                                         post_data=post_data, files=files,
+                                         **kwargs)
+        try:
+            return await result.json(content_type=None)
+        except Exception:
+            raise exc.GitlabParsingError(
+                error_message="Failed to parse the server message")
+
+    async def http_delete(self, path, **kwargs):
+        """Make a DELETE request to the Gitlab server.
+
+        See :meth:`gitlab.Gitlab.http_delete`.
+        """
+        return await self.http_request('delete', path, **kwargs)
+
+
+class AsyncGitlabList(gitlab.GitlabList):
+    """Asynchronous iterator representing a list of remote objects.
+
+    Use :meth:`create` to build such objects.
+    """
+
+    def __init__(self, gl, url, query_data, get_next=True, deadline=None,
+                 **kwargs):
+        self._gl = gl
+        self._get_next = get_next
+        self._deadline = deadline
+
+    @classmethod
+    async def create(cls, gl, url, query_data, get_next=True, **kwargs):
+        """Create the list and query its first page."""
+        deadline = gitlab.deadline.get_deadline(kwargs, inherit=False)
+        gl_list = cls(gl, url, query_data, get_next=get_next,
+                      deadline=deadline)
+        await gl_list._query(url, query_data, **kwargs)
+        return gl_list
+
+    async def _query(self, url, query_data={}, **kwargs):
+        result = await self._gl.http_request('get', url,
+                                             query_data=query_data,
+                                             deadline=self._deadline,
+                                             **kwargs)
+        try:
+            next_url = str(result.links['next']['url'])
+        except KeyError:
+            next_url = None
+        self._set_pagination(result.headers, next_url)
+
+        try:
+            self._data = await result.json(content_type=None)
+        except Exception:
+            raise exc.GitlabParsingError(
+                error_message="Failed to parse the server message")
+
+        self._current = 0
+
+    async def as_list(self):
+        """Return all the remaining items in a list."""
+        items = []
+        async for item in self:
+            items.append(item)
+        return items
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            item = self._data[self._current]
+            self._current += 1
+            return item
+        except IndexError:
+            if self._next_url and self._get_next is True:
+                await self._query(self._next_url)
+                return await self.__anext__()
+
+            raise StopAsyncIteration
+
+    def next(self):
+        raise TypeError("AsyncGitlabList objects must be iterated with "
+                        "'async for'")
+
+
+class AsyncRESTObjectList(base.RESTObjectList):
+    """Asynchronous iterator representing a list of RESTObject's."""
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        data = await self._list.__anext__()
+        return self._obj_cls(self.manager, data)
+
+    def next(self):
+        raise TypeError("AsyncRESTObjectList objects must be iterated with "
+                        "'async for'")
+
+
+class AsyncGetMixin(object):
+    @_on_http_error(exc.GitlabGetError)
+    async def get(self, id, lazy=False, **kwargs):
+        """Retrieve a single object.
+
+        See :meth:`gitlab.mixins.GetMixin.get`.
+        """
+        if not isinstance(id, int):
+            id = id.replace('/', '%2F')
+        path = '%s/%s' % (self.path, id)
+        if lazy is True:
+            return self._obj_cls(self, {self._obj_cls._id_attr: id})
+        server_data = await self.gitlab.http_get(path, **kwargs)
+        return self._obj_cls(self, server_data)
+
+    async def get_many(self, ids, concurrency=1, **kwargs):
+        """Retrieve several objects.
+
+        See :meth:`gitlab.mixins.GetMixin.get_many`.
+        """
+        ids = list(ids)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(coro):
+            async with semaphore:
+                try:
+                    return await coro
+                except exc.GitlabError as e:
+                    return e
+
+        batches = self._get_many_batches(ids)
+        if batches is None:
+            return await asyncio.gather(*[run(self.get(id, **kwargs))
+                                          for id in ids])
+
+        results = await asyncio.gather(
+            *[run(self.list(**self._get_many_query(batch, kwargs)))
+              for batch in batches])
+        return self._get_many_collect(batches, results)
+
+
+class AsyncGetWithoutIdMixin(object):
+    @_on_http_error(exc.GitlabGetError)
+    async def get(self, id=None, **kwargs):
+        """Retrieve a single object.
+
+        See :meth:`gitlab.mixins.GetWithoutIdMixin.get`.
+        """
+        server_data = await self.gitlab.http_get(self.path, **kwargs)
+        if server_data is None:
+            return None
+        return self._obj_cls(self, server_data)
+
+
+class AsyncRefreshMixin(object):
+    @_on_http_error(exc.GitlabGetError)
+    async def refresh(self, **kwargs):
+        """Refresh a single object from server.
+
+        See :meth:`gitlab.mixins.RefreshMixin.refresh`.
+        """
+        if self._id_attr:
+            path = '%s/%s' % (self.manager.path, self.id)
+        else:
+            path = self.manager.path
+        server_data = await self.manager.gitlab.http_get(path, **kwargs)
+        self._update_attrs(server_data)
+
+
+class AsyncListMixin(object):
+    @_on_http_error(exc.GitlabListError)
+    async def list(self, **kwargs):
+        """Retrieve a list of objects.
+
+        See :meth:`gitlab.mixins.ListMixin.list`.
+
+        Returns:
+            list: The list of objects, or an asynchronous iterator if
+                `as_list` is False
+        """
+        path, data = self._prepare_list(kwargs)
+        obj = await self.gitlab.http_list(path, **data)
+        if isinstance(obj, list):
+            return [self._obj_cls(self, item) for item in obj]
+        else:
+            return AsyncRESTObjectList(self, self._obj_cls, obj)
+
+
+class AsyncCreateMixin(object):
+    @_on_http_error(exc.GitlabCreateError)
+    async def create(self, data, **kwargs):
+        """Create a new object.
+
+        See :meth:`gitlab.mixins.CreateMixin.create`.
+        """
+        self._check_missing_create_attrs(data)
+        data, files = mixins._transform_types(self, data)
+
+        # Handle specific URL for creation
+        path = kwargs.pop('path', self.path)
+        server_data = await self.gitlab.http_post(path, post_data=data,
+                                                  files=files, **kwargs)
+        return self._obj_cls(self, server_data)
+
+
+class AsyncUpdateMixin(object):
+    @_on_http_error(exc.GitlabUpdateError)
+    async def update(self, id=None, new_data={}, **kwargs):
+        """Update an object on the server.
+
+        See :meth:`gitlab.mixins.UpdateMixin.update`.
+        """
+        if id is None:
+            path = self.path
+        else:
+            path = '%s/%s' % (self.path, id)
+
+        self._check_missing_update_attrs(new_data)
+        new_data, files = mixins._transform_types(self, new_data)
+
+        http_method = self._get_update_method()
+        return await http_method(path, post_data=new_data, files=files,
+                                 **kwargs)
+
+
+class AsyncSetMixin(object):
+    @_on_http_error(exc.GitlabSetError)
+    async def set(self, key, value, **kwargs):
+        """Create or update the object.
+
+        See :meth:`gitlab.mixins.SetMixin.set`.
+        """
+        path = '%s/%s' % (self.path, key.replace('/', '%2F'))
+        data = {'value': value}
+        server_data = await self.gitlab.http_put(path, post_data=data,
+                                                 **kwargs)
+        return self._obj_cls(self, server_data)
+
+
+class AsyncDeleteMixin(object):
+    @_on_http_error(exc.GitlabDeleteError)
+    async def delete(self, id, **kwargs):
+        """Delete an object on the server.
+
+        See :meth:`gitlab.mixins.DeleteMixin.delete`.
+        """
+        if id is None:
+            path = self.path
+        else:
+            if not isinstance(id, int):
+                id = id.replace('/', '%2F')
+            path = '%s/%s' % (self.path, id)
+        await self.gitlab.http_delete(path, **kwargs)
+
+
+class AsyncSaveMixin(object):
+    async def save(self, **kwargs):
+        """Save the changes made to the object to the server.
+
+        See :meth:`gitlab.mixins.SaveMixin.save`.
+        """
+        updated_data = self._get_updated_data()
+        # Nothing to update. Server fails if sent an empty dict.
+        if not updated_data:
+            return
+
+        # call the manager
+        obj_id = self.get_id()
+        server_data = await self.manager.update(obj_id, updated_data,
+                                                **kwargs)
+        if server_data is not None:
+            self._update_attrs(server_data)
+
+
+class AsyncObjectDeleteMixin(object):
+    async def delete(self, **kwargs):
+        """Delete the object from the server.
+
+        See :meth:`gitlab.mixins.ObjectDeleteMixin.delete`.
+        """
+        await self.manager.delete(self.get_id(), **kwargs)
+
+
+# Asynchronous variants of the CRUD methods overridden by the v4 classes
+
+class _AsyncUserProjectManager(object):
+    async def list(self, **kwargs):
+        """Retrieve a list of objects.
+
+        See :meth:`gitlab.v4.objects.UserProjectManager.list`.
+        """
+        path = '/users/%s/projects' % self._parent.id
+        return await AsyncListMixin.list(self, path=path, **kwargs)
+
+
+class _AsyncApplicationSettingsManager(object):
+    async def update(self, id=None, new_data={}, **kwargs):
+        """Update an object on the server.
+
+        See :meth:`gitlab.v4.objects.ApplicationSettingsManager.update`.
+        """
+        data = new_data.copy()
+        if 'domain_whitelist' in data and data['domain_whitelist'] is None:
+            data.pop('domain_whitelist')
+        await AsyncUpdateMixin.update(self, id, data, **kwargs)
+
+
+class _AsyncFeatureManager(object):
+    @_on_http_error(exc.GitlabSetError)
+    async def set(self, name, value, feature_group=None, user=None,
+                  **kwargs):
+        """Create or update the object.
+
+        See :meth:`gitlab.v4.objects.FeatureManager.set`.
+        """
+        path = '%s/%s' % (self.path, name.replace('/', '%2F'))
+        data = {'value': value, 'feature_group': feature_group, 'user': user}
+        server_data = await self.gitlab.http_post(path, post_data=data,
+                                                  **kwargs)
+        return self._obj_cls(self, server_data)
+
+
+class _AsyncGroupEpicIssue(object):
+    async def save(self, **kwargs):
+        """Save the changes made to the object to the server.
+
+        See :meth:`gitlab.v4.objects.GroupEpicIssue.save`.
+        """
+        updated_data = self._get_updated_data()
+        # Nothing to update. Server fails if sent an empty dict.
+        if not updated_data:
+            return
+
+        # call the manager
+        obj_id = self.get_id()
+        await self.manager.update(obj_id, updated_data, **kwargs)
+
+
+class _AsyncGroupEpicIssueManager(object):
+    @_on_http_error(exc.GitlabCreateError)
+    async def create(self, data, **kwargs):
+        """Create a new object.
+
+        See :meth:`gitlab.v4.objects.GroupEpicIssueManager.create`.
+        """
+        mixins.CreateMixin._check_missing_create_attrs(self, data)
+        path = '%s/%s' % (self.path, data.pop('issue_id'))
+        server_data = await self.gitlab.http_post(path, **kwargs)
+        server_data['epic_issue_id'] = server_data['id']
+        return self._obj_cls(self, server_data)
+
+
+class _AsyncLDAPGroupManager(object):
+    @_on_http_error(exc.GitlabListError)
+    async def list(self, **kwargs):
+        """Retrieve a list of objects.
+
+        See :meth:`gitlab.v4.objects.LDAPGroupManager.list`.
+        """
+        data = kwargs.copy()
+        if self.gitlab.per_page:
+            data.setdefault('per_page', self.gitlab.per_page)
+
+        if 'provider' in data:
+            path = '/ldap/%s/groups' % data['provider']
+        else:
+            path = self._path
+
+        obj = await self.gitlab.http_list(path, **data)
+        if isinstance(obj, list):
+            return [self._obj_cls(self, item) for item in obj]
+        else:
+            return AsyncRESTObjectList(self, self._obj_cls, obj)
+
+
+class _AsyncProjectCommitStatusManager(object):
+    async def create(self, data, **kwargs):
+        """Create a new object.
+
+        See :meth:`gitlab.v4.objects.ProjectCommitStatusManager.create`.
+        """
+        base_path = '/projects/%(project_id)s/statuses/%(commit_id)s'
+        if 'project_id' in data and 'commit_id' in data:
+            path = base_path % data
+        else:
+            path = self._compute_path(base_path)
+        return await AsyncCreateMixin.create(self, data, path=path, **kwargs)
+
+
+class _AsyncProjectForkManager(object):
+    async def list(self, **kwargs):
+        """Retrieve a list of objects.
+
+        See :meth:`gitlab.v4.objects.ProjectForkManager.list`.
+        """
+        path = self._compute_path('/projects/%(project_id)s/forks')
+        return await AsyncListMixin.list(self, path=path, **kwargs)
+
+
+class _AsyncProjectIssueLinkManager(object):
+    @_on_http_error(exc.GitlabCreateError)
+    async def create(self, data, **kwargs):
+        """Create a new object.
+
+        See :meth:`gitlab.v4.objects.ProjectIssueLinkManager.create`.
+        """
+        self._check_missing_create_attrs(data)
+        server_data = await self.gitlab.http_post(self.path, post_data=data,
+                                                  **kwargs)
+        issue_manager = self._parent.manager
+        source_issue = issue_manager._obj_cls(issue_manager,
+                                              server_data['source_issue'])
+        target_issue = issue_manager._obj_cls(issue_manager,
+                                              server_data['target_issue'])
+        return source_issue, target_issue
+
+
+class _AsyncProjectLabel(object):
+    async def save(self, **kwargs):
+        """Saves the changes made to the object to the server.
+
+        See :meth:`gitlab.v4.objects.ProjectLabel.save`.
+        """
+        updated_data = self._get_updated_data()
+
+        # call the manager
+        server_data = await self.manager.update(None, updated_data, **kwargs)
+        self._update_attrs(server_data)
+
+
+class _AsyncProjectLabelManager(object):
+    @_on_http_error(exc.GitlabDeleteError)
+    async def delete(self, name, **kwargs):
+        """Delete a Label on the server.
+
+        See :meth:`gitlab.v4.objects.ProjectLabelManager.delete`.
+        """
+        await self.gitlab.http_delete(self.path, query_data={'name': name},
+                                      **kwargs)
+
+
+class _AsyncProjectFile(object):
+    async def save(self, branch, commit_message, **kwargs):
+        """Save the changes made to the file to the server.
+
+        See :meth:`gitlab.v4.objects.ProjectFile.save`.
+        """
+        self.branch = branch
+        self.commit_message = commit_message
+        self.file_path = self.file_path.replace('/', '%2F')
+        await AsyncSaveMixin.save(self, **kwargs)
+
+    async def delete(self, branch, commit_message, **kwargs):
+        """Delete the file from the server.
+
+        See :meth:`gitlab.v4.objects.ProjectFile.delete`.
+        """
+        file_path = self.get_id().replace('/', '%2F')
+        await self.manager.delete(file_path, branch, commit_message, **kwargs)
+
+
+class _AsyncProjectFileManager(object):
+    async def get(self, file_path, ref, **kwargs):
+        """Retrieve a single file.
+
+        See :meth:`gitlab.v4.objects.ProjectFileManager.get`.
+        """
+        file_path = file_path.replace('/', '%2F')
+        return await AsyncGetMixin.get(self, file_path, ref=ref, **kwargs)
+
+    @_on_http_error(exc.GitlabCreateError)
+    async def create(self, data, **kwargs):
+        """Create a new object.
+
+        See :meth:`gitlab.v4.objects.ProjectFileManager.create`.
+        """
+        self._check_missing_create_attrs(data)
+        new_data = data.copy()
+        file_path = new_data.pop('file_path').replace('/', '%2F')
+        path = '%s/%s' % (self.path, file_path)
+        server_data = await self.gitlab.http_post(path, post_data=new_data,
+                                                  **kwargs)
+        return self._obj_cls(self, server_data)
+
+    @_on_http_error(exc.GitlabUpdateError)
+    async def update(self, file_path, new_data={}, **kwargs):
+        """Update an object on the server.
+
+        See :meth:`gitlab.v4.objects.ProjectFileManager.update`.
+        """
+        data = new_data.copy()
+        file_path = file_path.replace('/', '%2F')
+        data['file_path'] = file_path
+        path = '%s/%s' % (self.path, file_path)
+        self._check_missing_update_attrs(data)
+        return await self.gitlab.http_put(path, post_data=data, **kwargs)
+
+    @_on_http_error(exc.GitlabDeleteError)
+    async def delete(self, file_path, branch, commit_message, **kwargs):
+        """Delete a file on the server.
+
+        See :meth:`gitlab.v4.objects.ProjectFileManager.delete`.
+        """
+        path = '%s/%s' % (self.path, file_path.replace('/', '%2F'))
+        data = {'branch': branch, 'commit_message': commit_message}
+        await self.gitlab.http_delete(path, query_data=data, **kwargs)
+
+
+class _AsyncProjectPipelineManager(object):
+    async def create(self, data, **kwargs):
+        """Creates a new object.
+
+        See :meth:`gitlab.v4.objects.ProjectPipelineManager.create`.
+        """
+        path = self.path[:-1]  # drop the 's'
+        return await AsyncCreateMixin.create(self, data, path=path, **kwargs)
+
+
+class _AsyncProjectServiceManager(object):
+    async def get(self, id, **kwargs):
+        """Retrieve a single object.
+
+        See :meth:`gitlab.v4.objects.ProjectServiceManager.get`.
+        """
+        obj = await AsyncGetMixin.get(self, id, **kwargs)
+        obj.id = id
+        return obj
+
+    async def update(self, id=None, new_data={}, **kwargs):
+        """Update an object on the server.
+
+        See :meth:`gitlab.v4.objects.ProjectServiceManager.update`.
+        """
+        await AsyncUpdateMixin.update(self, id, new_data, **kwargs)
+        self.id = id
+
+
+_ASYNC_OVERRIDES = {
+    objects.UserProjectManager: _AsyncUserProjectManager,
+    objects.ApplicationSettingsManager: _AsyncApplicationSettingsManager,
+    objects.FeatureManager: _AsyncFeatureManager,
+    objects.GroupEpicIssue: _AsyncGroupEpicIssue,
+    objects.GroupEpicIssueManager: _AsyncGroupEpicIssueManager,
+    objects.LDAPGroupManager: _AsyncLDAPGroupManager,
+    objects.ProjectCommitStatusManager: _AsyncProjectCommitStatusManager,
+    objects.ProjectForkManager: _AsyncProjectForkManager,
+    objects.ProjectIssueLinkManager: _AsyncProjectIssueLinkManager,
+    objects.ProjectLabel: _AsyncProjectLabel,
+    objects.ProjectLabelManager: _AsyncProjectLabelManager,
+    objects.ProjectFile: _AsyncProjectFile,
+    objects.ProjectFileManager: _AsyncProjectFileManager,
+    objects.ProjectPipelineManager: _AsyncProjectPipelineManager,
+    objects.ProjectServiceManager: _AsyncProjectServiceManager,
+}
+
+
+class _AsyncRESTObjectMixin(object):
+    def _get_manager_class(self, cls_name):
+        cls = super(_AsyncRESTObjectMixin, self)._get_manager_class(cls_name)
+        return _async_class(cls)
+
+
+_ASYNC_MIXINS = (
+    (mixins.GetMixin, AsyncGetMixin),
+    (mixins.GetWithoutIdMixin, AsyncGetWithoutIdMixin),
+    (mixins.RefreshMixin, AsyncRefreshMixin),
+    (mixins.ListMixin, AsyncListMixin),
+    (mixins.CreateMixin, AsyncCreateMixin),
+    (mixins.UpdateMixin, AsyncUpdateMixin),
+    (mixins.SetMixin, AsyncSetMixin),
+    (mixins.DeleteMixin, AsyncDeleteMixin),
+    (mixins.SaveMixin, AsyncSaveMixin),
+    (mixins.ObjectDeleteMixin, AsyncObjectDeleteMixin),
+)
+
+_async_classes = {}
+
+
+def _sync_methods(cls, in_obj, override):
+    """Return the names of the methods of ``cls`` using the synchronous API.
+
+    These are the custom actions, and the methods defined by the classes of
+    the objects module (helpers, or overrides of the CRUD methods), except
+    the ones with an asynchronous variant in ``override``.
+    """
+    names = set()
+    cls_name = cls.__name__
+    if not in_obj:
+        cls_name = cls_name.replace('Manager', '')
+    for action, (_, _, action_in_obj) in cli.custom_actions.get(cls_name,
+                                                                {}).items():
+        if action_in_obj == in_obj:
+            names.add(action.replace('-', '_'))
+    for klass in cls.__mro__:
+        if klass.__module__ != cls.__module__:
+            continue
+        for name, value in vars(klass).items():
+            if inspect.isfunction(value) and not name.startswith('_'):
+                names.add(name)
+    if override is not None:
+        names.difference_update(vars(override))
+    return names
+
+
+def _async_class(cls):
+    """Return the variant of a manager or object class with async methods.
+
+    The new class inherits from ``cls`` so that the existing definitions
+    (paths, attributes, types, nested managers) are reused.
+    """
+    try:
+        return _async_classes[cls]
+    except KeyError:
+        pass
+
+    bases = tuple(async_mixin for mixin, async_mixin in _ASYNC_MIXINS
+                  if issubclass(cls, mixin))
+    # Keep the module of the original class, RESTObject uses it to find the
+    # nested managers classes
+    attrs = {'__module__': cls.__module__}
+    in_obj = issubclass(cls, base.RESTObject)
+    if in_obj:
+        bases = (_AsyncRESTObjectMixin, ) + bases
+    else:
+        obj_cls = getattr(cls, '_obj_cls', None)
+        if isinstance(obj_cls, type) and issubclass(obj_cls, base.RESTObject):
+            attrs['_obj_cls'] = _async_class(obj_cls)
+
+    override = _ASYNC_OVERRIDES.get(cls)
+    if override is not None:
+        bases = (override, ) + bases
+    for name in _sync_methods(cls, in_obj, override):
+        attrs[name] = _unsupported(name)
+
+    async_cls = type(cls.__name__, bases + (cls, ), attrs)
+    _async_classes[cls] = async_cls
+    return async_cls
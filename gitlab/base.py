@@ -15,7 +15,7 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import importlib
+import sys
 
 
 class RESTObject(object):
@@ -31,27 +31,47 @@ class RESTObject(object):
     _id_attr = 'id'
 
     def __init__(self, manager, attrs):
+        # Nested managers and the _updated_attrs dict are only created when
+        # they are first used, to keep large lists of objects cheap
         self.__dict__.update({
             'manager': manager,
             '_attrs': attrs,
-            '_updated_attrs': {},
-            '_module': importlib.import_module(self.__module__)
+            '_parent_attrs': manager.parent_attrs,
         })
-        self.__dict__['_parent_attrs'] = self.manager.parent_attrs
-        self._create_managers()
 
     def __getstate__(self):
-        state = self.__dict__.copy()
-        module = state.pop('_module')
-        state['_module_name'] = module.__name__
-        return state
+        return self.__dict__.copy()
 
     def __setstate__(self, state):
-        module_name = state.pop('_module_name')
+        # Objects pickled by older versions hold a module reference
+        state.pop('_module_name', None)
+        state.pop('_module', None)
         self.__dict__.update(state)
-        self._module = importlib.import_module(module_name)
+
+    @property
+    def _module(self):
+        return sys.modules[type(self).__module__]
+
+    @property
+    def _updated_attrs(self):
+        return self.__dict__.setdefault('_updated_attrs', {})
+
+    @classmethod
+    def _manager_names(cls):
+        # Maps the managers attribute names to their class names, computed
+        # once per class
+        try:
+            return cls.__dict__['_managers_by_attr']
+        except KeyError:
+            names = dict(getattr(cls, '_managers', None) or ())
+            cls._managers_by_attr = names
+            return names
 
     def __getattr__(self, name):
+        cls_name = type(self)._manager_names().get(name)
+        if cls_name is not None and 'manager' in self.__dict__:
+            return self._create_manager(name, cls_name)
+
         try:
             return self.__dict__['_updated_attrs'][name]
         except KeyError:
@@ -69,8 +89,8 @@ class RESTObject(object):
                 # note: _parent_attrs will only store simple values (int) so we
                 # don't make this check in the next except block.
                 if isinstance(value, list):
-                    self.__dict__['_updated_attrs'][name] = value[:]
-                    return self.__dict__['_updated_attrs'][name]
+                    self._updated_attrs[name] = value[:]
+                    return self._updated_attrs[name]
 
                 return value
 
@@ -81,11 +101,11 @@ class RESTObject(object):
                     raise AttributeError(name)
 
     def __setattr__(self, name, value):
-        self.__dict__['_updated_attrs'][name] = value
+        self._updated_attrs[name] = value
 
     def __str__(self):
         data = self._attrs.copy()
-        data.update(self._updated_attrs)
+        data.update(self.__dict__.get('_updated_attrs', {}))
         return '%s => %s' % (type(self), data)
 
     def __repr__(self):
@@ -117,12 +137,20 @@ class RESTObject(object):
             return
 
         for attr, cls_name in self._managers:
-            cls = getattr(self._module, cls_name)
-            manager = cls(self.manager.gitlab, parent=self)
-            self.__dict__[attr] = manager
+            if attr not in self.__dict__:
+                self._create_manager(attr, cls_name)
+
+    def _create_manager(self, attr, cls_name):
+        cls = self._get_manager_class(cls_name)
+        manager = cls(self.manager.gitlab, parent=self)
+        self.__dict__[attr] = manager
+        return manager
+
+    def _get_manager_class(self, cls_name):
+        return getattr(self._module, cls_name)
 
     def _update_attrs(self, new_attrs):
-        self.__dict__['_updated_attrs'] = {}
+        self.__dict__.pop('_updated_attrs', None)
         self.__dict__['_attrs'].update(new_attrs)
 
     def get_id(self):
@@ -133,7 +161,7 @@ class RESTObject(object):
 
     @property
     def attributes(self):
-        d = self.__dict__['_updated_attrs'].copy()
+        d = self.__dict__.get('_updated_attrs', {}).copy()
         d.update(self.__dict__['_attrs'])
         d.update(self.__dict__['_parent_attrs'])
         return d
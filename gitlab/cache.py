@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Gauvain Pocentek <gauvain@pocentek.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""HTTP caches for conditional GET requests, and the blob cache."""
+
+import base64
+import collections
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import requests
+
+from gitlab import utils
+
+
+def build_response(entry, response):
+    """Build a response object from a cache entry.
+
+    Args:
+        entry (dict): The cache entry
+        response (requests.Response): The 304 response sent by the server
+
+    Returns:
+        requests.Response: A 200 response holding the cached content
+    """
+    cached = requests.Response()
+    cached.status_code = 200
+    cached.reason = 'OK'
+    cached._content = entry['content']
+    cached.headers = requests.structures.CaseInsensitiveDict(entry['headers'])
+    cached.url = response.url
+    cached.request = response.request
+    cached.history = response.history
+    cached.elapsed = response.elapsed
+    cached.encoding = response.encoding
+    return cached
+
+
+def build_entry(response):
+    """Build a cache entry from a response.
+
+    Returns:
+        dict: The cache entry, or None if the response cannot be cached
+    """
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if etag is None and last_modified is None:
+        return None
+    if 'no-store' in response.headers.get('Cache-Control', ''):
+        return None
+    return {
+        'etag': etag,
+        'last_modified': last_modified,
+        'headers': dict(response.headers),
+        'content': response.content,
+    }
+
+
+class BaseCache(utils.PicklableLocks):
+    """Base class for the HTTP caches.
+
+    Subclasses must implement the ``get``, ``set``, ``delete`` and ``clear``
+    methods. The ``hits`` and ``misses`` counters are updated by the
+    :class:`~gitlab.Gitlab` object: a hit is a response served from the
+    cache after a 304 reply, a miss is a cacheable response downloaded from
+    the server.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._create_locks()
+
+    _unpickled_attrs = ('_counters_lock', )
+
+    def _create_locks(self):
+        self._counters_lock = threading.Lock()
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, entry):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def hit(self):
+        with self._counters_lock:
+            self.hits += 1
+
+    def miss(self):
+        with self._counters_lock:
+            self.misses += 1
+
+    @property
+    def stats(self):
+        """The hits and misses counters."""
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+class MemoryCache(BaseCache):
+    """In-memory LRU cache.
+
+    Args:
+        max_entries (int): Maximum number of entries to keep
+        max_size (int): Maximum total size of the cached content, in bytes
+        ttl (float): Number of seconds after which an entry is dropped
+    """
+
+    def __init__(self, max_entries=1024, max_size=None, ttl=None):
+        super(MemoryCache, self).__init__()
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = collections.OrderedDict()
+        self._size = 0
+
+    _unpickled_attrs = ('_counters_lock', '_lock')
+
+    def _create_locks(self):
+        super(MemoryCache, self)._create_locks()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _pop(self, key):
+        stored_at, entry = self._entries.pop(key)
+        self._size -= len(entry['content'])
+
+    def get(self, key):
+        with self._lock:
+            try:
+                stored_at, entry = self._entries[key]
+            except KeyError:
+                return None
+            if self.ttl is not None and time.time() - stored_at > self.ttl:
+                self._pop(key)
+                return None
+            # Mark the entry as most recently used
+            self._entries[key] = self._entries.pop(key)
+            return entry
+
+    def set(self, key, entry):
+        size = len(entry['content'])
+        if self.max_size is not None and size > self.max_size:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (time.time(), entry)
+            self._size += size
+            while (len(self._entries) > self.max_entries
+                   or (self.max_size is not None
+                       and self._size > self.max_size)):
+                self._pop(next(iter(self._entries)))
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+class FileCache(BaseCache):
+    """On-disk cache, one file per entry.
+
+    Several processes can share the same directory. The entries are stored
+    as JSON, the files that cannot be decoded are treated as misses.
+
+    Args:
+        directory (str): The directory holding the cache files
+        max_size (int): Maximum total size of the cache files, in bytes. The
+            least recently used entries are removed first.
+        ttl (float): Number of seconds after which an entry is dropped
+    """
+
+    def __init__(self, directory, max_size=None, ttl=None):
+        super(FileCache, self).__init__()
+        self.directory = directory
+        self.max_size = max_size
+        self.ttl = ttl
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def _path(self, key):
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest)
+
+    def _load(self, f):
+        data = json.loads(f.read().decode('utf-8'))
+        entry = dict((key, data[key])
+                     for key in ('etag', 'last_modified', 'headers'))
+        entry['content'] = base64.b64decode(data['content'])
+        return entry
+
+    def _dump(self, entry, f):
+        data = dict(entry)
+        data['content'] = base64.b64encode(entry['content']).decode('ascii')
+        f.write(json.dumps(data).encode('utf-8'))
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            mtime = os.path.getmtime(path)
+            if self.ttl is not None and time.time() - mtime > self.ttl:
+                self.delete(key)
+                return None
+            with open(path, 'rb') as f:
+                entry = self._load(f)
+            # The access time is used for the LRU eviction
+            os.utime(path, (time.time(), mtime))
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return None
+        return entry
+
+    def set(self, key, entry):
+        # Write in a temporary file and rename it, so that readers never see
+        # a partially written entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                self._dump(entry, f)
+            path = self._path(key)
+            if os.name == 'nt' and os.path.exists(path):
+                os.remove(path)
+            os.rename(tmp_path, path)
+        except (IOError, OSError):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        if self.max_size is not None:
+            self._evict()
+
+    def _evict(self):
+        files = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if name.endswith('.tmp'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((st.st_atime, st.st_size, path))
+            total += st.st_size
+        for atime, size, path in sorted(files):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+
+class BlobCache(FileCache):
+    """On-disk cache of the repository blobs.
+
+    Blobs are immutable: the content stored for a blob SHA never changes, so
+    it is served without contacting the server. The cache can be shared by
+    several projects, :class:`~gitlab.Gitlab` objects and processes.
+
+    The keys are blob SHAs, mapped to the raw blob contents. Files requested
+    at a given commit SHA are also recorded, mapped to their blob SHA.
+
+    Args:
+        directory (str): The directory holding the cache files
+        max_size (int): Maximum total size of the cache files, in bytes. The
+            least recently used blobs are removed first.
+    """
+
+    def __init__(self, directory, max_size=None):
+        super(BlobCache, self).__init__(directory, max_size=max_size)
+
+    def _load(self, f):
+        return f.read()
+
+    def _dump(self, entry, f):
+        f.write(entry)
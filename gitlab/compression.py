@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Gauvain Pocentek <gauvain@pocentek.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Compressed transfers and byte counters."""
+
+try:
+    from urllib3.util.request import ACCEPT_ENCODING
+except ImportError:
+    ACCEPT_ENCODING = 'gzip,deflate'
+
+from gitlab import utils
+
+#: Content encodings that can be decoded. ``br`` and ``zstd`` are available
+#: when the ``brotli`` and ``zstandard`` packages are installed.
+SUPPORTED_ENCODINGS = tuple(ACCEPT_ENCODING.split(','))
+
+
+def accept_encoding(compression):
+    """Build the ``Accept-Encoding`` header value.
+
+    Args:
+        compression (bool|list): True to accept all the supported encodings,
+            False to disable compression, or a list of encodings in order of
+            preference
+
+    Returns:
+        str: The header value
+
+    Raises:
+        ValueError: If an encoding cannot be decoded
+    """
+    if compression is True:
+        return ', '.join(SUPPORTED_ENCODINGS)
+    if not compression:
+        return 'identity'
+    unsupported = [e for e in compression if e not in SUPPORTED_ENCODINGS]
+    if unsupported:
+        raise ValueError("Unsupported content encodings: %s" %
+                         ', '.join(unsupported))
+    return ', '.join(compression)
+
+
+def _wire_bytes(response):
+    # The urllib3 response counts the bytes read from the socket, before
+    # decompression
+    try:
+        return response.raw.tell()
+    except (AttributeError, IOError, ValueError):
+        return None
+
+
+class TransferStats(utils.PicklableLocks):
+    """Counters of the response body bytes.
+
+    ``wire_bytes`` is the size of the bodies as received, ``decoded_bytes``
+    their size after decompression. Streamed responses are counted once
+    their content has been read.
+
+    Args:
+        callback (callable): Called for each response with the response, the
+            number of wire bytes and the number of decoded bytes
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.responses = 0
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+        self._create_locks()
+
+    @property
+    def stats(self):
+        """The counters."""
+        return {'responses': self.responses, 'wire_bytes': self.wire_bytes,
+                'decoded_bytes': self.decoded_bytes}
+
+    def record(self, response, wire_bytes, decoded_bytes):
+        """Count the body of a response.
+
+        Args:
+            response (requests.Response): The response
+            wire_bytes (int): Size of the body as received
+            decoded_bytes (int): Size of the decoded body
+        """
+        with self._lock:
+            self.responses += 1
+            self.wire_bytes += wire_bytes
+            self.decoded_bytes += decoded_bytes
+        if self.callback is not None:
+            self.callback(response, wire_bytes, decoded_bytes)
+
+    def track(self, response, streamed, callback=None):
+        """Count the body of a response, once it is read.
+
+        Args:
+            response (requests.Response): The response
+            streamed (bool): Whether the content of the response has not
+                been read yet
+            callback (callable): Also called with the number of wire bytes
+                and the number of decoded bytes
+        """
+        def record(wire, decoded):
+            wire = decoded if wire is None else wire
+            self.record(response, wire, decoded)
+            if callback is not None:
+                callback(wire, decoded)
+
+        if not streamed:
+            record(_wire_bytes(response), len(response.content or b''))
+            return
+
+        utils.on_stream_end(
+            response, lambda decoded: record(_wire_bytes(response), decoded))
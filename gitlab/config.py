@@ -167,3 +167,53 @@ class GitlabConfigParser(object):
         if self.per_page is not None and not 0 <= self.per_page <= 100:
             raise GitlabDataError("Unsupported per_page number: %s" %
                                   self.per_page)
+
+        self.pool_connections = None
+        self.pool_maxsize = None
+        for section in ['global', self.gitlab_id]:
+            for option in ('pool_connections', 'pool_maxsize'):
+                try:
+                    setattr(self, option, self._config.getint(section, option))
+                except Exception:
+                    pass
+        for option in ('pool_connections', 'pool_maxsize'):
+            value = getattr(self, option)
+            if value is not None and value < 1:
+                raise GitlabDataError("Unsupported %s number: %s" %
+                                      (option, value))
+
+        self.pool_block = None
+        self.keep_alive = True
+        for section in ['global', self.gitlab_id]:
+            for option in ('pool_block', 'keep_alive'):
+                try:
+                    setattr(self, option,
+                            self._config.getboolean(section, option))
+                except Exception:
+                    pass
+
+        self.retry_max_retries = None
+        self.retry_backoff_factor = None
+        self.retry_statuses = None
+        for section in ['global', self.gitlab_id]:
+            try:
+                self.retry_max_retries = self._config.getint(
+                    section, 'retry_max_retries')
+            except Exception:
+                pass
+            try:
+                self.retry_backoff_factor = self._config.getfloat(
+                    section, 'retry_backoff_factor')
+            except Exception:
+                pass
+            try:
+                statuses = self._config.get(section, 'retry_statuses')
+            except Exception:
+                continue
+            try:
+                self.retry_statuses = [int(status.strip())
+                                       for status in statuses.split(',')
+                                       if status.strip()]
+            except ValueError:
+                raise GitlabDataError("Unsupported retry_statuses value: %s" %
+                                      statuses)
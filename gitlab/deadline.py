@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Gauvain Pocentek <gauvain@pocentek.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Time budgets for the requests.
+
+The ``timeout`` of a :class:`~gitlab.Gitlab` object applies to each socket
+operation. A deadline limits the total time spent by a call, retries, pages
+and downloaded chunks included.
+"""
+
+import contextlib
+import functools
+import threading
+import time
+
+from gitlab.exceptions import GitlabTimeoutError
+
+_local = threading.local()
+
+
+class Deadline(object):
+    """A point in time after which no request is sent.
+
+    Args:
+        timeout (float): The time budget, in seconds
+    """
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.expires = time.time() + timeout
+
+    def remaining(self):
+        """Return the number of seconds left (0 when expired)."""
+        return max(self.expires - time.time(), 0)
+
+    def expired(self):
+        """Whether the time budget is exhausted."""
+        return time.time() >= self.expires
+
+    def error(self):
+        """Return the error raised when the deadline is passed."""
+        return GitlabTimeoutError(
+            error_message='Deadline of %ss exceeded' % self.timeout)
+
+    def check(self):
+        """Raise an error if the time budget is exhausted.
+
+        Raises:
+            GitlabTimeoutError: If the deadline is passed
+        """
+        if self.expired():
+            raise self.error()
+
+    def check_delay(self, delay):
+        """Raise an error if the deadline is passed after ``delay``.
+
+        Args:
+            delay (float): A number of seconds
+
+        Raises:
+            GitlabTimeoutError: If the deadline would be passed at the end of
+                the delay
+        """
+        if time.time() + delay >= self.expires:
+            raise GitlabTimeoutError(
+                error_message='Deadline of %ss exceeded, not retrying' %
+                              self.timeout)
+
+    def sleep(self, delay):
+        """Wait before a retry, if the deadline allows it.
+
+        Args:
+            delay (float): The number of seconds to wait
+
+        Raises:
+            GitlabTimeoutError: If the deadline would be passed at the end of
+                the delay. The error is raised without waiting.
+        """
+        self.check_delay(delay)
+        time.sleep(delay)
+
+    def socket_timeout(self, timeout):
+        """Return the socket timeout to use for the next attempt.
+
+        Args:
+            timeout (float|tuple): The configured timeout, or a (connect,
+                read) tuple, or None
+
+        Returns:
+            The smallest of ``timeout`` and the remaining time
+        """
+        remaining = self.remaining()
+        if isinstance(timeout, tuple):
+            return tuple(remaining if t is None else min(t, remaining)
+                         for t in timeout)
+        if timeout is None:
+            return remaining
+        return min(timeout, remaining)
+
+    def guard(self, iterable):
+        """Iterate over ``iterable``, checking the deadline before each item.
+
+        Raises:
+            GitlabTimeoutError: If the deadline is passed
+        """
+        for item in iterable:
+            self.check()
+            yield item
+
+
+def current():
+    """Return the deadline set by :func:`budget` in this thread, or None."""
+    return getattr(_local, 'deadline', None)
+
+
+def _earliest(first, second):
+    if first is None or (second is not None and
+                         second.expires < first.expires):
+        return second
+    return first
+
+
+@contextlib.contextmanager
+def budget(timeout):
+    """Limit the time spent by the requests sent in the block.
+
+    The budget applies to the current thread, and to the threads started by
+    the library to run requests in parallel. Nested budgets cannot extend
+    the enclosing one.
+
+    Args:
+        timeout (float|Deadline): The time budget, in seconds, or a
+            :class:`Deadline`
+
+    Yields:
+        Deadline: The deadline in effect in the block
+    """
+    if not isinstance(timeout, Deadline):
+        timeout = Deadline(timeout)
+    previous = current()
+    _local.deadline = _earliest(previous, timeout)
+    try:
+        yield _local.deadline
+    finally:
+        _local.deadline = previous
+
+
+def get_deadline(kwargs, inherit=True):
+    """Return the deadline to use for a call.
+
+    The ``deadline`` argument is removed from ``kwargs``.
+
+    Args:
+        kwargs (dict): The call arguments
+        inherit (bool): Whether to take the :func:`budget` of the current
+            thread into account
+
+    Returns:
+        Deadline: The earliest deadline, or None if there is none
+    """
+    deadline = kwargs.pop('deadline', None)
+    if deadline is not None and not isinstance(deadline, Deadline):
+        deadline = Deadline(deadline)
+    if inherit:
+        deadline = _earliest(current(), deadline)
+    return deadline
+
+
+def propagate(func):
+    """Make ``func`` run with the deadline of the calling thread.
+
+    Used to wrap the functions executed in thread pools.
+    """
+    deadline = current()
+    if deadline is None:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with budget(deadline):
+            return func(*args, **kwargs)
+    return wrapper
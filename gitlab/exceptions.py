@@ -66,6 +66,18 @@ class GitlabHttpError(GitlabError):
     pass
 
 
+class GitlabTimeoutError(GitlabError):
+    pass
+
+
+class GitlabCircuitOpenError(GitlabError):
+    pass
+
+
+class GitlabBulkheadFullError(GitlabError):
+    pass
+
+
 class GitlabListError(GitlabOperationError):
     pass
 
@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Gauvain Pocentek <gauvain@pocentek.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Isolation of the failing and slow endpoints.
+
+A :class:`CircuitBreaker` stops sending requests to an endpoint family of a
+host that keeps failing, and a :class:`Bulkhead` limits the number of
+requests in flight for each endpoint family, so that slow endpoints cannot
+use all the threads or connections.
+"""
+
+import re
+import threading
+import time
+
+from gitlab.exceptions import GitlabBulkheadFullError
+from gitlab.exceptions import GitlabCircuitOpenError
+from gitlab import utils
+
+#: Requests are sent normally
+CLOSED = 'closed'
+#: Requests fail immediately
+OPEN = 'open'
+#: A few trial requests are sent to check whether the server recovered
+HALF_OPEN = 'half-open'
+
+STATES = (CLOSED, OPEN, HALF_OPEN)
+
+# Endpoints transferring large contents: archives, artifacts, raw files,
+# exports, snapshots and job traces
+_downloads_re = re.compile(r'/(archive(\.[\w.]+)?|artifacts|raw|download|'
+                           r'snapshot|trace)(/|$)')
+
+
+def endpoint_family(endpoint):
+    """Return the family of an endpoint template.
+
+    Args:
+        endpoint (str): The endpoint template (see
+            :func:`gitlab.metrics.endpoint_template`)
+
+    Returns:
+        str: ``'downloads'`` for the endpoints transferring large contents
+        (archives, artifacts, raw files, exports...), ``'api'`` otherwise
+    """
+    if _downloads_re.search(endpoint):
+        return 'downloads'
+    return 'api'
+
+
+class _Circuit(object):
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.trials = 0
+        self.trial_started = None
+
+
+class CircuitBreaker(utils.PicklableLocks):
+    """Fail fast when an endpoint family of a host keeps failing.
+
+    A circuit is kept for each host and endpoint family. It opens after
+    ``failure_threshold`` consecutive failures (connection errors, timeouts
+    and ``statuses`` responses): the requests then fail immediately with a
+    :class:`~gitlab.exceptions.GitlabCircuitOpenError`. After
+    ``recovery_timeout`` seconds the circuit is half-open and up to
+    ``half_open_requests`` trial requests are sent. The circuit closes when
+    a trial succeeds, and opens again when it fails.
+
+    The breaker can be shared by several threads and several
+    :class:`~gitlab.Gitlab` objects.
+
+    Args:
+        failure_threshold (int): Number of consecutive failures opening the
+            circuit
+        recovery_timeout (float): Time before sending trial requests to an
+            open circuit, in seconds
+        half_open_requests (int): Number of trial requests sent at the same
+            time when the circuit is half-open
+        statuses (list): HTTP status codes counted as failures
+        family (callable): Function returning the family of an endpoint
+            template, :func:`endpoint_family` by default
+    """
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30,
+                 half_open_requests=1, statuses=(500, 502, 503, 504),
+                 family=endpoint_family):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_requests = half_open_requests
+        self.statuses = frozenset(statuses)
+        self.family = family
+        self._circuits = {}
+        self._create_locks()
+
+    def _get(self, key, now):
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            circuit = self._circuits[key] = _Circuit()
+        if (circuit.state == OPEN and
+                now - circuit.opened_at >= self.recovery_timeout):
+            circuit.state = HALF_OPEN
+            circuit.trials = 0
+        return circuit
+
+    def _open(self, circuit, now):
+        circuit.state = OPEN
+        circuit.opened_at = now
+        circuit.failures = 0
+
+    def key(self, host, endpoint):
+        """Return the key of the circuit used for a request.
+
+        Args:
+            host (str): The host of the request URL
+            endpoint (str): The endpoint template
+
+        Returns:
+            tuple: The (host, family) pair
+        """
+        return (host, self.family(endpoint))
+
+    def state(self, key):
+        """Return the state of a circuit.
+
+        Args:
+            key (tuple): The circuit key (see :meth:`key`)
+
+        Returns:
+            str: One of :data:`STATES`
+        """
+        with self._lock:
+            return self._get(key, time.time()).state
+
+    def states(self):
+        """Return the state of all the circuits.
+
+        Returns:
+            dict: The states, indexed by circuit key
+        """
+        with self._lock:
+            now = time.time()
+            return dict((key, self._get(key, now).state)
+                        for key in list(self._circuits))
+
+    def allow(self, key):
+        """Check that a request can be sent.
+
+        Args:
+            key (tuple): The circuit key (see :meth:`key`)
+
+        Raises:
+            GitlabCircuitOpenError: If the circuit is open, or if enough
+                trial requests are in progress
+        """
+        with self._lock:
+            now = time.time()
+            circuit = self._get(key, now)
+            if circuit.state == CLOSED:
+                return
+            if circuit.state == HALF_OPEN:
+                # Trials that never reported back don't block the circuit
+                # forever
+                if (circuit.trials < self.half_open_requests or
+                        now - circuit.trial_started >= self.recovery_timeout):
+                    if circuit.trials >= self.half_open_requests:
+                        circuit.trials = 0
+                    circuit.trials += 1
+                    circuit.trial_started = now
+                    return
+                retry_at = circuit.trial_started + self.recovery_timeout
+            else:
+                retry_at = circuit.opened_at + self.recovery_timeout
+            retry_in = max(retry_at - now, 0)
+        raise GitlabCircuitOpenError(
+            error_message='Circuit open for %s %s, retry in %.1fs' %
+                          (key[0], key[1], retry_in))
+
+    def cancel(self, key):
+        """Give back the slot of a request allowed but not sent.
+
+        Args:
+            key (tuple): The circuit key (see :meth:`key`)
+        """
+        with self._lock:
+            circuit = self._get(key, time.time())
+            if circuit.state == HALF_OPEN and circuit.trials > 0:
+                circuit.trials -= 1
+
+    def record(self, key, status=None):
+        """Record the outcome of a request.
+
+        Args:
+            key (tuple): The circuit key (see :meth:`key`)
+            status (int): The status code of the response, or None if no
+                response was received
+        """
+        failed = status is None or status in self.statuses
+        with self._lock:
+            now = time.time()
+            circuit = self._get(key, now)
+            if circuit.state == HALF_OPEN:
+                if failed:
+                    self._open(circuit, now)
+                else:
+                    circuit.state = CLOSED
+                    circuit.failures = 0
+            elif circuit.state == CLOSED:
+                if not failed:
+                    circuit.failures = 0
+                    return
+                circuit.failures += 1
+                if circuit.failures >= self.failure_threshold:
+                    self._open(circuit, now)
+
+
+class Bulkhead(utils.PicklableLocks):
+    """Limit the number of requests in flight, by endpoint family.
+
+    A request waits for a free slot in its family. A streamed request keeps
+    its slot until its response is closed or its content entirely read.
+
+    The bulkhead can be shared by several threads and several
+    :class:`~gitlab.Gitlab` objects.
+
+    Args:
+        limits (dict): Maximum number of requests in flight, by endpoint
+            family. The families without a limit are not restricted.
+        max_wait (float): Maximum time to wait for a slot, in seconds. None
+            to wait as long as needed (or until the deadline of the request).
+        family (callable): Function returning the family of an endpoint
+            template, :func:`endpoint_family` by default
+    """
+
+    def __init__(self, limits, max_wait=None, family=endpoint_family):
+        self.limits = dict(limits)
+        self.max_wait = max_wait
+        self.family = family
+        self._create_locks()
+
+    # The requests in flight are not shared with the unpickled copies
+    _unpickled_attrs = ('_cond', '_in_flight')
+
+    def _create_locks(self):
+        self._in_flight = {}
+        self._cond = threading.Condition()
+
+    def in_flight(self):
+        """Return the number of requests in flight, by endpoint family."""
+        with self._cond:
+            return dict(self._in_flight)
+
+    def acquire(self, endpoint, deadline=None):
+        """Wait for a free slot.
+
+        Args:
+            endpoint (str): The endpoint template of the request
+            deadline (gitlab.deadline.Deadline): The deadline of the request
+
+        Returns:
+            callable: A function releasing the slot. It can be called several
+            times.
+
+        Raises:
+            GitlabBulkheadFullError: If no slot was freed in time
+            GitlabTimeoutError: If the deadline is passed
+        """
+        family = self.family(endpoint)
+        limit = self.limits.get(family)
+        if limit is None:
+            return lambda: None
+
+        timeout = self.max_wait
+        if deadline is not None:
+            remaining = deadline.remaining()
+            timeout = remaining if timeout is None else min(timeout,
+                                                            remaining)
+        end = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while self._in_flight.get(family, 0) >= limit:
+                if end is None:
+                    self._cond.wait()
+                    continue
+                remaining = end - time.time()
+                if remaining <= 0:
+                    if deadline is not None:
+                        deadline.check()
+                    raise GitlabBulkheadFullError(
+                        error_message='%d %s requests in flight' %
+                                      (limit, family))
+                self._cond.wait(remaining)
+            self._in_flight[family] = self._in_flight.get(family, 0) + 1
+
+        released = []
+
+        def release():
+            with self._cond:
+                if released:
+                    return
+                released.append(True)
+                self._in_flight[family] -= 1
+                self._cond.notify_all()
+        return release
+
+
+def release_with(response, release):
+    """Call ``release`` once a streamed response is read or closed.
+
+    Args:
+        response (requests.Response): The streamed response
+        release (callable): The function to call
+    """
+    utils.on_stream_end(response, lambda size: release())
+
+    close = response.close
+
+    def releasing_close():
+        try:
+            close()
+        finally:
+            release()
+
+    response.close = releasing_close
@@ -0,0 +1,410 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Gauvain Pocentek <gauvain@pocentek.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Per-endpoint metrics of the HTTP requests."""
+
+import re
+import threading
+import time
+
+import requests
+import six
+try:
+    import urllib3
+except ImportError:
+    from requests.packages import urllib3
+
+import gitlab.isolation
+from gitlab import utils
+
+#: Upper bounds of the latency histogram buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+#: Latency phases: connection establishment, time to the response headers
+#: and total duration of the request (retries included)
+PHASES = ('connect', 'ttfb', 'total')
+
+_id_re = re.compile(r'^(\d+|[0-9a-f]{40}|[0-9a-f]{64})$')
+
+# Collections whose items are identified by an ID or a path
+_collections = frozenset([
+    'access_requests', 'award_emoji', 'badges', 'boards', 'broadcast_messages',
+    'custom_attributes', 'deploy_keys', 'deployments', 'discussions',
+    'domains', 'emails', 'environments', 'epics', 'events', 'geo_nodes',
+    'gpg_keys', 'groups', 'hooks', 'impersonation_tokens', 'issues', 'jobs',
+    'keys', 'links', 'lists', 'members', 'merge_requests', 'milestones',
+    'namespaces', 'notes', 'pipeline_schedules', 'pipelines', 'projects',
+    'protected_branches', 'protected_tags', 'runners', 'services', 'snippets',
+    'statuses', 'subgroups', 'todos', 'triggers', 'users', 'versions'])
+
+# Collections whose items are identified by a name (e.g. a branch name)
+_named_collections = frozenset([
+    'branches', 'tags', 'files', 'blobs', 'commits', 'variables', 'labels',
+    'features', 'wikis', 'dockerfiles', 'gitignores', 'gitlab_ci_ymls',
+    'licenses'])
+
+# Fixed segments that can follow a collection
+_static_segments = frozenset(['all'])
+
+#: Default maximum number of (method, endpoint) pairs kept by a registry
+DEFAULT_MAX_ENDPOINTS = 1000
+
+#: Endpoint of the requests recorded once the registry is full
+OTHER_ENDPOINT = ':other'
+
+
+def endpoint_template(url, api_url):
+    """Normalize a request URL to its endpoint template.
+
+    IDs, SHAs, URL-encoded paths and the items of the known collections are
+    replaced by placeholders, so that the metrics of the requests on
+    different objects are grouped::
+
+        >>> endpoint_template('https://host/api/v4/projects/12/jobs?page=2',
+        ...                   'https://host/api/v4')
+        '/projects/:id/jobs'
+        >>> endpoint_template('https://host/api/v4/groups/mygroup/projects',
+        ...                   'https://host/api/v4')
+        '/groups/:id/projects'
+
+    Args:
+        url (str): The request URL
+        api_url (str): The base URL of the API
+
+    Returns:
+        str: The endpoint template
+    """
+    parse = six.moves.urllib.parse.urlparse
+    path = parse(url).path
+    base_path = parse(api_url).path
+    if path.startswith(base_path):
+        path = path[len(base_path):]
+    segments = path.split('/')
+    for i, segment in enumerate(segments):
+        previous = segments[i - 1] if i > 0 else None
+        if _id_re.match(segment) or '%' in segment:
+            segments[i] = ':id'
+        elif not segment or segment in _static_segments:
+            continue
+        elif previous in _named_collections:
+            segments[i] = ':name'
+        elif previous in _collections:
+            segments[i] = ':id'
+    return '/'.join(segments)
+
+
+def body_size(body):
+    """Return the size of a prepared request body."""
+    if body is None:
+        return 0
+    try:
+        return len(body)
+    except TypeError:
+        # Generators have no length
+        return 0
+
+
+class _Histogram(object):
+    def __init__(self, buckets):
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, buckets, value):
+        i = 0
+        while i < len(buckets) and value > buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self, buckets):
+        cumulative = []
+        total = 0
+        for bound, count in zip(list(buckets) + ['+Inf'], self.counts):
+            total += count
+            cumulative.append((bound, total))
+        return {'count': self.count, 'sum': self.sum, 'buckets': cumulative}
+
+
+class _EndpointMetrics(object):
+    def __init__(self, buckets):
+        self.requests = 0
+        self.statuses = {}
+        self.retries = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.latency = dict((phase, _Histogram(buckets)) for phase in PHASES)
+
+
+class Metrics(utils.PicklableLocks):
+    """Registry of the request metrics, by HTTP method and endpoint.
+
+    The registry can be shared by several threads and several
+    :class:`~gitlab.Gitlab` objects.
+
+    Once ``max_endpoints`` (method, endpoint) pairs are recorded, the requests
+    on new endpoints are recorded under :data:`OTHER_ENDPOINT`, so that the
+    memory used by the registry stays bounded.
+
+    Args:
+        buckets (list): Upper bounds of the latency histogram buckets, in
+            seconds
+        max_endpoints (int): Maximum number of (method, endpoint) pairs
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS,
+                 max_endpoints=DEFAULT_MAX_ENDPOINTS):
+        self.buckets = tuple(sorted(buckets))
+        self.max_endpoints = max_endpoints
+        self._endpoints = {}
+        self._circuits = {}
+        self._create_locks()
+
+    def _get(self, verb, endpoint):
+        key = (verb.upper(), endpoint)
+        metrics = self._endpoints.get(key)
+        if metrics is None:
+            if len(self._endpoints) >= self.max_endpoints:
+                key = (key[0], OTHER_ENDPOINT)
+                metrics = self._endpoints.get(key)
+            if metrics is None:
+                metrics = _EndpointMetrics(self.buckets)
+                self._endpoints[key] = metrics
+        return metrics
+
+    def record(self, verb, endpoint, status, retries=0, bytes_out=0,
+               latency=None):
+        """Record a request.
+
+        Args:
+            verb (str): The HTTP method
+            endpoint (str): The endpoint template
+            status (int|str): The status code of the final response, or the
+                name of the exception raised
+            retries (int): The number of retries
+            bytes_out (int): The size of the request body
+            latency (dict): Durations in seconds, by phase (see
+                :data:`PHASES`)
+        """
+        with self._lock:
+            metrics = self._get(verb, endpoint)
+            metrics.requests += 1
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+            metrics.retries += retries
+            metrics.bytes_out += bytes_out
+            for phase, value in (latency or {}).items():
+                if value is not None:
+                    metrics.latency[phase].observe(self.buckets, value)
+
+    def record_bytes_in(self, verb, endpoint, wire_bytes, decoded_bytes=None):
+        """Record the size of a response body, as received.
+
+        Args:
+            verb (str): The HTTP method
+            endpoint (str): The endpoint template
+            wire_bytes (int): The size of the body
+            decoded_bytes (int): Unused, for compatibility with the
+                :class:`~gitlab.compression.TransferStats` callbacks
+        """
+        with self._lock:
+            self._get(verb, endpoint).bytes_in += wire_bytes
+
+    def record_circuit_state(self, host, family, state):
+        """Record the state of a circuit breaker.
+
+        Args:
+            host (str): The host of the circuit
+            family (str): The endpoint family of the circuit
+            state (str): One of :data:`gitlab.isolation.STATES`
+        """
+        with self._lock:
+            self._circuits[(host, family)] = state
+
+    def circuits(self):
+        """Return the last known state of the circuit breakers.
+
+        Returns:
+            dict: The states, indexed by ``'host family'``
+        """
+        with self._lock:
+            return dict(('%s %s' % key, state)
+                        for key, state in self._circuits.items())
+
+    def reset(self):
+        """Drop all the recorded metrics."""
+        with self._lock:
+            self._endpoints = {}
+            self._circuits = {}
+
+    def snapshot(self):
+        """Return the recorded metrics.
+
+        Returns:
+            dict: The metrics of each endpoint, indexed by ``'VERB
+                /endpoint/template'``. The latency histograms hold the
+                cumulative counts of the buckets.
+        """
+        result = {}
+        with self._lock:
+            for (verb, endpoint), metrics in sorted(self._endpoints.items()):
+                result['%s %s' % (verb, endpoint)] = {
+                    'requests': metrics.requests,
+                    'statuses': dict(metrics.statuses),
+                    'retries': metrics.retries,
+                    'bytes_in': metrics.bytes_in,
+                    'bytes_out': metrics.bytes_out,
+                    'latency': dict(
+                        (phase, histogram.snapshot(self.buckets))
+                        for phase, histogram in metrics.latency.items()),
+                }
+        return result
+
+    def to_openmetrics(self, prefix='gitlab'):
+        """Export the metrics in the OpenMetrics (Prometheus) text format.
+
+        Args:
+            prefix (str): Prefix of the metric names
+
+        Returns:
+            str: The exposition text
+        """
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lines = []
+
+            def family(name, kind, help_text):
+                lines.append('# TYPE %s_%s %s' % (prefix, name, kind))
+                lines.append('# HELP %s_%s %s' % (prefix, name, help_text))
+
+            def labels(verb, endpoint, **extra):
+                items = [('method', verb), ('endpoint', endpoint)]
+                items.extend(sorted(extra.items()))
+                return ','.join('%s="%s"' % (k, _escape(v))
+                                for k, v in items)
+
+            family('requests', 'counter', 'Number of requests.')
+            for (verb, endpoint), m in endpoints:
+                for status, count in sorted(m.statuses.items(),
+                                            key=lambda i: str(i[0])):
+                    lines.append('%s_requests_total{%s} %d' % (
+                        prefix, labels(verb, endpoint, status=status),
+                        count))
+
+            counters = (('retries', 'retries', 'Number of retries.'),
+                        ('received_bytes', 'bytes_in',
+                         'Size of the response bodies.'),
+                        ('sent_bytes', 'bytes_out',
+                         'Size of the request bodies.'))
+            for name, attr, help_text in counters:
+                family(name, 'counter', help_text)
+                for (verb, endpoint), m in endpoints:
+                    lines.append('%s_%s_total{%s} %d' % (
+                        prefix, name, labels(verb, endpoint),
+                        getattr(m, attr)))
+
+            family('request_duration_seconds', 'histogram',
+                   'Duration of the requests, by phase.')
+            for (verb, endpoint), m in endpoints:
+                for phase in PHASES:
+                    snapshot = m.latency[phase].snapshot(self.buckets)
+                    name = '%s_request_duration_seconds' % prefix
+                    for bound, count in snapshot['buckets']:
+                        lines.append('%s_bucket{%s} %d' % (
+                            name, labels(verb, endpoint, phase=phase,
+                                         le=bound), count))
+                    lines.append('%s_count{%s} %d' % (
+                        name, labels(verb, endpoint, phase=phase),
+                        snapshot['count']))
+                    lines.append('%s_sum{%s} %s' % (
+                        name, labels(verb, endpoint, phase=phase),
+                        repr(snapshot['sum'])))
+
+            if self._circuits:
+                name = '%s_circuit_state' % prefix
+                family('circuit_state', 'stateset',
+                       'State of the circuit breakers.')
+                for (host, family_), current in sorted(
+                        self._circuits.items()):
+                    for state in gitlab.isolation.STATES:
+                        lines.append('%s{host="%s",family="%s",%s="%s"} %d' % (
+                            name, _escape(host), _escape(family_), name,
+                            state, state == current))
+
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return (str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+# Time spent establishing connections by the current thread
+_local = threading.local()
+
+
+def pop_connect_time():
+    """Return and reset the time spent by the current thread to connect.
+
+    Only the connections opened through a :class:`TimedHTTPAdapter` are
+    measured.
+
+    Returns:
+        float: The duration in seconds, or None if no connection was opened
+    """
+    value = getattr(_local, 'connect_time', None)
+    _local.connect_time = None
+    return value
+
+
+class _TimedConnectionMixin(object):
+    def connect(self):
+        start = time.time()
+        try:
+            return super(_TimedConnectionMixin, self).connect()
+        finally:
+            _local.connect_time = ((getattr(_local, 'connect_time', None)
+                                    or 0) + time.time() - start)
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin,
+                           urllib3.connection.HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin,
+                            urllib3.connection.HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(urllib3.HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(requests.adapters.HTTPAdapter):
+    """Transport adapter measuring the time spent opening connections."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(TimedHTTPAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool,
+        }
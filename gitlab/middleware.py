@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Gauvain Pocentek <gauvain@pocentek.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Hooks around the HTTP requests."""
+
+
+class Middleware(object):
+    """Base class of the request middlewares.
+
+    The middlewares of a :class:`~gitlab.Gitlab` object are called for each
+    attempt of a request (retries included), in the order of the
+    ``Gitlab.middlewares`` list:
+
+    * ``before_send`` is called in order before the request is sent. It can
+      modify the request, or return a response to short-circuit the
+      following middlewares and the network.
+    * ``after_response`` is called in reverse order with the response, for
+      the middlewares whose ``before_send`` was called (and didn't
+      short-circuit). It returns the response to use.
+    * ``on_error`` is called in reverse order when the request could not be
+      sent (e.g. a connection error). It can return a response to recover,
+      otherwise the error is handled as usual (retried or raised).
+
+    The responses are then processed by python-gitlab as if they came from
+    the server. Subclasses only need to override the hooks they use.
+    """
+
+    def before_send(self, request):
+        """Called before the request is sent.
+
+        Args:
+            request (requests.PreparedRequest): The request
+
+        Returns:
+            requests.Response: A response to use instead of sending the
+                request, or None
+        """
+        return None
+
+    def after_response(self, request, response):
+        """Called when a response is received.
+
+        Args:
+            request (requests.PreparedRequest): The request
+            response (requests.Response): The response
+
+        Returns:
+            requests.Response: The response to use
+        """
+        return response
+
+    def on_error(self, request, error):
+        """Called when the request could not be sent.
+
+        Args:
+            request (requests.PreparedRequest): The request
+            error (Exception): The exception raised
+
+        Returns:
+            requests.Response: A response to use instead of raising the
+                error, or None
+        """
+        return None
+
+
+def send(middlewares, send_request, request):
+    """Send a request through a middleware chain.
+
+    Args:
+        middlewares (list): The :class:`Middleware` objects
+        send_request (callable): Sends the request and returns the response
+        request (requests.PreparedRequest): The request
+
+    Returns:
+        requests.Response: The response
+    """
+    called = []
+    response = None
+    for middleware in middlewares:
+        response = middleware.before_send(request)
+        if response is not None:
+            break
+        called.append(middleware)
+
+    if response is None:
+        try:
+            response = send_request(request)
+        except Exception as e:
+            for i in range(len(called) - 1, -1, -1):
+                response = called[i].on_error(request, e)
+                if response is not None:
+                    # Only the outer middlewares see the response
+                    called = called[:i]
+                    break
+            else:
+                raise
+
+    for middleware in reversed(called):
+        response = middleware.after_response(request, response)
+    return response
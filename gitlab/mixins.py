@@ -20,6 +20,36 @@ from gitlab import base
 from gitlab import cli
 from gitlab import exceptions as exc
 from gitlab import types as g_types
+from gitlab import utils
+
+
+def _transform_types(manager, data):
+    """Transform the attributes that need a special API representation.
+
+    Returns:
+        tuple: 2 items: the data to send to the server and the files to
+               upload (in that order)
+    """
+    files = {}
+
+    # We get the attributes that need some special transformation
+    types = getattr(manager, '_types', {})
+    if types:
+        # Duplicate data to avoid messing with what the user sent us
+        data = data.copy()
+        for attr_name, type_cls in types.items():
+            if attr_name in data.keys():
+                type_obj = type_cls(data[attr_name])
+
+                # if the type if FileAttribute we need to pass the data as
+                # file
+                if issubclass(type_cls, g_types.FileAttribute):
+                    k = type_obj.get_file_name(attr_name)
+                    files[attr_name] = (k, data.pop(attr_name))
+                else:
+                    data[attr_name] = type_obj.get_for_api()
+
+    return data, files
 
 
 class GetMixin(object):
@@ -49,6 +79,78 @@ class GetMixin(object):
         server_data = self.gitlab.http_get(path, **kwargs)
         return self._obj_cls(self, server_data)
 
+    def get_many(self, ids, concurrency=1, **kwargs):
+        """Retrieve several objects.
+
+        The requests are run in parallel using a pool of ``concurrency``
+        threads. If the API can filter the listing on several IDs, the objects
+        are retrieved with a few list requests instead of one request per
+        object.
+
+        Args:
+            ids (list): IDs of the objects to retrieve
+            concurrency (int): Number of requests to run in parallel
+            **kwargs: Extra options to send to the server (e.g. sudo)
+
+        Returns:
+            list: The objects, in the order of ``ids``. The retrieval of an
+                object can fail without aborting the others: the exception
+                (e.g. :class:`~gitlab.exceptions.GitlabGetError`) is then
+                returned in place of the object.
+        """
+        ids = list(ids)
+        batches = self._get_many_batches(ids)
+        if batches is None:
+            def fetch(id):
+                try:
+                    return self.get(id, **kwargs)
+                except exc.GitlabError as e:
+                    return e
+
+            return list(utils.parallel_map(fetch, ids, concurrency))
+
+        def fetch_batch(batch):
+            try:
+                return self.list(**self._get_many_query(batch, kwargs))
+            except exc.GitlabError as e:
+                return e
+
+        results = utils.parallel_map(fetch_batch, batches, concurrency)
+        return self._get_many_collect(batches, results)
+
+    # Number of IDs sent in a single list request by get_many()
+    _get_many_batch_size = 100
+
+    def _get_many_batches(self, ids):
+        # _get_many_filter is the name of the list filter accepting several
+        # IDs. Without it get_many() falls back to one get() call per ID.
+        if (getattr(self, '_get_many_filter', None) is None
+                or not isinstance(self, ListMixin)):
+            return None
+        size = self._get_many_batch_size
+        return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+    def _get_many_query(self, batch, kwargs):
+        data = kwargs.copy()
+        data['%s[]' % self._get_many_filter] = batch
+        data['per_page'] = self._get_many_batch_size
+        data['all'] = True
+        return data
+
+    def _get_many_collect(self, batches, results):
+        objects = []
+        for batch, result in zip(batches, results):
+            if isinstance(result, exc.GitlabError):
+                objects.extend([result] * len(batch))
+                continue
+            found = dict((str(obj.get_id()), obj) for obj in result)
+            for id in batch:
+                try:
+                    objects.append(found[str(id)])
+                except KeyError:
+                    objects.append(exc.GitlabGetError('404 Not found', 404))
+        return objects
+
 
 class GetWithoutIdMixin(object):
     @exc.on_http_error(exc.GitlabGetError)
@@ -104,6 +206,12 @@ class ListMixin(object):
             page (int): ID of the page to return (starts with page 1)
             as_list (bool): If set to False and no pagination option is
                 defined, return a generator instead of a list
+            streamed (bool): If True, decode the items while the pages are
+                downloaded (useful with `as_list=False`)
+            concurrency (int): When `all` is True, the number of pages to
+                fetch in parallel
+            pagination (str): Set to 'keyset' to use keyset pagination
+                (requires `order_by` and `sort`)
             **kwargs: Extra options to send to the server (e.g. sudo)
 
         Returns:
@@ -114,6 +222,14 @@ class ListMixin(object):
             GitlabListError: If the server cannot perform the request
         """
 
+        path, data = self._prepare_list(kwargs)
+        obj = self.gitlab.http_list(path, **data)
+        if isinstance(obj, list):
+            return [self._obj_cls(self, item) for item in obj]
+        else:
+            return base.RESTObjectList(self, self._obj_cls, obj)
+
+    def _prepare_list(self, kwargs):
         # Duplicate data to avoid messing with what the user sent us
         data = kwargs.copy()
         if self.gitlab.per_page:
@@ -129,12 +245,7 @@ class ListMixin(object):
 
         # Allow to overwrite the path, handy for custom listings
         path = data.pop('path', self.path)
-
-        obj = self.gitlab.http_list(path, **data)
-        if isinstance(obj, list):
-            return [self._obj_cls(self, item) for item in obj]
-        else:
-            return base.RESTObjectList(self, self._obj_cls, obj)
+        return path, data
 
 
 class RetrieveMixin(ListMixin, GetMixin):
@@ -179,24 +290,7 @@ class CreateMixin(object):
             GitlabCreateError: If the server cannot perform the request
         """
         self._check_missing_create_attrs(data)
-        files = {}
-
-        # We get the attributes that need some special transformation
-        types = getattr(self, '_types', {})
-        if types:
-            # Duplicate data to avoid messing with what the user sent us
-            data = data.copy()
-            for attr_name, type_cls in types.items():
-                if attr_name in data.keys():
-                    type_obj = type_cls(data[attr_name])
-
-                    # if the type if FileAttribute we need to pass the data as
-                    # file
-                    if issubclass(type_cls, g_types.FileAttribute):
-                        k = type_obj.get_file_name(attr_name)
-                        files[attr_name] = (k, data.pop(attr_name))
-                    else:
-                        data[attr_name] = type_obj.get_for_api()
+        data, files = _transform_types(self, data)
 
         # Handle specific URL for creation
         path = kwargs.pop('path', self.path)
@@ -260,24 +354,7 @@ class UpdateMixin(object):
             path = '%s/%s' % (self.path, id)
 
         self._check_missing_update_attrs(new_data)
-        files = {}
-
-        # We get the attributes that need some special transformation
-        types = getattr(self, '_types', {})
-        if types:
-            # Duplicate data to avoid messing with what the user sent us
-            new_data = new_data.copy()
-            for attr_name, type_cls in types.items():
-                if attr_name in new_data.keys():
-                    type_obj = type_cls(new_data[attr_name])
-
-                    # if the type if FileAttribute we need to pass the data as
-                    # file
-                    if issubclass(type_cls, g_types.FileAttribute):
-                        k = type_obj.get_file_name(attr_name)
-                        files[attr_name] = (k, new_data.pop(attr_name))
-                    else:
-                        new_data[attr_name] = type_obj.get_for_api()
+        new_data, files = _transform_types(self, new_data)
 
         http_method = self._get_update_method()
         return http_method(path, post_data=new_data, files=files, **kwargs)
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Gauvain Pocentek <gauvain@pocentek.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Client-side rate limiting."""
+
+import time
+
+from gitlab import utils
+
+
+class RateLimiter(utils.PicklableLocks):
+    """Token bucket pacing the requests sent to the server.
+
+    The limiter can be shared by several threads and several
+    :class:`~gitlab.Gitlab` objects. The rate is updated from the
+    ``RateLimit-Remaining`` and ``RateLimit-Reset`` headers of the responses:
+    the remaining requests are spread over the time left until the reset, so
+    that the server limit is never reached.
+
+    Args:
+        rate (float): Maximum number of requests per second. If None, only the
+            rate computed from the server headers is used.
+        burst (int): Number of requests that can be sent at once, without
+            waiting, after a period of inactivity
+    """
+
+    def __init__(self, rate=None, burst=10):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.time()
+        self._server_rate = None
+        self._reset = None
+        self._create_locks()
+
+    def _current_rate(self, now):
+        if self._reset is not None and now >= self._reset:
+            # The server window is over, its limit doesn't apply anymore
+            self._server_rate = self._reset = None
+        rates = [r for r in (self.rate, self._server_rate) if r is not None]
+        return min(rates) if rates else None
+
+    def _refill(self, now, rate):
+        if rate is not None:
+            elapsed = max(now - self._last, 0)
+            self._tokens = min(self.burst, self._tokens + elapsed * rate)
+        self._last = now
+
+    def reserve(self, deadline=None):
+        """Reserve a request slot.
+
+        Args:
+            deadline (gitlab.deadline.Deadline): The deadline of the request
+
+        Returns:
+            float: The number of seconds to wait before sending the request
+
+        Raises:
+            GitlabTimeoutError: If the deadline would be passed before the
+                request can be sent. No slot is reserved in that case.
+        """
+        with self._lock:
+            now = time.time()
+            rate = self._current_rate(now)
+            self._refill(now, rate)
+            if rate is None:
+                return 0
+            delay = max(1 - self._tokens, 0) / rate
+            if delay > 0 and deadline is not None:
+                deadline.check_delay(delay)
+            self._tokens -= 1
+            return delay
+
+    def acquire(self, deadline=None):
+        """Wait until a request can be sent.
+
+        Args:
+            deadline (gitlab.deadline.Deadline): The deadline of the request
+
+        Raises:
+            GitlabTimeoutError: If the deadline would be passed before the
+                request can be sent. The error is raised without waiting.
+        """
+        delay = self.reserve(deadline)
+        if delay > 0:
+            time.sleep(delay)
+
+    def update(self, headers):
+        """Update the rate from the headers of a server response.
+
+        Args:
+            headers: The response headers
+        """
+        try:
+            remaining = int(headers['RateLimit-Remaining'])
+            reset = float(headers['RateLimit-Reset'])
+        except (KeyError, TypeError, ValueError):
+            return
+
+        with self._lock:
+            now = time.time()
+            self._refill(now, self._current_rate(now))
+            window = max(reset - now, 1)
+            self._server_rate = max(remaining, 1) / window
+            self._reset = now + window
+            if remaining <= 0:
+                # Nothing left: the next request waits for the reset
+                self._tokens = min(self._tokens, 0)
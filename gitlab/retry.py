@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Gauvain Pocentek <gauvain@pocentek.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Retry policy for the HTTP requests."""
+
+import copy
+import random
+
+#: HTTP methods that can be sent several times without side effects
+IDEMPOTENT_METHODS = frozenset(['get', 'head', 'options', 'put', 'delete'])
+
+
+class RetryPolicy(object):
+    """Defines when and how failed requests are retried.
+
+    Requests using an idempotent method (GET, PUT, DELETE...) are retried
+    when the server replies with one of the ``statuses`` codes, or when the
+    connection fails (SSL and proxy errors excepted). Other requests (POST)
+    are only retried when the server didn't process them: on 429 (Too Many
+    Requests) responses and when the connection to the server could not be
+    established.
+
+    The delay between two attempts grows exponentially, with some random
+    jitter so that concurrent clients don't retry at the same time. The
+    ``Retry-After`` header sent by the server is used when available.
+
+    Args:
+        max_retries (int): Maximum number of retries, -1 for no limit
+        statuses (list): HTTP status codes triggering a retry. 500 is not
+            retried by default: it usually denotes a deterministic server
+            error.
+        connection_errors (bool): Whether to retry on connection errors and
+            timeouts
+        backoff_factor (float): Delay before the first retry, in seconds.
+            The delay doubles after each attempt.
+        max_backoff (float): Maximum delay between two attempts, in seconds
+        jitter (bool): Whether to randomize the delays
+    """
+
+    def __init__(self, max_retries=10, statuses=(429, 502, 503, 504),
+                 connection_errors=True, backoff_factor=0.1, max_backoff=60,
+                 jitter=True):
+        self.max_retries = max_retries
+        self.statuses = frozenset(statuses)
+        self.connection_errors = connection_errors
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+
+    def replace(self, **kwargs):
+        """Return a copy of the policy with some attributes changed.
+
+        Args:
+            **kwargs: The attributes to change (see the constructor)
+
+        Returns:
+            RetryPolicy: The new policy
+        """
+        policy = copy.copy(self)
+        if 'statuses' in kwargs:
+            kwargs['statuses'] = frozenset(kwargs['statuses'])
+        policy.__dict__.update(kwargs)
+        return policy
+
+    def _can_retry(self, attempt):
+        return self.max_retries == -1 or attempt < self.max_retries
+
+    def retry_status(self, verb, status_code, attempt):
+        """Whether a request must be retried after an error response.
+
+        Args:
+            verb (str): The HTTP method of the request
+            status_code (int): The status code of the response
+            attempt (int): The number of retries already done
+
+        Returns:
+            bool: True if the request must be sent again
+        """
+        if status_code not in self.statuses or not self._can_retry(attempt):
+            return False
+        return status_code == 429 or verb.lower() in IDEMPOTENT_METHODS
+
+    def retry_error(self, verb, attempt, sent=True):
+        """Whether a request must be retried after a connection error.
+
+        Args:
+            verb (str): The HTTP method of the request
+            attempt (int): The number of retries already done
+            sent (bool): False if the connection could not be established,
+                meaning that the server didn't receive the request
+
+        Returns:
+            bool: True if the request must be sent again
+        """
+        if not self.connection_errors or not self._can_retry(attempt):
+            return False
+        return not sent or verb.lower() in IDEMPOTENT_METHODS
+
+    def wait_time(self, attempt, headers=None):
+        """Compute the delay before the next attempt.
+
+        Args:
+            attempt (int): The number of retries already done
+            headers: The headers of the failed response, if any
+
+        Returns:
+            float: The number of seconds to wait
+        """
+        if headers is not None and 'Retry-After' in headers:
+            try:
+                return float(headers['Retry-After'])
+            except (TypeError, ValueError):
+                pass
+        delay = min(self.backoff_factor * 2 ** attempt, self.max_backoff)
+        if self.jitter:
+            delay = delay / 2.0 + random.uniform(0, delay / 2.0)
+        return delay
+
+
+def get_policy(policy, kwargs):
+    """Return the retry policy to use for a request.
+
+    The ``retry_policy``, ``max_retries`` and ``obey_rate_limit`` arguments
+    are removed from ``kwargs`` and override ``policy``.
+
+    Args:
+        policy (RetryPolicy): The default policy
+        kwargs (dict): The request arguments
+
+    Returns:
+        RetryPolicy: The policy for this request
+    """
+    policy = kwargs.pop('retry_policy', None) or policy
+    changes = {}
+    if 'max_retries' in kwargs:
+        changes['max_retries'] = kwargs.pop('max_retries')
+    if not kwargs.pop('obey_rate_limit', True):
+        changes['statuses'] = policy.statuses - set([429])
+    if changes:
+        policy = policy.replace(**changes)
+    return policy
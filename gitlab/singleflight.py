@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Gauvain Pocentek <gauvain@pocentek.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Coalescing of identical concurrent requests."""
+
+import copy
+import threading
+
+from gitlab.exceptions import GitlabTimeoutError
+from gitlab import utils
+
+
+class _Call(object):
+    def __init__(self):
+        self.event = threading.Event()
+        self.waiters = 0
+        self.done = False
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(utils.PicklableLocks):
+    """Run a single call at a time for a given key.
+
+    The threads calling :meth:`do` with the key of a call in progress wait
+    for it and get a copy of its result, instead of running the function
+    again. When the call fails because its own deadline is passed, or is
+    interrupted (e.g. by ``KeyboardInterrupt``), a waiter runs the function
+    again instead of getting the error.
+    """
+
+    # The calls in progress are not shared with the unpickled copies
+    _unpickled_attrs = ('_calls', '_lock')
+
+    def __init__(self):
+        self._create_locks()
+
+    def _create_locks(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, deadline=None):
+        """Call ``func``, or wait for the call in progress for ``key``.
+
+        Args:
+            key: The key identifying the call
+            func (callable): The function to call, without arguments
+            deadline (gitlab.deadline.Deadline): The deadline of the caller,
+                limiting the time spent waiting for another call
+
+        Returns:
+            The result of the call. Each caller gets its own (deep) copy.
+
+        Raises:
+            Exception: The exception raised by the call
+            GitlabTimeoutError: If the deadline is passed while waiting
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+                else:
+                    call.waiters += 1
+            if leader:
+                break
+
+            timeout = None if deadline is None else deadline.remaining()
+            if not call.event.wait(timeout):
+                with self._lock:
+                    call.waiters -= 1
+                raise deadline.error()
+            if call.error is not None:
+                raise call.error
+            if call.done:
+                return copy.deepcopy(call.result)
+            # The leader ran out of time, or was interrupted by a
+            # BaseException (KeyboardInterrupt...): try again
+
+        try:
+            call.result = func()
+            call.done = True
+        except GitlabTimeoutError:
+            # The deadline of the leader doesn't apply to the waiters
+            raise
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                waiters = call.waiters
+            call.event.set()
+        # The waiters copy the original result, it must not be modified
+        return copy.deepcopy(call.result) if waiters else call.result
@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Gauvain Pocentek <gauvain@pocentek.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import os
+import tempfile
+try:
+    import unittest
+except ImportError:
+    import unittest2 as unittest
+
+try:
+    import asyncio
+    import aiohttp  # noqa
+    from gitlab import aio
+except (ImportError, SyntaxError):
+    aio = None
+
+from gitlab import deadline
+from gitlab import exceptions as exc
+from gitlab import isolation
+from gitlab.v4 import objects
+
+
+class FakeResponse(object):
+    def __init__(self, status, data, headers=None, links=None):
+        self.status = status
+        self.body = json.dumps(data).encode()
+        self.headers = headers or {}
+        self.links = links or {}
+        self.content_type = 'application/json'
+        self.history = ()
+
+    def _done(self, value):
+        future = asyncio.get_event_loop().create_future()
+        future.set_result(value)
+        return future
+
+    def read(self):
+        return self._done(self.body)
+
+    def json(self, content_type=None):
+        return self._done(json.loads(self.body.decode()))
+
+    def release(self):
+        pass
+
+
+class FakeSession(object):
+    """Replays the responses defined for (verb, url) pairs."""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.requests = []
+
+    def request(self, verb, url, **kwargs):
+        self.requests.append((verb, str(url), kwargs))
+        future = asyncio.get_event_loop().create_future()
+        future.set_result(self.responses[(verb, str(url))])
+        return future
+
+
+@unittest.skipIf(aio is None, "aiohttp is not available")
+class TestAsyncGitlab(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def _gitlab(self, responses):
+        self.session = FakeSession(responses)
+        return aio.AsyncGitlab('http://localhost', session=self.session,
+                               private_token='private_token')
+
+    def run_coro(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_managers(self):
+        gl = self._gitlab({})
+        self.assertIsInstance(gl.projects, objects.ProjectManager)
+        self.assertIsInstance(gl.projects, aio.AsyncListMixin)
+        self.assertTrue(issubclass(gl.projects._obj_cls, objects.Project))
+
+    def test_get(self):
+        url = 'http://localhost/api/v4/projects/1'
+        gl = self._gitlab({('get', url): FakeResponse(200, {'id': 1})})
+        project = self.run_coro(gl.projects.get(1))
+        self.assertIsInstance(project, objects.Project)
+        self.assertEqual(project.id, 1)
+        headers = self.session.requests[0][2]['headers']
+        self.assertEqual(headers['PRIVATE-TOKEN'], 'private_token')
+
+    def test_get_404(self):
+        url = 'http://localhost/api/v4/projects/1'
+        gl = self._gitlab({('get', url): FakeResponse(404, {'message': 'x'})})
+        self.assertRaises(exc.GitlabGetError, self.run_coro,
+                          gl.projects.get(1))
+
+        stats = gl.stats()['GET /projects/:id']
+        self.assertEqual(stats['requests'], 1)
+        self.assertEqual(stats['statuses'], {404: 1})
+
+    def test_single_flight(self):
+        url = 'http://localhost/api/v4/projects/1'
+        session = FakeSession({('get', url): FakeResponse(200, {'id': 1})})
+        request = session.request
+
+        async def slow_request(*args, **kwargs):
+            await asyncio.sleep(0)
+            return await request(*args, **kwargs)
+
+        session.request = slow_request
+        gl = aio.AsyncGitlab('http://localhost', session=session,
+                             private_token='private_token',
+                             single_flight=True)
+
+        async def get_all():
+            return await asyncio.gather(*[gl.projects.get(1)
+                                          for i in range(3)])
+
+        projects = self.run_coro(get_all())
+        self.assertEqual(len(session.requests), 1)
+        self.assertEqual([p.id for p in projects], [1, 1, 1])
+        projects[0].id = 2
+        self.assertEqual(projects[1].id, 1)
+
+    def test_deadline(self):
+        url = 'http://localhost/api/v4/projects/1'
+        gl = self._gitlab({('get', url): FakeResponse(
+            429, {}, headers={'Retry-After': '60'})})
+        self.assertRaises(exc.GitlabTimeoutError, self.run_coro,
+                          gl.projects.get(1, deadline=10))
+        self.assertEqual(len(self.session.requests), 1)
+        self.assertLessEqual(self.session.requests[0][2]['timeout'].total,
+                             10)
+
+    def test_single_flight_deadline(self):
+        flight = aio.AsyncSingleFlight()
+
+        async def slow():
+            await asyncio.sleep(0.5)
+            return 1
+
+        async def run():
+            leader = asyncio.ensure_future(flight.do('key', slow))
+            await asyncio.sleep(0)
+            with self.assertRaises(exc.GitlabTimeoutError):
+                await flight.do('key', slow, deadline.Deadline(0.01))
+            self.assertFalse(leader.done())
+            return await leader
+
+        self.assertEqual(self.run_coro(run()), 1)
+
+    def test_single_flight_cancelled(self):
+        flight = aio.AsyncSingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return len(calls)
+
+        async def run():
+            leader = asyncio.ensure_future(flight.do('key', slow))
+            await asyncio.sleep(0)
+            waiter = asyncio.ensure_future(flight.do('key', slow))
+            await asyncio.sleep(0)
+            leader.cancel()
+            # The waiter becomes the leader
+            self.assertEqual(await waiter, 2)
+            self.assertTrue(leader.cancelled())
+
+        self.run_coro(run())
+
+    def test_circuit_breaker(self):
+        url = 'http://localhost/api/v4/projects/1'
+        gl = self._gitlab({('get', url): FakeResponse(500, {})})
+        gl.circuit_breaker = isolation.CircuitBreaker(failure_threshold=1)
+        self.assertRaises(exc.GitlabGetError, self.run_coro,
+                          gl.projects.get(1, max_retries=0))
+        self.assertRaises(exc.GitlabCircuitOpenError, self.run_coro,
+                          gl.projects.get(1))
+        self.assertEqual(len(self.session.requests), 1)
+        self.assertEqual(gl.metrics.circuits(), {'localhost api': 'open'})
+
+    def test_list_all(self):
+        url = 'http://localhost/api/v4/projects'
+        next_url = 'http://localhost/api/v4/projects?page=2'
+        gl = self._gitlab({
+            ('get', url): FakeResponse(
+                200, [{'id': 1}], links={'next': {'url': next_url}}),
+            ('get', next_url): FakeResponse(200, [{'id': 2}]),
+        })
+        projects = self.run_coro(gl.projects.list(all=True))
+        self.assertEqual([p.id for p in projects], [1, 2])
+
+    def test_list_generator(self):
+        url = 'http://localhost/api/v4/projects'
+        next_url = 'http://localhost/api/v4/projects?page=2'
+        gl = self._gitlab({
+            ('get', url): FakeResponse(
+                200, [{'id': 1}], headers={'X-Total': '2'},
+                links={'next': {'url': next_url}}),
+            ('get', next_url): FakeResponse(200, [{'id': 2}]),
+        })
+        projects = self.run_coro(gl.projects.list(as_list=False))
+        self.assertIsInstance(projects, aio.AsyncRESTObjectList)
+        self.assertEqual(len(projects), 2)
+        items = self.run_coro(projects._list.as_list())
+        self.assertEqual([item['id'] for item in items], [1, 2])
+
+    def test_nested_manager_and_save(self):
+        gl = self._gitlab({
+            ('get', 'http://localhost/api/v4/projects/1/issues/2'):
+                FakeResponse(200, {'iid': 2, 'title': 'foo'}),
+            ('put', 'http://localhost/api/v4/projects/1/issues/2'):
+                FakeResponse(200, {'iid': 2, 'title': 'bar'}),
+        })
+        project = self.run_coro(gl.projects.get(1, lazy=True))
+        issue = self.run_coro(project.issues.get(2))
+        self.assertIsInstance(issue, objects.ProjectIssue)
+        issue.title = 'bar'
+        self.run_coro(issue.save())
+        self.assertEqual(issue.title, 'bar')
+        self.assertEqual(self.session.requests[-1][2]['json'],
+                         {'title': 'bar'})
+
+    def test_delete_kwargs(self):
+        url = 'http://localhost/api/v4/projects/1/issues/2?sudo=alice'
+        gl = self._gitlab({('delete', url): FakeResponse(204, None)})
+        project = self.run_coro(gl.projects.get(1, lazy=True))
+        issue = project.issues._obj_cls(project.issues, {'iid': 2})
+        self.run_coro(issue.delete(sudo='alice'))
+        self.assertEqual(self.session.requests[-1][:2], ('delete', url))
+
+    def test_unsupported(self):
+        gl = self._gitlab({})
+        self.assertRaises(NotImplementedError, gl.http_download,
+                          '/projects/1/repository/archive', 'archive.tgz')
+        project = self.run_coro(gl.projects.get(1, lazy=True))
+        self.assertRaises(NotImplementedError, project.star)
+        issue = self.run_coro(project.issues.get(2, lazy=True))
+        self.assertRaises(NotImplementedError, issue.subscribe)
+        self.assertRaises(NotImplementedError, project.files.get_many,
+                          ['README.md'], 'master')
+        self.assertRaises(NotImplementedError, gl.projects.import_project,
+                          None, 'path')
+        for name in ('cache', 'middlewares'):
+            self.assertRaises(ValueError, aio.AsyncGitlab, 'http://localhost',
+                              **{name: object()})
+
+    def test_from_config(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.cfg',
+                                         delete=False) as f:
+            f.write('[global]\ndefault = one\n\n'
+                    '[one]\nurl = http://localhost\nprivate_token = abc\n')
+        self.addCleanup(os.remove, f.name)
+        gl = aio.AsyncGitlab.from_config(config_files=[f.name])
+        self.assertIsInstance(gl, aio.AsyncGitlab)
+        self.assertEqual(gl.private_token, 'abc')
+        self.assertIsInstance(gl.projects, aio.AsyncListMixin)
+
+    def test_overridden_crud_methods(self):
+        files_url = 'http://localhost/api/v4/projects/1/repository/files/'
+        gl = self._gitlab({
+            ('get', files_url + 'docs%2FREADME?ref=main'):
+                FakeResponse(200, {'file_path': 'docs/README'}),
+            ('put', files_url + 'docs%2FREADME'):
+                FakeResponse(200, {'file_path': 'docs/README'}),
+            ('delete', files_url + 'docs%2FREADME?branch=main'
+             '&commit_message=rm'): FakeResponse(204, None),
+            ('post', 'http://localhost/api/v4/projects/1/pipeline'):
+                FakeResponse(201, {'id': 3}),
+            ('delete', 'http://localhost/api/v4/projects/1/labels?name=bug'):
+                FakeResponse(204, None),
+            ('get', 'http://localhost/api/v4/projects/1/forks'):
+                FakeResponse(200, [{'id': 2}]),
+        })
+        project = self.run_coro(gl.projects.get(1, lazy=True))
+
+        f = self.run_coro(project.files.get('docs/README', 'main'))
+        self.assertIsInstance(f, objects.ProjectFile)
+        f.content = 'new'
+        self.run_coro(f.save('main', 'update'))
+        self.assertEqual(self.session.requests[-1][2]['json']['branch'],
+                         'main')
+        self.run_coro(f.delete('main', 'rm'))
+
+        pipeline = self.run_coro(project.pipelines.create({'ref': 'main'}))
+        self.assertEqual(pipeline.id, 3)
+        self.run_coro(project.labels.delete('bug'))
+        forks = self.run_coro(project.forks.list())
+        self.assertEqual([fork.id for fork in forks], [2])
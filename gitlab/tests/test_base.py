@@ -136,6 +136,29 @@ class TestRESTObject(unittest.TestCase):
         self.assertEqual(obj.fakes.gitlab, self.gitlab)
         self.assertEqual(obj.fakes._parent, obj)
 
+    def test_lazy_managers(self):
+        class ObjectWithManager(FakeObject):
+            _managers = (('fakes', 'FakeManager'), )
+
+        obj = ObjectWithManager(self.manager, {'fakes': 'attr'})
+        self.assertNotIn('fakes', obj.__dict__)
+        self.assertNotIn('_updated_attrs', obj.__dict__)
+        manager = obj.fakes
+        self.assertIsInstance(manager, FakeManager)
+        self.assertIs(obj.fakes, manager)
+
+        obj._create_managers()
+        self.assertIs(obj.fakes, manager)
+
+    def test_unpickle_old_state(self):
+        obj = FakeObject(self.manager, {'foo': 'bar'})
+        state = obj.__getstate__()
+        state['_module_name'] = obj._module.__name__
+        unpickled = FakeObject.__new__(FakeObject)
+        unpickled.__setstate__(state)
+        self.assertEqual('bar', unpickled.foo)
+        self.assertNotIn('_module_name', unpickled.__dict__)
+
     def test_equality(self):
         obj1 = FakeObject(self.manager, {'id': 'foo'})
         obj2 = FakeObject(self.manager, {'id': 'foo', 'other_attr': 'bar'})
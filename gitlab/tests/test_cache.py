@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Gauvain Pocentek <gauvain@pocentek.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pickle
+import shutil
+import tempfile
+try:
+    import unittest
+except ImportError:
+    import unittest2 as unittest
+
+from httmock import HTTMock  # noqa
+from httmock import response  # noqa
+from httmock import urlmatch  # noqa
+import mock
+
+from gitlab import cache
+from gitlab import Gitlab
+
+
+def _entry(content):
+    return {'etag': '"abc"', 'last_modified': None, 'headers': {},
+            'content': content}
+
+
+class TestMemoryCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        c = cache.MemoryCache(max_entries=2)
+        c.set('a', _entry(b'a'))
+        c.set('b', _entry(b'b'))
+        c.get('a')
+        c.set('c', _entry(b'c'))
+        self.assertEqual(len(c), 2)
+        self.assertIsNone(c.get('b'))
+        self.assertEqual(c.get('a')['content'], b'a')
+
+    def test_size_eviction(self):
+        c = cache.MemoryCache(max_size=5)
+        c.set('a', _entry(b'aaa'))
+        c.set('b', _entry(b'bbb'))
+        self.assertIsNone(c.get('a'))
+        self.assertIsNotNone(c.get('b'))
+        c.set('c', _entry(b'cccccc'))
+        self.assertIsNone(c.get('c'))
+
+    @mock.patch('time.time')
+    def test_ttl(self, m_time):
+        m_time.return_value = 100
+        c = cache.MemoryCache(ttl=10)
+        c.set('a', _entry(b'a'))
+        m_time.return_value = 105
+        self.assertIsNotNone(c.get('a'))
+        m_time.return_value = 111
+        self.assertIsNone(c.get('a'))
+        self.assertEqual(len(c), 0)
+
+    def test_pickability(self):
+        c = cache.MemoryCache()
+        c.set('a', _entry(b'a'))
+        unpickled = pickle.loads(pickle.dumps(c))
+        self.assertEqual(unpickled.get('a')['content'], b'a')
+
+
+class TestFileCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_set_get_delete(self):
+        c = cache.FileCache(self.directory)
+        self.assertIsNone(c.get('a'))
+        c.set('a', _entry(b'a'))
+        self.assertEqual(c.get('a')['content'], b'a')
+        self.assertEqual(cache.FileCache(self.directory).get('a')['etag'],
+                         '"abc"')
+        c.delete('a')
+        self.assertIsNone(c.get('a'))
+
+    def test_size_eviction(self):
+        c = cache.FileCache(self.directory, max_size=1000)
+        c.set('a', _entry(b'a' * 600))
+        c.set('b', _entry(b'b' * 600))
+        self.assertIsNone(c.get('a'))
+        self.assertIsNotNone(c.get('b'))
+
+    def test_invalid_file(self):
+        c = cache.FileCache(self.directory)
+        for data in (pickle.dumps(_entry(b'a')), b'[1]', b'{"etag": 1}'):
+            with open(c._path('a'), 'wb') as f:
+                f.write(data)
+            self.assertIsNone(c.get('a'))
+
+
+class TestConditionalGet(unittest.TestCase):
+    def setUp(self):
+        self.cache = cache.MemoryCache()
+        self.gl = Gitlab("http://localhost", private_token="private_token",
+                         api_version=4, cache=self.cache)
+
+    def test_not_modified(self):
+        @urlmatch(scheme="http", netloc="localhost",
+                  path="/api/v4/projects/1", method="get")
+        def resp_cont(url, request):
+            if request.headers.get('If-None-Match') == '"v1"':
+                return response(304, '', {'ETag': '"v1"'}, None, 5, request)
+            headers = {'content-type': 'application/json', 'ETag': '"v1"'}
+            content = '{"id": 1, "name": "project1"}'
+            return response(200, content, headers, None, 5, request)
+
+        with HTTMock(resp_cont):
+            first = self.gl.projects.get(1)
+            second = self.gl.projects.get(1)
+
+        self.assertEqual(first.name, 'project1')
+        self.assertEqual(second.name, 'project1')
+        self.assertEqual(self.cache.stats, {'hits': 1, 'misses': 1})
+
+    def test_no_validator(self):
+        @urlmatch(scheme="http", netloc="localhost",
+                  path="/api/v4/projects/1", method="get")
+        def resp_cont(url, request):
+            headers = {'content-type': 'application/json'}
+            content = '{"id": 1, "name": "project1"}'
+            return response(200, content, headers, None, 5, request)
+
+        with HTTMock(resp_cont):
+            self.gl.projects.get(1)
+
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.stats, {'hits': 0, 'misses': 0})
+
+    def test_identity_in_key(self):
+        gl = Gitlab("http://localhost", private_token="other_token",
+                    api_version=4, cache=self.cache)
+
+        @urlmatch(scheme="http", netloc="localhost",
+                  path="/api/v4/projects/1", method="get")
+        def resp_cont(url, request):
+            self.assertNotIn('If-None-Match', request.headers)
+            headers = {'content-type': 'application/json', 'ETag': '"v1"'}
+            content = '{"id": 1}'
+            return response(200, content, headers, None, 5, request)
+
+        with HTTMock(resp_cont):
+            self.gl.projects.get(1)
+            gl.projects.get(1)
+
+        self.assertEqual(len(self.cache), 2)
+
+
+class TestBlobCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = cache.BlobCache(self.directory)
+        self.gl = Gitlab("http://localhost", private_token="private_token",
+                         api_version=4, blob_cache=self.cache)
+        self.project = self.gl.projects.get(1, lazy=True)
+        self.sha = 'a' * 40
+        self.calls = []
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_raw_blob(self):
+        @urlmatch(scheme="http", netloc="localhost",
+                  path="/api/v4/projects/1/repository/blobs/%s/raw" % self.sha,
+                  method="get")
+        def resp_cont(url, request):
+            self.calls.append(url)
+            headers = {'content-type': 'application/octet-stream'}
+            return response(200, b'content', headers, None, 5, request)
+
+        with HTTMock(resp_cont):
+            self.project.repository_raw_blob(self.sha)
+            data = self.project.repository_raw_blob(self.sha)
+            chunks = []
+            self.project.repository_raw_blob(self.sha, streamed=True,
+                                             action=chunks.append,
+                                             chunk_size=4)
+
+        self.assertEqual(data, b'content')
+        self.assertEqual(chunks, [b'cont', b'ent'])
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(self.cache.stats, {'hits': 2, 'misses': 1})
+        self.assertEqual(cache.BlobCache(self.directory).get(self.sha),
+                         b'content')
+
+    def test_blob(self):
+        @urlmatch(scheme="http", netloc="localhost",
+                  path="/api/v4/projects/1/repository/blobs/%s" % self.sha,
+                  method="get")
+        def resp_cont(url, request):
+            self.calls.append(url)
+            headers = {'content-type': 'application/json'}
+            content = ('{"sha": "%s", "size": 7, "encoding": "base64", '
+                       '"content": "Y29udGVudA=="}' % self.sha)
+            return response(200, content, headers, None, 5, request)
+
+        with HTTMock(resp_cont):
+            first = self.project.repository_blob(self.sha)
+            second = self.project.repository_blob(self.sha)
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_files_raw(self):
+        path = "/api/v4/projects/1/repository/files/README%2Emd(/raw)?"
+
+        @urlmatch(scheme="http", netloc="localhost", path=path)
+        def resp_cont(url, request):
+            self.calls.append((request.method, url.query))
+            headers = {'content-type': 'text/plain',
+                       'X-Gitlab-Blob-Id': self.sha}
+            return response(200, b'readme', headers, None, 5, request)
+
+        commit = 'b' * 40
+        with HTTMock(resp_cont):
+            self.assertEqual(self.project.files.raw('README.md', commit),
+                             b'readme')
+            self.assertEqual(self.project.files.raw('README.md', commit),
+                             b'readme')
+            self.assertEqual(self.project.files.raw('README.md', 'master'),
+                             b'readme')
+
+        self.assertEqual(self.calls, [('GET', 'ref=%s' % commit),
+                                      ('HEAD', 'ref=master')])
+        self.assertEqual(self.cache.stats, {'hits': 2, 'misses': 1})
+
+    def test_abbreviated_sha(self):
+        @urlmatch(scheme="http", netloc="localhost",
+                  path="/api/v4/projects/1/repository/blobs/abc/raw",
+                  method="get")
+        def resp_cont(url, request):
+            self.calls.append(url)
+            headers = {'content-type': 'application/octet-stream'}
+            return response(200, b'content', headers, None, 5, request)
+
+        with HTTMock(resp_cont):
+            self.project.repository_raw_blob('abc')
+            self.project.repository_raw_blob('abc')
+
+        self.assertEqual(len(self.calls), 2)
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Gauvain Pocentek <gauvain@pocentek.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import json
+import pickle
+try:
+    import unittest
+except ImportError:
+    import unittest2 as unittest
+import zlib
+
+import requests
+try:
+    from urllib3 import HTTPResponse
+except ImportError:
+    from requests.packages.urllib3 import HTTPResponse
+
+from gitlab import compression
+from gitlab import Gitlab
+
+
+class GzipAdapter(requests.adapters.HTTPAdapter):
+    """Adapter replying with a gzip encoded body, without network."""
+
+    def __init__(self, body):
+        super(GzipAdapter, self).__init__()
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+        self.compressed = compressor.compress(body) + compressor.flush()
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        raw = HTTPResponse(body=io.BytesIO(self.compressed),
+                           headers={'Content-Encoding': 'gzip',
+                                    'Content-Type': 'application/json'},
+                           status=200, preload_content=False,
+                           decode_content=True)
+        return self.build_response(request, raw)
+
+
+class TestAcceptEncoding(unittest.TestCase):
+    def test_accept_encoding(self):
+        self.assertEqual(compression.accept_encoding(False), 'identity')
+        self.assertIn('gzip', compression.accept_encoding(True))
+        self.assertEqual(compression.accept_encoding(['deflate', 'gzip']),
+                         'deflate, gzip')
+        self.assertRaises(ValueError, compression.accept_encoding,
+                          ['gzip', 'foo'])
+
+    def test_header(self):
+        gl = Gitlab("http://localhost", private_token="private_token",
+                    api_version=4, compression=['gzip'])
+        self.assertEqual(gl.headers['Accept-Encoding'], 'gzip')
+        gl = Gitlab("http://localhost", private_token="private_token",
+                    api_version=4)
+        self.assertNotIn('Accept-Encoding', gl.headers)
+
+
+class TestTransferStats(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.body = json.dumps([{'id': i, 'name': 'project'}
+                                for i in range(100)]).encode('utf-8')
+        self.adapter = GzipAdapter(self.body)
+        self.gl = Gitlab(
+            "http://localhost", private_token="private_token",
+            api_version=4, compression=True,
+            transfer_stats=compression.TransferStats(
+                callback=lambda *args: self.calls.append(args)))
+        self.gl.session.mount('http://', self.adapter)
+
+    def test_counters(self):
+        result = self.gl.http_get('/projects')
+        self.assertEqual(len(result), 100)
+        self.assertIn('gzip',
+                      self.adapter.requests[0].headers['Accept-Encoding'])
+
+        stats = self.gl.transfer_stats.stats
+        self.assertEqual(stats['responses'], 1)
+        self.assertEqual(stats['decoded_bytes'], len(self.body))
+        self.assertEqual(stats['wire_bytes'], len(self.adapter.compressed))
+        self.assertTrue(stats['wire_bytes'] < stats['decoded_bytes'])
+
+        response, wire, decoded = self.calls[0]
+        self.assertEqual(wire, len(self.adapter.compressed))
+        self.assertEqual(decoded, len(self.body))
+
+    def test_streamed(self):
+        result = self.gl.http_get('/projects', streamed=True)
+        self.assertEqual(self.gl.transfer_stats.responses, 0)
+        data = b''.join(result.iter_content(chunk_size=100))
+        self.assertEqual(data, self.body)
+
+        stats = self.gl.transfer_stats.stats
+        self.assertEqual(stats['responses'], 1)
+        self.assertEqual(stats['decoded_bytes'], len(self.body))
+        self.assertEqual(stats['wire_bytes'], len(self.adapter.compressed))
+
+    def test_pickability(self):
+        stats = compression.TransferStats()
+        stats.record(None, 1, 2)
+        unpickled = pickle.loads(pickle.dumps(stats))
+        self.assertEqual(unpickled.stats, {'responses': 1, 'wire_bytes': 1,
+                                           'decoded_bytes': 2})
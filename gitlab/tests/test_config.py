@@ -46,6 +46,12 @@ url = https://three.url
 private_token = MNOPQR
 ssl_verify = /path/to/CA/bundle.crt
 per_page = 50
+pool_maxsize = 32
+pool_block = true
+keep_alive = false
+retry_max_retries = 3
+retry_backoff_factor = 0.5
+retry_statuses = 429, 503
 
 [four]
 url = https://four.url
@@ -135,6 +141,11 @@ class TestConfigParser(unittest.TestCase):
         self.assertEqual(2, cp.timeout)
         self.assertEqual(True, cp.ssl_verify)
         self.assertIsNone(cp.per_page)
+        self.assertIsNone(cp.pool_maxsize)
+        self.assertIsNone(cp.pool_block)
+        self.assertTrue(cp.keep_alive)
+        self.assertIsNone(cp.retry_max_retries)
+        self.assertIsNone(cp.retry_statuses)
 
         fd = six.StringIO(valid_config)
         fd.close = mock.Mock(return_value=None)
@@ -158,6 +169,13 @@ class TestConfigParser(unittest.TestCase):
         self.assertEqual(2, cp.timeout)
         self.assertEqual("/path/to/CA/bundle.crt", cp.ssl_verify)
         self.assertEqual(50, cp.per_page)
+        self.assertIsNone(cp.pool_connections)
+        self.assertEqual(32, cp.pool_maxsize)
+        self.assertTrue(cp.pool_block)
+        self.assertFalse(cp.keep_alive)
+        self.assertEqual(3, cp.retry_max_retries)
+        self.assertEqual(0.5, cp.retry_backoff_factor)
+        self.assertEqual([429, 503], cp.retry_statuses)
 
         fd = six.StringIO(valid_config)
         fd.close = mock.Mock(return_value=None)
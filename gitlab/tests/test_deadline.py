@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Gauvain Pocentek <gauvain@pocentek.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+try:
+    import unittest
+except ImportError:
+    import unittest2 as unittest
+
+from httmock import HTTMock  # noqa
+from httmock import response  # noqa
+from httmock import urlmatch  # noqa
+import mock
+import requests
+
+from gitlab import deadline
+from gitlab import Gitlab
+from gitlab import GitlabTimeoutError
+from gitlab import utils
+
+
+@mock.patch('time.time')
+class TestDeadline(unittest.TestCase):
+    def test_check(self, m_time):
+        m_time.return_value = 100
+        d = deadline.Deadline(10)
+        self.assertEqual(d.remaining(), 10)
+        d.check()
+        m_time.return_value = 110
+        self.assertTrue(d.expired())
+        self.assertEqual(d.remaining(), 0)
+        self.assertRaises(GitlabTimeoutError, d.check)
+
+    @mock.patch('time.sleep')
+    def test_sleep(self, m_sleep, m_time):
+        m_time.return_value = 100
+        d = deadline.Deadline(10)
+        d.sleep(5)
+        m_sleep.assert_called_once_with(5)
+        self.assertRaises(GitlabTimeoutError, d.sleep, 10)
+        self.assertEqual(m_sleep.call_count, 1)
+
+    def test_socket_timeout(self, m_time):
+        m_time.return_value = 100
+        d = deadline.Deadline(10)
+        self.assertEqual(d.socket_timeout(None), 10)
+        self.assertEqual(d.socket_timeout(3), 3)
+        self.assertEqual(d.socket_timeout(30), 10)
+        self.assertEqual(d.socket_timeout((3, 30)), (3, 10))
+        self.assertEqual(d.socket_timeout((3, None)), (3, 10))
+
+    def test_guard(self, m_time):
+        m_time.return_value = 100
+        d = deadline.Deadline(10)
+        items = d.guard(iter([1, 2]))
+        self.assertEqual(next(items), 1)
+        m_time.return_value = 110
+        self.assertRaises(GitlabTimeoutError, next, items)
+
+    def test_budget(self, m_time):
+        m_time.return_value = 100
+        self.assertIsNone(deadline.current())
+        with deadline.budget(10) as outer:
+            self.assertIs(deadline.current(), outer)
+            with deadline.budget(20) as inner:
+                # A nested budget cannot extend the enclosing one
+                self.assertIs(inner, outer)
+            with deadline.budget(5) as inner:
+                self.assertEqual(inner.expires, 105)
+            self.assertIs(deadline.current(), outer)
+        self.assertIsNone(deadline.current())
+
+    def test_get_deadline(self, m_time):
+        m_time.return_value = 100
+        kwargs = {'deadline': 5, 'sudo': 1}
+        d = deadline.get_deadline(kwargs)
+        self.assertEqual({'sudo': 1}, kwargs)
+        self.assertEqual(d.expires, 105)
+        self.assertIsNone(deadline.get_deadline({}))
+
+        with deadline.budget(3) as outer:
+            self.assertIs(deadline.get_deadline({'deadline': 5}), outer)
+            self.assertIsNone(deadline.get_deadline({}, inherit=False))
+
+    def test_propagate(self, m_time):
+        m_time.return_value = 100
+        threads = set()
+
+        def func(i):
+            threads.add(threading.current_thread())
+            return deadline.current()
+
+        with deadline.budget(10) as d:
+            results = list(utils.parallel_map(func, range(4), 2))
+        self.assertEqual(results, [d] * 4)
+        self.assertNotIn(threading.current_thread(), threads)
+
+
+class TestGitlabDeadline(unittest.TestCase):
+    def setUp(self):
+        self.gl = Gitlab("http://localhost", private_token="private_token",
+                         api_version=4, timeout=30)
+
+    @mock.patch('time.sleep')
+    def test_retry_after(self, m_sleep):
+        calls = []
+
+        @urlmatch(scheme="http", netloc="localhost",
+                  path="/api/v4/projects", method="get")
+        def resp_cont(url, request):
+            calls.append(request)
+            headers = {'content-type': 'application/json',
+                       'Retry-After': '60'}
+            return response(429, '[]', headers, None, 5, request)
+
+        with HTTMock(resp_cont):
+            self.assertRaises(GitlabTimeoutError, self.gl.http_list,
+                              '/projects', all=True, deadline=10)
+        self.assertEqual(len(calls), 1)
+        self.assertFalse(m_sleep.called)
+        stats = self.gl.stats()['GET /projects']
+        self.assertEqual(stats['statuses'], {429: 1})
+
+    def test_socket_timeout(self):
+        ok = requests.Response()
+        ok.status_code = 200
+        with mock.patch.object(self.gl.session, 'send') as m_send:
+            m_send.return_value = ok
+            self.gl.http_request('get', '/projects', deadline=10)
+            self.assertLessEqual(m_send.call_args[1]['timeout'], 10)
+            self.gl.http_request('get', '/projects')
+            self.assertEqual(m_send.call_args[1]['timeout'], 30)
+
+            with deadline.budget(0.001):
+                m_send.reset_mock()
+                m_send.side_effect = requests.exceptions.ReadTimeout()
+                self.assertRaises(GitlabTimeoutError, self.gl.http_request,
+                                  'get', '/projects')
+                self.assertLessEqual(m_send.call_count, 1)
+
+    @mock.patch('time.time')
+    def test_pages(self, m_time):
+        m_time.return_value = 100
+
+        @urlmatch(scheme="http", netloc="localhost", path="/api/v4/projects",
+                  method="get")
+        def resp_cont(url, request):
+            headers = {'content-type': 'application/json',
+                       'Link': '<http://localhost/api/v4/projects?page=2>; '
+                               'rel="next"'}
+            # Each page takes 6 seconds
+            m_time.return_value += 6
+            return response(200, '[{"id": 1}]', headers, None, 5, request)
+
+        with HTTMock(resp_cont):
+            gl_list = self.gl.http_list('/projects', as_list=False,
+                                        deadline=10)
+            self.assertEqual(next(gl_list), {'id': 1})
+            self.assertEqual(next(gl_list), {'id': 1})
+            self.assertRaises(GitlabTimeoutError, next, gl_list)
@@ -18,7 +18,14 @@
 
 from __future__ import print_function
 
+import base64
+import io
+import json
+import os
 import pickle
+import shutil
+import tempfile
+import zipfile
 try:
     import unittest
 except ImportError:
@@ -27,7 +34,9 @@ except ImportError:
 from httmock import HTTMock  # noqa
 from httmock import response  # noqa
 from httmock import urlmatch  # noqa
+import mock
 import requests
+from six.moves.urllib.parse import parse_qsl
 
 import gitlab
 from gitlab import *  # noqa
@@ -100,6 +109,97 @@ class TestGitlabList(unittest.TestCase):
                 self.assertEqual(l[0]['a'], 'b')
                 self.assertEqual(l[1]['c'], 'd')
 
+    def _paginated_resp(self, total_pages, with_total=True):
+        @urlmatch(scheme='http', netloc="localhost", path="/api/v4/tests",
+                  method="get")
+        def resp(url, request):
+            page = 1
+            for param in url.query.split('&'):
+                if param.startswith('page='):
+                    page = int(param.split('=')[1])
+            headers = {'content-type': 'application/json',
+                       'X-Page': page,
+                       'X-Per-Page': 2}
+            if with_total:
+                headers['X-Total-Pages'] = total_pages
+            if page < total_pages:
+                headers['X-Next-Page'] = page + 1
+                headers['Link'] = (
+                    '<http://localhost/api/v4/tests?per_page=2&page=%d>;'
+                    ' rel="next"' % (page + 1))
+            content = '[{"id": %d}, {"id": %d}]' % (page * 2 - 1, page * 2)
+            return response(200, content, headers, None, 5, request)
+        return resp
+
+    def test_list_all_concurrency(self):
+        with HTTMock(self._paginated_resp(5)):
+            l = self.gl.http_list('/tests', all=True, per_page=2,
+                                  concurrency=3)
+        self.assertEqual([item['id'] for item in l], list(range(1, 11)))
+
+    def test_list_all_concurrency_without_total_pages(self):
+        with HTTMock(self._paginated_resp(3, with_total=False)):
+            l = self.gl.http_list('/tests', all=True, per_page=2,
+                                  concurrency=3)
+        self.assertEqual([item['id'] for item in l], list(range(1, 7)))
+
+    def test_streamed_list(self):
+        with HTTMock(self._paginated_resp(3)):
+            obj = self.gl.http_list('/tests', as_list=False, per_page=2,
+                                    streamed=True)
+            self.assertIsNone(obj._data)
+            self.assertEqual([item['id'] for item in obj], list(range(1, 7)))
+
+            l = self.gl.http_list('/tests', all=True, per_page=2,
+                                  streamed=True, concurrency=2)
+            self.assertEqual([item['id'] for item in l], list(range(1, 7)))
+
+    def test_streamed_list_invalid_data(self):
+        @urlmatch(scheme="http", netloc="localhost", path="/api/v4/tests",
+                  method="get")
+        def resp_cont(url, request):
+            headers = {'content-type': 'application/json'}
+            content = '[{"name": "project1"}, {"name": '
+            return response(200, content, headers, None, 5, request)
+
+        with HTTMock(resp_cont):
+            obj = self.gl.http_list('/tests', as_list=False, streamed=True)
+            self.assertEqual(obj.next(), {'name': 'project1'})
+            self.assertRaises(GitlabParsingError, obj.next)
+
+    def test_keyset_pagination(self):
+        @urlmatch(scheme='http', netloc="localhost", path="/api/v4/tests",
+                  method="get")
+        def resp(url, request):
+            self.assertIn('pagination=keyset', url.query)
+            if 'id_after' in url.query:
+                content = '[{"id": 3}]'
+                headers = {'content-type': 'application/json'}
+            else:
+                content = '[{"id": 1}, {"id": 2}]'
+                headers = {
+                    'content-type': 'application/json',
+                    'Link': (
+                        '<http://localhost/api/v4/tests?id_after=2'
+                        '&order_by=id&pagination=keyset&per_page=2&sort=asc>;'
+                        ' rel="next"')}
+            return response(200, content, headers, None, 5, request)
+
+        with HTTMock(resp):
+            obj = self.gl.http_list('/tests', as_list=False, per_page=2,
+                                    pagination='keyset', order_by='id',
+                                    sort='asc')
+            self.assertIsNone(obj.total)
+            self.assertIsNone(obj.total_pages)
+            self.assertIsNone(obj.current_page)
+            self.assertRaises(TypeError, len, obj)
+            self.assertEqual([item['id'] for item in list(obj)], [1, 2, 3])
+
+            l = self.gl.http_list('/tests', all=True, per_page=2,
+                                  pagination='keyset', order_by='id',
+                                  sort='asc', concurrency=4)
+            self.assertEqual([item['id'] for item in l], [1, 2, 3])
+
 
 class TestGitlabHttpMethods(unittest.TestCase):
     def setUp(self):
@@ -326,6 +426,127 @@ class TestGitlabHttpMethods(unittest.TestCase):
                               '/not_there')
 
 
+class FakeRangeServer(object):
+    """Replacement for Gitlab.http_request serving a file with ranges."""
+
+    def __init__(self, data, ranges=True, fail_after=None):
+        self.data = data
+        self.ranges = ranges
+        self.fail_after = fail_after
+        self.requests = []
+
+    def __call__(self, verb, path, query_data={}, streamed=False,
+                 extra_headers=None, **kwargs):
+        range_header = (extra_headers or {}).get('Range')
+        self.requests.append(range_header)
+        result = requests.Response()
+        result.raw = io.BytesIO()
+        result.status_code = 200
+        content = self.data
+        if range_header and self.ranges:
+            start, end = range_header[len('bytes='):].split('-')
+            start = int(start)
+            end = int(end) + 1 if end else len(self.data)
+            content = self.data[start:end]
+            result.status_code = 206
+            result.headers['Content-Range'] = 'bytes %d-%d/%d' % (
+                start, end - 1, len(self.data))
+        result.headers['Content-Length'] = str(len(content))
+        fail_after = self.fail_after
+        self.fail_after = None
+
+        def iter_content(chunk_size=1):
+            for i in range(0, len(content), chunk_size):
+                if fail_after is not None and i >= fail_after:
+                    raise requests.exceptions.ChunkedEncodingError()
+                yield content[i:i + chunk_size]
+
+        result.iter_content = iter_content
+        return result
+
+
+class TestGitlabDownload(unittest.TestCase):
+    def setUp(self):
+        self.gl = Gitlab("http://localhost", private_token="private_token",
+                         api_version=4)
+        self.data = bytes(bytearray(range(256))) * 40
+
+    def _download(self, server, **kwargs):
+        self.gl.http_request = server
+        f = io.BytesIO()
+        size = self.gl.http_download('/file', f, chunk_size=100, **kwargs)
+        return size, f.getvalue()
+
+    def test_download(self):
+        server = FakeRangeServer(self.data)
+        self.assertEqual((len(self.data), self.data), self._download(server))
+        self.assertEqual(['bytes=0-'], server.requests)
+
+    def test_resume(self):
+        server = FakeRangeServer(self.data, fail_after=1000)
+        self.assertEqual((len(self.data), self.data), self._download(server))
+        self.assertEqual(['bytes=0-', 'bytes=1000-%d' % (len(self.data) - 1)],
+                         server.requests)
+
+    def test_no_range_support(self):
+        server = FakeRangeServer(self.data, ranges=False, fail_after=1000)
+        self.assertRaises(requests.exceptions.ChunkedEncodingError,
+                          self._download, server)
+
+    def test_segments(self):
+        server = FakeRangeServer(self.data)
+        result = self._download(server, segments=4)
+        self.assertEqual((len(self.data), self.data), result)
+        self.assertEqual(5, len(server.requests))
+
+    @mock.patch('time.time')
+    def test_deadline(self, m_time):
+        # Each call to time.time() takes one second
+        m_time.side_effect = range(100, 200)
+        server = FakeRangeServer(self.data)
+        self.assertRaises(GitlabTimeoutError, self._download, server,
+                          deadline=5)
+        self.assertEqual(['bytes=0-'], server.requests)
+
+    def test_path_target(self):
+        self.gl.http_request = FakeRangeServer(self.data)
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'artifacts.zip')
+            self.gl.http_download('/file', path, segments=3)
+            with open(path, 'rb') as f:
+                self.assertEqual(self.data, f.read())
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_path_target_failure(self):
+        self.gl.http_request = FakeRangeServer(self.data, ranges=False,
+                                               fail_after=1000)
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, 'artifacts.zip')
+        self.assertRaises(requests.exceptions.ChunkedEncodingError,
+                          self.gl.http_download, '/file', path,
+                          chunk_size=100)
+        self.assertFalse(os.path.exists(path))
+
+    def test_archive_target(self):
+        @urlmatch(scheme="http", netloc="localhost",
+                  path="/api/v4/projects/1/repository/archive", method="get")
+        def resp_cont(url, request):
+            self.assertEqual('sha=master', url.query)
+            self.assertEqual('bytes=0-', request.headers['Range'])
+            headers = {'Content-Type': 'application/octet-stream'}
+            return response(200, self.data, headers, None, 5, request)
+
+        project = self.gl.projects.get(1, lazy=True)
+        f = io.BytesIO()
+        with HTTMock(resp_cont):
+            size = project.repository_archive(sha='master', target=f)
+        self.assertEqual(len(self.data), size)
+        self.assertEqual(self.data, f.getvalue())
+
+
 class TestGitlabAuth(unittest.TestCase):
     def test_invalid_auth_args(self):
         self.assertRaises(ValueError,
@@ -389,6 +610,19 @@ class TestGitlab(unittest.TestCase):
         self.assertTrue(hasattr(unpickled, '_objects'))
         self.assertEqual(unpickled._objects, original_gl_objects)
 
+    def test_pool_options(self):
+        adapter = self.gl.session.get_adapter('https://localhost')
+        self.assertEqual(adapter._pool_maxsize, 10)
+        self.assertNotIn('Connection', self.gl.headers)
+
+        gl = Gitlab("http://localhost", pool_connections=2, pool_maxsize=64,
+                    pool_block=True, keep_alive=False)
+        adapter = gl.session.get_adapter('http://localhost')
+        self.assertEqual(adapter._pool_connections, 2)
+        self.assertEqual(adapter._pool_maxsize, 64)
+        self.assertTrue(adapter._pool_block)
+        self.assertEqual(gl.headers['Connection'], 'close')
+
     def test_credentials_auth_nopassword(self):
         self.gl.email = None
         self.gl.password = None
@@ -490,6 +724,37 @@ class TestGitlab(unittest.TestCase):
             self.assertEqual(data.name, "name")
             self.assertEqual(data.id, 1)
 
+    def test_project_upload(self):
+        @urlmatch(scheme="http", netloc="localhost",
+                  path="/api/v4/projects/1/uploads", method="post")
+        def resp_upload(url, request):
+            body = b''.join(request.body)
+            self.assertEqual(str(len(body)), request.headers['Content-Length'])
+            self.assertTrue(request.headers['Content-type'].startswith(
+                'multipart/form-data; boundary='))
+            self.assertIn(b'filename="data.bin"', body)
+            self.assertIn(b'\r\n\r\n' + b'a' * 3000 + b'\r\n', body)
+            headers = {'content-type': 'application/json'}
+            content = '{"alt": "data", "url": "/uploads/data.bin", ' \
+                      '"markdown": "[data](/uploads/data.bin)"}'
+            return response(201, content, headers, None, 5, request)
+
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'data.bin')
+            with open(path, 'wb') as f:
+                f.write(b'a' * 3000)
+            progress = []
+            project = self.gl.projects.get(1, lazy=True)
+            with HTTMock(resp_upload):
+                data = project.upload(
+                    'data.bin', filepath=path,
+                    progress_callback=lambda *args: progress.append(args))
+        finally:
+            shutil.rmtree(tmpdir)
+        self.assertEqual(data['url'], '/uploads/data.bin')
+        self.assertEqual(progress[-1][0], progress[-1][1])
+
     def test_groups(self):
         @urlmatch(scheme="http", netloc="localhost", path="/api/v4/groups/1",
                   method="get")
@@ -536,3 +801,357 @@ class TestGitlab(unittest.TestCase):
             self.assertEqual(type(user), User)
             self.assertEqual(user.name, "name")
             self.assertEqual(user.id, 1)
+
+
+class TestProjectJobTrace(unittest.TestCase):
+    def setUp(self):
+        self.gl = Gitlab("http://localhost", private_token="private_token",
+                         api_version=4)
+        self.log = b'line 1\n'
+        self.statuses = ['running', 'running', 'success']
+        self.ranges = []
+
+        @urlmatch(scheme="http", netloc="localhost",
+                  path="/api/v4/projects/1/jobs/2/trace", method="get")
+        def resp_trace(url, request):
+            range_header = request.headers.get('Range')
+            self.ranges.append(range_header)
+            if range_header is None:
+                return response(200, self.log, {}, None, 5, request)
+            start = int(range_header[len('bytes='):-1])
+            if start >= len(self.log):
+                return response(416, '', {}, None, 5, request)
+            headers = {'Content-Range': 'bytes %d-%d/%d' % (
+                start, len(self.log) - 1, len(self.log))}
+            return response(206, self.log[start:], headers, None, 5, request)
+
+        @urlmatch(scheme="http", netloc="localhost",
+                  path="/api/v4/projects/1/jobs/2", method="get")
+        def resp_job(url, request):
+            status = self.statuses.pop(0)
+            if status == 'success':
+                self.log += b'line 3\n'
+            else:
+                self.log += b'line 2\n'
+            headers = {'content-type': 'application/json'}
+            content = '{"id": 2, "status": "%s"}' % status
+            return response(200, content, headers, None, 5, request)
+
+        self.mocks = (resp_trace, resp_job)
+
+    def test_trace_offset(self):
+        with HTTMock(*self.mocks):
+            job = self.gl.projects.get(1, lazy=True).jobs.get(2)
+            self.assertEqual(b'line 1\nline 2\n', job.trace(offset=0))
+            self.assertEqual(b'', job.trace(offset=14))
+            self.assertEqual(b'2\n', job.trace(offset=12))
+        self.assertEqual(['bytes=0-', 'bytes=14-', 'bytes=12-'], self.ranges)
+        self.assertEqual(14, job.__dict__['_trace_offset'])
+
+    @mock.patch('time.sleep')
+    def test_trace_follow(self, m_sleep):
+        with HTTMock(*self.mocks):
+            job = self.gl.projects.get(1, lazy=True).jobs.get(2)
+            job.trace(offset=0)
+            chunks = list(job.trace_follow(interval=1, max_interval=3))
+        self.assertEqual([b'line 2\n', b'line 3\n'], chunks)
+        self.assertEqual(['bytes=0-', 'bytes=14-', 'bytes=14-', 'bytes=21-'],
+                         self.ranges)
+        self.assertEqual([1, 1], [c[0][0] for c in m_sleep.call_args_list])
+
+
+class TestRepositoryWalk(unittest.TestCase):
+    def setUp(self):
+        self.gl = Gitlab("http://localhost", private_token="private_token",
+                         api_version=4)
+        self.trees = {
+            '': [{'id': 't1', 'name': 'a', 'type': 'tree'},
+                 {'id': 'b1', 'name': 'b.txt', 'type': 'blob'},
+                 {'id': 't2', 'name': 'd', 'type': 'tree'}],
+            'a': [{'id': 'b2', 'name': 'c.txt', 'type': 'blob'}],
+            'd': [{'id': 't3', 'name': 'e', 'type': 'tree'}],
+            'd/e': [{'id': 'b3', 'name': 'f.txt', 'type': 'blob'}],
+        }
+        self.requested = []
+
+        def list_tree(path, recursive):
+            items = []
+            for item in self.trees[path]:
+                item_path = '%s/%s' % (path, item['name']) if path \
+                    else item['name']
+                items.append(dict(item, path=item_path))
+                if recursive and item['type'] == 'tree':
+                    items.extend(list_tree(item_path, True))
+            return items
+
+        @urlmatch(scheme="http", netloc="localhost",
+                  path="/api/v4/projects/1/repository/tree", method="get")
+        def resp_tree(url, request):
+            query = dict(parse_qsl(url.query))
+            path = query.get('path', '')
+            recursive = query.get('recursive') == 'True'
+            self.requested.append((path, recursive))
+            items = list_tree(path, recursive)
+            headers = {'content-type': 'application/json'}
+            return response(200, json.dumps(items), headers, None, 5, request)
+
+        self.resp_tree = resp_tree
+
+    def test_walk(self):
+        project = self.gl.projects.get(1, lazy=True)
+        with HTTMock(self.resp_tree):
+            paths = [e['path'] for e in project.repository_walk(
+                ref='master', concurrency=2)]
+        self.assertEqual(['a', 'b.txt', 'd', 'a/c.txt', 'd/e', 'd/e/f.txt'],
+                         paths)
+        # The top-level subtrees are listed recursively, in parallel
+        self.assertEqual([('', False), ('a', True), ('d', True)],
+                         sorted(self.requested))
+
+    def test_walk_cache(self):
+        project = self.gl.projects.get(1, lazy=True)
+        cache = {}
+        with HTTMock(self.resp_tree):
+            list(project.repository_walk(ref='v1', cache=cache))
+            self.requested = []
+
+            # "d" was renamed to "g", "a" was modified
+            self.trees[''] = [{'id': 't4', 'name': 'a', 'type': 'tree'},
+                              {'id': 't2', 'name': 'g', 'type': 'tree'}]
+            self.trees['a'] = []
+            paths = [e['path'] for e in project.repository_walk(
+                ref='v2', cache=cache)]
+
+        self.assertEqual(['a', 'g', 'g/e', 'g/e/f.txt'], paths)
+        self.assertEqual([('', False), ('a', True)], self.requested)
+
+
+class TestProjectFilesGetMany(unittest.TestCase):
+    def setUp(self):
+        self.gl = Gitlab("http://localhost", private_token="private_token",
+                         api_version=4)
+        self.project = self.gl.projects.get(1, lazy=True)
+        self.files = {'README.md': b'readme', 'src/main.py': b'main'}
+
+        @urlmatch(scheme="http", netloc="localhost",
+                  path=r"/api/v4/projects/1/repository/files/.*/raw",
+                  method="get")
+        def resp_raw(url, request):
+            path = url.path.split('/')[-2].replace('%2F', '/')
+            path = path.replace('%2E', '.')
+            if path not in self.files:
+                headers = {'content-type': 'application/json'}
+                return response(404, '{"message": "404 File Not Found"}',
+                                headers, None, 5, request)
+            headers = {'content-type': 'text/plain'}
+            return response(200, self.files[path], headers, None, 5, request)
+
+        self.resp_raw = resp_raw
+
+    def test_get_many(self):
+        paths = ['README.md', 'missing.txt', 'src/main.py']
+        with HTTMock(self.resp_raw):
+            result = self.project.files.get_many(paths, 'master',
+                                                 concurrency=2)
+        self.assertEqual(sorted(result.keys()), sorted(paths))
+        self.assertEqual(result['README.md'], b'readme')
+        self.assertEqual(result['src/main.py'], b'main')
+        self.assertIsInstance(result['missing.txt'], GitlabGetError)
+
+    def test_get_many_dest_dir(self):
+        dest_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, dest_dir)
+        paths = ['src/main.py', 'missing.txt']
+        with HTTMock(self.resp_raw):
+            result = self.project.files.get_many(paths, 'master',
+                                                 dest_dir=dest_dir)
+        target = os.path.join(dest_dir, 'src', 'main.py')
+        self.assertEqual(result['src/main.py'], target)
+        with open(target, 'rb') as f:
+            self.assertEqual(f.read(), b'main')
+        self.assertIsInstance(result['missing.txt'], GitlabGetError)
+        self.assertFalse(os.path.exists(os.path.join(dest_dir,
+                                                     'missing.txt')))
+
+        self.assertRaises(ValueError, self.project.files.get_many,
+                          ['../outside'], 'master', dest_dir=dest_dir)
+
+
+class TestProjectFileDecode(unittest.TestCase):
+    def setUp(self):
+        gl = Gitlab("http://localhost", private_token="private_token",
+                    api_version=4)
+        self.data = b'line\n' * 1000
+        self.file = ProjectFile(gl.projects.get(1, lazy=True).files, {
+            'file_path': 'a.txt',
+            'encoding': 'base64',
+            'content': base64.b64encode(self.data).decode('ascii')})
+
+    def test_iter_bytes(self):
+        chunks = list(self.file.iter_bytes(chunk_size=100))
+        self.assertEqual(len(chunks), 51)
+        self.assertEqual(b''.join(chunks), self.data)
+
+    def test_open(self):
+        with self.file.open() as f:
+            self.assertEqual(f.readline(), b'line\n')
+            self.assertEqual(f.read(), self.data[5:])
+
+    def test_decode_to(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'a.txt')
+        self.file.decode_to(path, chunk_size=100)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+
+
+class TestCommitBuilder(unittest.TestCase):
+    def setUp(self):
+        self.gl = Gitlab("http://localhost", private_token="private_token",
+                         api_version=4)
+        self.project = self.gl.projects.get(1, lazy=True)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.bodies = []
+
+        @urlmatch(scheme="http", netloc="localhost",
+                  path="/api/v4/projects/1/repository/commits",
+                  method="post")
+        def resp_commit(url, request):
+            body = b''.join(request.body)
+            self.assertEqual(int(request.headers['Content-Length']),
+                             len(body))
+            self.bodies.append(json.loads(body.decode('utf-8')))
+            headers = {'content-type': 'application/json'}
+            content = '{"id": "%d", "title": "commit"}' % len(self.bodies)
+            return response(201, content, headers, None, 5, request)
+
+        self.resp_commit = resp_commit
+
+    def _source(self, name, data):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_single_commit(self):
+        source = self._source('logo.png', b'\x89PNG' * 100)
+        builder = self.project.commits.builder('master', 'Update files',
+                                               author_name='bot')
+        builder.create('a.txt', content=u'text')
+        builder.create('logo.png', source=source)
+        builder.update('b.bin', content=b'\x00\x01')
+        builder.delete('c.txt')
+        builder.move('d.txt', 'e.txt')
+        self.assertEqual(len(builder), 5)
+
+        with HTTMock(self.resp_commit):
+            commits = builder.commit()
+
+        self.assertEqual(len(commits), 1)
+        self.assertIsInstance(commits[0], ProjectCommit)
+        self.assertEqual(len(builder), 0)
+        body = self.bodies[0]
+        self.assertEqual(body['commit_message'], 'Update files')
+        self.assertEqual(body['author_name'], 'bot')
+        actions = body['actions']
+        self.assertEqual(actions[0], {'action': 'create', 'file_path': 'a.txt',
+                                      'content': 'text'})
+        self.assertEqual(actions[1]['encoding'], 'base64')
+        self.assertEqual(base64.b64decode(actions[1]['content']),
+                         b'\x89PNG' * 100)
+        self.assertEqual(base64.b64decode(actions[2]['content']),
+                         b'\x00\x01')
+        self.assertEqual(actions[3], {'action': 'delete',
+                                      'file_path': 'c.txt'})
+        self.assertEqual(actions[4], {'action': 'move', 'file_path': 'e.txt',
+                                      'previous_path': 'd.txt'})
+
+    def test_split(self):
+        builder = self.project.commits.builder('feature', 'Generate',
+                                               max_payload_size=2000,
+                                               start_branch='master')
+        for i in range(5):
+            builder.create('file%d' % i,
+                           source=self._source('f%d' % i, b'x' * 600))
+
+        with HTTMock(self.resp_commit):
+            commits = builder.commit()
+
+        self.assertEqual(len(commits), 3)
+        self.assertEqual([len(b['actions']) for b in self.bodies], [2, 2, 1])
+        self.assertEqual([b['commit_message'] for b in self.bodies],
+                         ['Generate (1/3)', 'Generate (2/3)',
+                          'Generate (3/3)'])
+        self.assertEqual(self.bodies[0]['start_branch'], 'master')
+        self.assertNotIn('start_branch', self.bodies[1])
+
+    def test_content_and_source(self):
+        builder = self.project.commits.builder('master', 'message')
+        self.assertRaises(ValueError, builder.create, 'a', content='a',
+                          source='a')
+
+
+class TestArtifactsReader(unittest.TestCase):
+    def setUp(self):
+        self.gl = Gitlab("http://localhost", private_token="private_token",
+                         api_version=4)
+        self.job = ProjectJob(self.gl.projects.get(1, lazy=True).jobs,
+                              {'id': 2})
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as z:
+            z.writestr('junit.xml', b'<testsuites/>')
+            z.writestr('build/app.bin', b'\x00' * 10000)
+        self.archive = buf.getvalue()
+        self.requested = []
+
+        @urlmatch(scheme="http", netloc="localhost",
+                  path=r"/api/v4/projects/1/jobs/2/artifacts.*",
+                  method="get")
+        def resp_artifacts(url, request):
+            self.requested.append(url.path)
+            if url.path.endswith('/artifacts'):
+                headers = {'content-type': 'application/zip',
+                           'Content-Length': str(len(self.archive))}
+                return response(200, self.archive, headers, None, 5,
+                                request)
+            if url.path.replace('%2E', '.').endswith('/artifacts/junit.xml'):
+                headers = {'content-type': 'application/xml'}
+                return response(200, b'<testsuites/>', headers, None, 5,
+                                request)
+            headers = {'content-type': 'application/json'}
+            return response(404, '{"message": "404 Not Found"}', headers,
+                            None, 5, request)
+
+        self.resp_artifacts = resp_artifacts
+
+    def test_archive(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with HTTMock(self.resp_artifacts):
+            with self.job.artifacts_reader() as reader:
+                self.assertEqual(sorted(reader.namelist()),
+                                 ['build/app.bin', 'junit.xml'])
+                self.assertEqual(reader.read('junit.xml'), b'<testsuites/>')
+                with reader.open('build/app.bin') as f:
+                    self.assertEqual(f.read(10), b'\x00' * 10)
+                path = reader.extract('junit.xml', directory)
+                self.assertTrue(os.path.exists(path))
+
+                # The archive is used once downloaded
+                contents = reader.read_many(['junit.xml', 'missing'])
+                self.assertEqual(contents['junit.xml'], b'<testsuites/>')
+                self.assertIsInstance(contents['missing'], KeyError)
+        self.assertEqual(self.requested,
+                         ['/api/v4/projects/1/jobs/2/artifacts'])
+
+    def test_read_many_direct(self):
+        with HTTMock(self.resp_artifacts):
+            reader = self.job.artifacts_reader(max_direct_files=2)
+            contents = reader.read_many(['junit.xml', 'missing'],
+                                        concurrency=2)
+        self.assertEqual(contents['junit.xml'], b'<testsuites/>')
+        self.assertIsInstance(contents['missing'], GitlabGetError)
+        self.assertNotIn('/api/v4/projects/1/jobs/2/artifacts',
+                         self.requested)
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Gauvain Pocentek <gauvain@pocentek.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pickle
+try:
+    import unittest
+except ImportError:
+    import unittest2 as unittest
+
+from httmock import HTTMock  # noqa
+from httmock import response  # noqa
+from httmock import urlmatch  # noqa
+import mock
+
+from gitlab import deadline
+from gitlab import Gitlab
+from gitlab import GitlabBulkheadFullError
+from gitlab import GitlabCircuitOpenError
+from gitlab import GitlabHttpError
+from gitlab import GitlabTimeoutError
+from gitlab import isolation
+
+
+class TestEndpointFamily(unittest.TestCase):
+    def test_families(self):
+        for endpoint in ('/projects/:id/repository/archive',
+                         '/projects/:id/repository/archive.tar.gz',
+                         '/projects/:id/jobs/:id/artifacts',
+                         '/projects/:id/repository/files/:name/raw',
+                         '/projects/:id/export/download',
+                         '/projects/:id/jobs/:id/trace'):
+            self.assertEqual('downloads', isolation.endpoint_family(endpoint))
+        for endpoint in ('/projects/:id', '/projects/:id/export',
+                         '/projects/:id/repository/tree'):
+            self.assertEqual('api', isolation.endpoint_family(endpoint))
+
+
+@mock.patch('time.time')
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.breaker = isolation.CircuitBreaker(failure_threshold=2,
+                                                recovery_timeout=10)
+        self.key = self.breaker.key('localhost', '/projects/:id')
+
+    def test_open(self, m_time):
+        m_time.return_value = 100
+        self.assertEqual(('localhost', 'api'), self.key)
+        self.breaker.record(self.key, 503)
+        self.breaker.record(self.key, 200)
+        self.breaker.record(self.key, 404)
+        self.breaker.record(self.key, 502)
+        self.assertEqual(isolation.CLOSED, self.breaker.state(self.key))
+        self.breaker.allow(self.key)
+        self.breaker.record(self.key, None)
+        self.assertEqual(isolation.OPEN, self.breaker.state(self.key))
+        self.assertRaises(GitlabCircuitOpenError, self.breaker.allow,
+                          self.key)
+
+        # The other families are not affected
+        other = self.breaker.key('localhost', '/projects/:id/jobs/:id/trace')
+        self.breaker.allow(other)
+        self.assertEqual({self.key: isolation.OPEN,
+                          other: isolation.CLOSED}, self.breaker.states())
+
+    def test_half_open(self, m_time):
+        m_time.return_value = 100
+        self.breaker.record(self.key, 500)
+        self.breaker.record(self.key, 500)
+        m_time.return_value = 110
+        self.assertEqual(isolation.HALF_OPEN, self.breaker.state(self.key))
+        self.breaker.allow(self.key)
+        # A single trial request at a time
+        self.assertRaises(GitlabCircuitOpenError, self.breaker.allow,
+                          self.key)
+        self.breaker.record(self.key, 500)
+        self.assertEqual(isolation.OPEN, self.breaker.state(self.key))
+
+        m_time.return_value = 120
+        self.breaker.allow(self.key)
+        self.breaker.record(self.key, 200)
+        self.assertEqual(isolation.CLOSED, self.breaker.state(self.key))
+
+    def test_cancel(self, m_time):
+        m_time.return_value = 100
+        self.breaker.record(self.key, 500)
+        self.breaker.record(self.key, 500)
+        m_time.return_value = 110
+        self.breaker.allow(self.key)
+        m_time.return_value = 112
+        with self.assertRaises(GitlabCircuitOpenError) as cm:
+            self.breaker.allow(self.key)
+        self.assertIn('retry in 8.0s', str(cm.exception))
+        self.breaker.cancel(self.key)
+        self.breaker.allow(self.key)
+
+    def test_lost_trial(self, m_time):
+        m_time.return_value = 100
+        self.breaker.record(self.key, 500)
+        self.breaker.record(self.key, 500)
+        m_time.return_value = 110
+        self.breaker.allow(self.key)
+        m_time.return_value = 120
+        self.breaker.allow(self.key)
+
+    def test_pickability(self, m_time):
+        m_time.return_value = 100
+        self.breaker.record(self.key, 500)
+        self.breaker.record(self.key, 500)
+        unpickled = pickle.loads(pickle.dumps(self.breaker))
+        self.assertEqual(isolation.OPEN, unpickled.state(self.key))
+
+
+class TestBulkhead(unittest.TestCase):
+    def test_limits(self):
+        bulkhead = isolation.Bulkhead({'downloads': 1}, max_wait=0)
+        archive = '/projects/:id/repository/archive'
+        release = bulkhead.acquire(archive)
+        self.assertRaises(GitlabBulkheadFullError, bulkhead.acquire, archive)
+        # The other families are not limited
+        for i in range(3):
+            bulkhead.acquire('/projects/:id')
+        self.assertEqual({'downloads': 1}, bulkhead.in_flight())
+
+        release()
+        release()
+        self.assertEqual({'downloads': 0}, bulkhead.in_flight())
+        bulkhead.acquire(archive)()
+
+    def test_deadline(self):
+        bulkhead = isolation.Bulkhead({'api': 1})
+        bulkhead.acquire('/projects')
+        self.assertRaises(GitlabTimeoutError, bulkhead.acquire, '/projects',
+                          deadline.Deadline(0.01))
+
+    def test_pickability(self):
+        bulkhead = isolation.Bulkhead({'api': 1})
+        bulkhead.acquire('/projects')
+        unpickled = pickle.loads(pickle.dumps(bulkhead))
+        self.assertEqual({}, unpickled.in_flight())
+        self.assertEqual({'api': 1}, unpickled.limits)
+
+
+class TestGitlabIsolation(unittest.TestCase):
+    def setUp(self):
+        self.calls = 0
+
+    def _resp_cont(self, status):
+        @urlmatch(scheme="http", netloc="localhost",
+                  path="/api/v4/projects/1", method="get")
+        def resp_cont(url, request):
+            self.calls += 1
+            headers = {'content-type': 'application/json'}
+            return response(status, '{"id": 1}', headers, None, 5, request)
+        return resp_cont
+
+    def test_circuit_breaker(self):
+        breaker = isolation.CircuitBreaker(failure_threshold=3)
+        gl = Gitlab("http://localhost", private_token="private_token",
+                    api_version=4, circuit_breaker=breaker)
+
+        with HTTMock(self._resp_cont(503)):
+            with mock.patch('time.sleep'):
+                self.assertRaises(GitlabCircuitOpenError, gl.http_get,
+                                  '/projects/1')
+            self.assertEqual(3, self.calls)
+            self.assertRaises(GitlabCircuitOpenError, gl.http_get,
+                              '/projects/1', max_retries=0)
+            self.assertEqual(3, self.calls)
+
+        stats = gl.stats()['GET /projects/:id']
+        self.assertEqual({'GitlabCircuitOpenError': 2}, stats['statuses'])
+        self.assertEqual({'localhost api': 'open'}, gl.metrics.circuits())
+        text = gl.metrics.to_openmetrics()
+        self.assertIn('# TYPE gitlab_circuit_state stateset', text)
+        self.assertIn('gitlab_circuit_state{host="localhost",family="api",'
+                      'gitlab_circuit_state="open"} 1', text)
+        self.assertIn('gitlab_circuit_state{host="localhost",family="api",'
+                      'gitlab_circuit_state="closed"} 0', text)
+
+    @mock.patch('time.time')
+    def test_bulkhead_rejects_trial(self, m_time):
+        m_time.return_value = 100
+        breaker = isolation.CircuitBreaker(failure_threshold=1,
+                                           recovery_timeout=10)
+        bulkhead = isolation.Bulkhead({'api': 1}, max_wait=0)
+        gl = Gitlab("http://localhost", private_token="private_token",
+                    api_version=4, circuit_breaker=breaker,
+                    bulkhead=bulkhead)
+        circuit = breaker.key('localhost', '/projects/:id')
+        breaker.record(circuit, 503)
+        m_time.return_value = 110
+
+        release = bulkhead.acquire('/projects/:id')
+        self.assertRaises(GitlabBulkheadFullError, gl.http_get,
+                          '/projects/1')
+        release()
+        # The rejected attempt didn't use the trial request
+        with HTTMock(self._resp_cont(200)):
+            self.assertEqual({'id': 1}, gl.http_get('/projects/1'))
+        self.assertEqual(isolation.CLOSED, breaker.state(circuit))
+
+    def test_bulkhead(self):
+        bulkhead = isolation.Bulkhead({'api': 1}, max_wait=0)
+        gl = Gitlab("http://localhost", private_token="private_token",
+                    api_version=4, bulkhead=bulkhead)
+
+        with HTTMock(self._resp_cont(200)):
+            gl.http_get('/projects/1')
+            result = gl.http_get('/projects/1', streamed=True)
+            # The streamed response holds its slot until it is closed
+            self.assertEqual({'api': 1}, bulkhead.in_flight())
+            self.assertRaises(GitlabBulkheadFullError, gl.http_get,
+                              '/projects/1')
+            result.close()
+            self.assertEqual({'api': 0}, bulkhead.in_flight())
+
+        with HTTMock(self._resp_cont(404)):
+            self.assertRaises(GitlabHttpError, gl.http_get, '/projects/1',
+                              streamed=True)
+        self.assertEqual({'api': 0}, bulkhead.in_flight())
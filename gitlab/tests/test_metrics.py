@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Gauvain Pocentek <gauvain@pocentek.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pickle
+import threading
+try:
+    import unittest
+except ImportError:
+    import unittest2 as unittest
+
+from httmock import HTTMock  # noqa
+from httmock import response  # noqa
+from httmock import urlmatch  # noqa
+import mock
+from six.moves import BaseHTTPServer
+
+from gitlab import Gitlab
+from gitlab import GitlabHttpError
+from gitlab import metrics
+
+
+class TestEndpointTemplate(unittest.TestCase):
+    def test_templates(self):
+        api_url = 'https://gitlab.example.com/api/v4'
+        cases = {
+            '/projects': '/projects',
+            '/projects/12/jobs?page=2': '/projects/:id/jobs',
+            '/projects/group%2Fproject/issues/3': '/projects/:id/issues/:id',
+            '/projects/1/repository/commits/' + 'a' * 40:
+                '/projects/:id/repository/commits/:id',
+            '/projects/1/repository/branches/main':
+                '/projects/:id/repository/branches/:name',
+            '/projects/1/repository/files/README%2Emd/raw':
+                '/projects/:id/repository/files/:id/raw',
+            '/groups/mygroup/projects': '/groups/:id/projects',
+            '/users/alice': '/users/:id',
+            '/projects/1/members/all': '/projects/:id/members/all',
+            '/projects/1/labels/bug': '/projects/:id/labels/:name',
+            '/templates/licenses/mit': '/templates/licenses/:name',
+        }
+        for path, template in cases.items():
+            self.assertEqual(metrics.endpoint_template(api_url + path,
+                                                       api_url), template)
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.metrics = metrics.Metrics(buckets=(0.1, 1))
+        self.metrics.record('get', '/projects/:id', 200, bytes_out=0,
+                            latency={'connect': 0.05, 'ttfb': 0.2,
+                                     'total': 0.3})
+        self.metrics.record('get', '/projects/:id', 503, retries=2,
+                            latency={'connect': None, 'ttfb': 2,
+                                     'total': 5})
+        self.metrics.record_bytes_in('get', '/projects/:id', 100)
+        self.metrics.record('post', '/projects', 201, bytes_out=10)
+
+    def test_snapshot(self):
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(sorted(snapshot),
+                         ['GET /projects/:id', 'POST /projects'])
+        stats = snapshot['GET /projects/:id']
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['statuses'], {200: 1, 503: 1})
+        self.assertEqual(stats['retries'], 2)
+        self.assertEqual(stats['bytes_in'], 100)
+        self.assertEqual(snapshot['POST /projects']['bytes_out'], 10)
+        self.assertEqual(stats['latency']['connect']['count'], 1)
+        self.assertEqual(stats['latency']['total'],
+                         {'count': 2, 'sum': 5.3,
+                          'buckets': [(0.1, 0), (1, 1), ('+Inf', 2)]})
+
+        self.metrics.reset()
+        self.assertEqual(self.metrics.snapshot(), {})
+
+    def test_openmetrics(self):
+        text = self.metrics.to_openmetrics()
+        lines = text.splitlines()
+        self.assertIn('# TYPE gitlab_requests counter', lines)
+        self.assertIn('gitlab_requests_total{method="GET",'
+                      'endpoint="/projects/:id",status="503"} 1', lines)
+        self.assertIn('gitlab_retries_total{method="GET",'
+                      'endpoint="/projects/:id"} 2', lines)
+        self.assertIn('gitlab_received_bytes_total{method="GET",'
+                      'endpoint="/projects/:id"} 100', lines)
+        self.assertIn('gitlab_request_duration_seconds_bucket{method="GET",'
+                      'endpoint="/projects/:id",le="1",phase="total"} 1',
+                      lines)
+        self.assertIn('gitlab_request_duration_seconds_count{method="GET",'
+                      'endpoint="/projects/:id",phase="ttfb"} 2', lines)
+        self.assertEqual(lines[-1], '# EOF')
+
+    def test_max_endpoints(self):
+        registry = metrics.Metrics(max_endpoints=2)
+        for endpoint in ('/a', '/b', '/c', '/d', '/a'):
+            registry.record('get', endpoint, 200)
+        snapshot = registry.snapshot()
+        self.assertEqual(sorted(snapshot),
+                         ['GET /a', 'GET /b',
+                          'GET %s' % metrics.OTHER_ENDPOINT])
+        self.assertEqual(snapshot['GET /a']['requests'], 2)
+        self.assertEqual(
+            snapshot['GET %s' % metrics.OTHER_ENDPOINT]['requests'], 2)
+
+    def test_pickability(self):
+        unpickled = pickle.loads(pickle.dumps(self.metrics))
+        self.assertEqual(unpickled.snapshot(), self.metrics.snapshot())
+
+
+class TestGitlabMetrics(unittest.TestCase):
+    def setUp(self):
+        self.gl = Gitlab("http://localhost", private_token="private_token",
+                         api_version=4)
+        self.statuses = [503, 200]
+
+        @urlmatch(scheme="http", netloc="localhost",
+                  path="/api/v4/projects/1", method="get")
+        def resp_cont(url, request):
+            headers = {'content-type': 'application/json'}
+            return response(self.statuses.pop(0), '{"id": 1}', headers, None,
+                            0, request)
+
+        self.resp_cont = resp_cont
+
+    @mock.patch('time.sleep')
+    def test_request_metrics(self, m_sleep):
+        with HTTMock(self.resp_cont):
+            self.gl.projects.get(1)
+        stats = self.gl.stats()['GET /projects/:id']
+        self.assertEqual(stats['requests'], 1)
+        self.assertEqual(stats['statuses'], {200: 1})
+        self.assertEqual(stats['retries'], 1)
+        self.assertEqual(stats['latency']['total']['count'], 1)
+
+    def test_errors(self):
+        self.statuses = [404]
+        with HTTMock(self.resp_cont):
+            self.assertRaises(GitlabHttpError, self.gl.http_request, 'get',
+                              '/projects/1')
+        with mock.patch.object(self.gl.session, 'send') as m_send:
+            m_send.side_effect = ValueError()
+            self.assertRaises(ValueError, self.gl.http_request, 'get',
+                              '/projects/1')
+        with mock.patch.object(self.gl.session, 'send') as m_send:
+            m_send.side_effect = KeyboardInterrupt()
+            self.assertRaises(KeyboardInterrupt, self.gl.http_request, 'get',
+                              '/projects/1')
+        stats = self.gl.stats()['GET /projects/:id']
+        self.assertEqual(stats['statuses'], {404: 1, 'ValueError': 1,
+                                             'KeyboardInterrupt': 1})
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'{"id": 1}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestConnectTime(unittest.TestCase):
+    def setUp(self):
+        self.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), _Handler)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def test_connect_time(self):
+        url = 'http://127.0.0.1:%d' % self.server.server_port
+        gl = Gitlab(url, private_token="private_token", api_version=4)
+        gl.http_get('/projects/1')
+        gl.http_get('/projects/1')
+        gl.session.close()
+        stats = gl.stats()['GET /projects/:id']
+        self.assertEqual(stats['requests'], 2)
+        # The connection is reused by the second request
+        self.assertEqual(stats['latency']['connect']['count'], 1)
+        self.assertEqual(stats['latency']['ttfb']['count'], 2)
+        self.assertTrue(stats['bytes_in'] > 0)
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Gauvain Pocentek <gauvain@pocentek.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+try:
+    import unittest
+except ImportError:
+    import unittest2 as unittest
+
+from httmock import HTTMock  # noqa
+from httmock import response  # noqa
+from httmock import urlmatch  # noqa
+import mock
+import requests
+
+from gitlab import Gitlab
+from gitlab import middleware
+
+
+class Recorder(middleware.Middleware):
+    def __init__(self, name, calls):
+        self.name = name
+        self.calls = calls
+
+    def before_send(self, request):
+        self.calls.append(('before', self.name))
+        request.headers['X-Trace'] = request.headers.get('X-Trace', '') + \
+            self.name
+
+    def after_response(self, request, response):
+        self.calls.append(('after', self.name))
+        return response
+
+    def on_error(self, request, error):
+        self.calls.append(('error', self.name))
+
+
+class ShortCircuit(middleware.Middleware):
+    def before_send(self, request):
+        result = requests.Response()
+        result.status_code = 200
+        result.headers['Content-Type'] = 'application/json'
+        result._content = b'{"id": 1, "name": "cached"}'
+        return result
+
+
+class Recover(ShortCircuit):
+    def before_send(self, request):
+        return None
+
+    def on_error(self, request, error):
+        return ShortCircuit().before_send(request)
+
+
+@urlmatch(scheme="http", netloc="localhost", path="/api/v4/projects/1",
+          method="get")
+def resp_get_project(url, request):
+    headers = {'content-type': 'application/json',
+               'X-Trace-Seen': request.headers.get('X-Trace', '')}
+    content = '{"id": 1, "name": "project1"}'
+    return response(200, content, headers, None, 5, request)
+
+
+class TestMiddleware(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.gl = Gitlab("http://localhost", private_token="private_token",
+                         api_version=4)
+
+    def test_order(self):
+        self.gl.middlewares = [Recorder('a', self.calls),
+                               Recorder('b', self.calls)]
+        with HTTMock(resp_get_project):
+            result = self.gl.http_request('get', '/projects/1')
+        self.assertEqual(result.headers['X-Trace-Seen'], 'ab')
+        self.assertEqual(self.calls, [('before', 'a'), ('before', 'b'),
+                                      ('after', 'b'), ('after', 'a')])
+
+    def test_short_circuit(self):
+        self.gl.middlewares = [Recorder('a', self.calls), ShortCircuit(),
+                               Recorder('b', self.calls)]
+        with mock.patch.object(self.gl.session, 'send') as m_send:
+            project = self.gl.projects.get(1)
+        self.assertFalse(m_send.called)
+        self.assertEqual(project.name, 'cached')
+        self.assertEqual(self.calls, [('before', 'a'), ('after', 'a')])
+
+    def test_on_error(self):
+        self.gl.middlewares = [Recorder('a', self.calls), Recover(),
+                               Recorder('b', self.calls)]
+        with mock.patch.object(self.gl.session, 'send') as m_send:
+            m_send.side_effect = ValueError()
+            project = self.gl.projects.get(1)
+        self.assertEqual(project.name, 'cached')
+        self.assertEqual(self.calls, [('before', 'a'), ('before', 'b'),
+                                      ('error', 'b'), ('after', 'a')])
+
+    def test_error_not_recovered(self):
+        self.gl.middlewares = [Recorder('a', self.calls)]
+        with mock.patch.object(self.gl.session, 'send') as m_send:
+            m_send.side_effect = ValueError()
+            self.assertRaises(ValueError, self.gl.http_request, 'get',
+                              '/projects/1')
+        self.assertEqual(self.calls, [('before', 'a'), ('error', 'a')])
@@ -18,6 +18,7 @@
 
 from __future__ import print_function
 
+import json
 try:
     import unittest
 except ImportError:
@@ -26,6 +27,7 @@ except ImportError:
 from httmock import HTTMock  # noqa
 from httmock import response  # noqa
 from httmock import urlmatch  # noqa
+from six.moves.urllib.parse import parse_qsl
 
 from gitlab import *  # noqa
 from gitlab.base import *  # noqa
@@ -160,6 +162,54 @@ class TestMixinMethods(unittest.TestCase):
             self.assertEqual(obj.foo, 'bar')
             self.assertEqual(obj.id, 42)
 
+    def test_get_many(self):
+        class M(GetMixin, FakeManager):
+            pass
+
+        @urlmatch(scheme="http", netloc="localhost", path=r'/api/v4/tests/\d+',
+                  method="get")
+        def resp_cont(url, request):
+            id = int(url.path.split('/')[-1])
+            if id == 2:
+                return response(404, '{"message": "404 Not found"}',
+                                {'Content-Type': 'application/json'},
+                                None, 5, request)
+            headers = {'Content-Type': 'application/json'}
+            content = '{"id": %d}' % id
+            return response(200, content, headers, None, 5, request)
+
+        with HTTMock(resp_cont):
+            mgr = M(self.gl)
+            objs = mgr.get_many(range(1, 6), concurrency=3)
+
+        self.assertEqual([1, None, 3, 4, 5],
+                         [getattr(obj, 'id', None) for obj in objs])
+        self.assertIsInstance(objs[1], GitlabGetError)
+        self.assertEqual(objs[1].response_code, 404)
+
+    def test_get_many_filter(self):
+        class M(GetMixin, ListMixin, FakeManager):
+            _get_many_filter = 'iids'
+            _get_many_batch_size = 2
+
+        @urlmatch(scheme="http", netloc="localhost", path='/api/v4/tests',
+                  method="get")
+        def resp_cont(url, request):
+            self.assertIn('per_page=2', url.query)
+            ids = [int(v) for k, v in parse_qsl(url.query)
+                   if k == 'iids[]']
+            headers = {'Content-Type': 'application/json'}
+            content = json.dumps([{'id': id} for id in ids if id != 3])
+            return response(200, content, headers, None, 5, request)
+
+        with HTTMock(resp_cont):
+            mgr = M(self.gl)
+            objs = mgr.get_many([4, 3, 1, '2', 5])
+
+        self.assertEqual([4, None, 1, 2, 5],
+                         [getattr(obj, 'id', None) for obj in objs])
+        self.assertIsInstance(objs[1], GitlabGetError)
+
     def test_refresh_mixin(self):
         class O(RefreshMixin, FakeObject):
             pass
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Gauvain Pocentek <gauvain@pocentek.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pickle
+import time
+try:
+    import unittest
+except ImportError:
+    import unittest2 as unittest
+
+from httmock import HTTMock  # noqa
+from httmock import response  # noqa
+from httmock import urlmatch  # noqa
+import mock
+
+from gitlab import Gitlab
+from gitlab import GitlabTimeoutError
+from gitlab import ratelimit
+
+
+@mock.patch('time.time')
+class TestRateLimiter(unittest.TestCase):
+    def test_unlimited(self, m_time):
+        m_time.return_value = 100
+        limiter = ratelimit.RateLimiter()
+        for i in range(100):
+            self.assertEqual(limiter.reserve(), 0)
+
+    def test_rate(self, m_time):
+        m_time.return_value = 100
+        limiter = ratelimit.RateLimiter(rate=2, burst=2)
+        self.assertEqual(limiter.reserve(), 0)
+        self.assertEqual(limiter.reserve(), 0)
+        self.assertEqual(limiter.reserve(), 0.5)
+        self.assertEqual(limiter.reserve(), 1)
+        m_time.return_value = 110
+        self.assertEqual(limiter.reserve(), 0)
+
+    def test_server_headers(self, m_time):
+        m_time.return_value = 100
+        limiter = ratelimit.RateLimiter(burst=1)
+        limiter.update({'RateLimit-Remaining': '10',
+                        'RateLimit-Reset': '120'})
+        self.assertEqual(limiter.reserve(), 0)
+        self.assertEqual(limiter.reserve(), 2)
+
+        m_time.return_value = 102
+        limiter.update({'RateLimit-Remaining': '0',
+                        'RateLimit-Reset': '105'})
+        self.assertAlmostEqual(limiter.reserve(), 3)
+
+        # The server limit is dropped after the reset
+        m_time.return_value = 121
+        self.assertEqual(limiter.reserve(), 0)
+        self.assertEqual(limiter.reserve(), 0)
+
+    def test_invalid_headers(self, m_time):
+        m_time.return_value = 100
+        limiter = ratelimit.RateLimiter()
+        limiter.update({})
+        limiter.update({'RateLimit-Remaining': 'foo',
+                        'RateLimit-Reset': '120'})
+        self.assertEqual(limiter.reserve(), 0)
+
+    def test_pickability(self, m_time):
+        m_time.return_value = 100
+        limiter = ratelimit.RateLimiter(rate=1)
+        unpickled = pickle.loads(pickle.dumps(limiter))
+        self.assertEqual(unpickled.rate, 1)
+        self.assertEqual(unpickled.reserve(), 0)
+
+
+class TestGitlabRateLimiter(unittest.TestCase):
+    @mock.patch('time.sleep')
+    def test_pacing(self, m_sleep):
+        limiter = ratelimit.RateLimiter(burst=1)
+        gl = Gitlab("http://localhost", private_token="private_token",
+                    api_version=4, rate_limiter=limiter)
+
+        @urlmatch(scheme="http", netloc="localhost",
+                  path="/api/v4/projects/1", method="get")
+        def resp_cont(url, request):
+            headers = {'content-type': 'application/json',
+                       'RateLimit-Remaining': '0',
+                       'RateLimit-Reset': '9999999999'}
+            return response(200, '{"id": 1}', headers, None, 5, request)
+
+        with HTTMock(resp_cont):
+            gl.projects.get(1)
+            self.assertFalse(m_sleep.called)
+            gl.projects.get(1)
+            self.assertTrue(m_sleep.called)
+
+    @mock.patch('time.sleep')
+    def test_deadline(self, m_sleep):
+        limiter = ratelimit.RateLimiter(burst=1)
+        gl = Gitlab("http://localhost", private_token="private_token",
+                    api_version=4, rate_limiter=limiter)
+        limiter.update({'RateLimit-Remaining': '0',
+                        'RateLimit-Reset': str(time.time() + 3)})
+        self.assertRaises(GitlabTimeoutError, gl.http_get, '/projects/1',
+                          deadline=0.5)
+        self.assertFalse(m_sleep.called)
+        # The rejected request didn't take a slot
+        self.assertAlmostEqual(limiter._tokens, 0, places=2)
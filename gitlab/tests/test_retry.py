@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Gauvain Pocentek <gauvain@pocentek.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import socket
+try:
+    import unittest
+except ImportError:
+    import unittest2 as unittest
+
+from httmock import HTTMock  # noqa
+from httmock import response  # noqa
+from httmock import urlmatch  # noqa
+import mock
+import requests
+try:
+    import urllib3
+except ImportError:
+    from requests.packages import urllib3
+
+from gitlab import Gitlab
+from gitlab import GitlabHttpError
+from gitlab import retry
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_retry_status(self):
+        policy = retry.RetryPolicy(max_retries=2)
+        self.assertTrue(policy.retry_status('get', 503, 0))
+        self.assertTrue(policy.retry_status('put', 429, 1))
+        self.assertFalse(policy.retry_status('get', 503, 2))
+        self.assertFalse(policy.retry_status('get', 404, 0))
+        self.assertTrue(policy.retry_status('post', 429, 0))
+        self.assertFalse(policy.retry_status('post', 503, 0))
+        # Server errors are deterministic unless configured otherwise
+        self.assertFalse(policy.retry_status('get', 500, 0))
+        policy = retry.RetryPolicy(statuses=(500,))
+        self.assertTrue(policy.retry_status('get', 500, 0))
+
+    def test_unlimited_retries(self):
+        policy = retry.RetryPolicy(max_retries=-1)
+        self.assertTrue(policy.retry_status('get', 503, 1000))
+
+    def test_retry_error(self):
+        policy = retry.RetryPolicy()
+        self.assertTrue(policy.retry_error('get', 0))
+        self.assertFalse(policy.retry_error('post', 0))
+        self.assertTrue(policy.retry_error('post', 0, sent=False))
+        policy = retry.RetryPolicy(connection_errors=False)
+        self.assertFalse(policy.retry_error('get', 0))
+
+    def test_wait_time(self):
+        policy = retry.RetryPolicy(backoff_factor=1, max_backoff=5,
+                                   jitter=False)
+        self.assertEqual([1, 2, 4, 5],
+                         [policy.wait_time(i) for i in range(4)])
+        self.assertEqual(3, policy.wait_time(0, {'Retry-After': '3'}))
+
+        policy = retry.RetryPolicy(backoff_factor=1)
+        for i in range(20):
+            self.assertTrue(2 <= policy.wait_time(2) <= 4)
+
+    def test_get_policy(self):
+        default = retry.RetryPolicy()
+        kwargs = {'max_retries': 3, 'obey_rate_limit': False, 'sudo': 1}
+        policy = retry.get_policy(default, kwargs)
+        self.assertEqual({'sudo': 1}, kwargs)
+        self.assertEqual(3, policy.max_retries)
+        self.assertNotIn(429, policy.statuses)
+        self.assertEqual(10, default.max_retries)
+        self.assertIn(429, default.statuses)
+
+        custom = retry.RetryPolicy(max_retries=0)
+        self.assertIs(custom, retry.get_policy(default,
+                                               {'retry_policy': custom}))
+
+
+@mock.patch('time.sleep')
+class TestGitlabRetries(unittest.TestCase):
+    def setUp(self):
+        self.gl = Gitlab("http://localhost", private_token="private_token",
+                         api_version=4)
+        self.calls = 0
+
+    def _resp_cont(self, statuses):
+        @urlmatch(scheme="http", netloc="localhost",
+                  path="/api/v4/projects")
+        def resp_cont(url, request):
+            status = statuses[min(self.calls, len(statuses) - 1)]
+            self.calls += 1
+            headers = {'content-type': 'application/json'}
+            return response(status, '[]', headers, None, 5, request)
+        return resp_cont
+
+    def test_transient_errors(self, m_sleep):
+        with HTTMock(self._resp_cont([502, 503, 200])):
+            result = self.gl.http_request('get', '/projects')
+        self.assertEqual(200, result.status_code)
+        self.assertEqual(3, self.calls)
+        self.assertEqual(2, m_sleep.call_count)
+
+    def test_post_not_retried(self, m_sleep):
+        with HTTMock(self._resp_cont([503, 200])):
+            self.assertRaises(GitlabHttpError, self.gl.http_request,
+                              'post', '/projects')
+        self.assertEqual(1, self.calls)
+
+    def test_max_retries(self, m_sleep):
+        with HTTMock(self._resp_cont([429])):
+            self.assertRaises(GitlabHttpError, self.gl.http_request,
+                              'post', '/projects', max_retries=2)
+        self.assertEqual(3, self.calls)
+
+    def test_obey_rate_limit(self, m_sleep):
+        with HTTMock(self._resp_cont([429, 200])):
+            self.assertRaises(GitlabHttpError, self.gl.http_request,
+                              'get', '/projects', obey_rate_limit=False)
+        self.assertEqual(1, self.calls)
+
+    def test_connection_errors(self, m_sleep):
+        ok = requests.Response()
+        ok.status_code = 200
+        with mock.patch.object(self.gl.session, 'send') as m_send:
+            m_send.side_effect = [requests.exceptions.ConnectionError(), ok]
+            self.assertIs(ok, self.gl.http_request('get', '/projects'))
+
+            m_send.side_effect = [requests.exceptions.ReadTimeout(), ok]
+            self.assertRaises(requests.exceptions.ReadTimeout,
+                              self.gl.http_request, 'post', '/projects')
+
+            m_send.side_effect = [requests.exceptions.ConnectTimeout(), ok]
+            self.assertIs(ok, self.gl.http_request('post', '/projects'))
+
+            refused = requests.exceptions.ConnectionError(
+                urllib3.exceptions.MaxRetryError(
+                    None, '/projects',
+                    urllib3.exceptions.NewConnectionError(
+                        None, 'Connection refused')))
+            m_send.side_effect = [refused, ok]
+            self.assertIs(ok, self.gl.http_request('post', '/projects'))
+
+            for error in (requests.exceptions.SSLError,
+                          requests.exceptions.ProxyError):
+                m_send.side_effect = [error(), ok]
+                self.assertRaises(error, self.gl.http_request, 'get',
+                                  '/projects')
+
+    def test_post_connection_refused(self, m_sleep):
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        gl = Gitlab('http://127.0.0.1:%d' % port,
+                    private_token='private_token', api_version=4)
+        with mock.patch.object(gl.session, 'send',
+                               wraps=gl.session.send) as m_send:
+            self.assertRaises(requests.exceptions.ConnectionError,
+                              gl.http_request, 'post', '/projects',
+                              max_retries=2)
+        self.assertEqual(3, m_send.call_count)
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Gauvain Pocentek <gauvain@pocentek.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+import time
+try:
+    import unittest
+except ImportError:
+    import unittest2 as unittest
+
+from httmock import HTTMock  # noqa
+from httmock import response  # noqa
+from httmock import urlmatch  # noqa
+
+from gitlab import deadline
+from gitlab import Gitlab
+from gitlab import GitlabGetError
+from gitlab import GitlabTimeoutError
+from gitlab import singleflight
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.001)
+
+
+def _run_threads(count, target):
+    results = [None] * count
+
+    def run(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i, ))
+               for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.flight = singleflight.SingleFlight()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def _func(self, value):
+        def func():
+            self.calls += 1
+            self.release.wait(5)
+            if isinstance(value, Exception):
+                raise value
+            return value
+        return func
+
+    def _run(self, value, count=5):
+        threads, results = _run_threads(
+            count, lambda: self.flight.do('key', self._func(value)))
+        _wait_for(lambda: 'key' in self.flight._calls and
+                  self.flight._calls['key'].waiters == count - 1)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_coalescing(self):
+        results = self._run({'id': 1, 'tags': ['a']})
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(r == {'id': 1, 'tags': ['a']} for r in results))
+        # Each caller gets its own copy
+        results[0]['tags'].append('b')
+        self.assertEqual(results[1]['tags'], ['a'])
+        self.assertEqual(len(set(id(r) for r in results)), 5)
+        self.assertEqual(self.flight._calls, {})
+
+    def test_error(self):
+        error = ValueError('error')
+        results = self._run(error)
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(r is error for r in results))
+
+    def test_waiter_deadline(self):
+        threads, results = _run_threads(
+            1, lambda: self.flight.do('key', self._func(1)))
+        _wait_for(lambda: 'key' in self.flight._calls)
+        start = time.time()
+        self.assertRaises(GitlabTimeoutError, self.flight.do, 'key',
+                          self._func(2), deadline.Deadline(0.05))
+        self.assertLess(time.time() - start, 1)
+        self.release.set()
+        threads[0].join()
+        self.assertEqual(results, [1])
+        self.assertEqual(self.calls, 1)
+
+    def test_leader_deadline(self):
+        values = [GitlabTimeoutError('timeout'), 1, 1]
+
+        def func():
+            self.calls += 1
+            if self.calls == 1:
+                self.release.wait(5)
+            value = values[self.calls - 1]
+            if isinstance(value, Exception):
+                raise value
+            return value
+
+        threads, results = _run_threads(3, lambda: self.flight.do('key',
+                                                                  func))
+        _wait_for(lambda: 'key' in self.flight._calls and
+                  self.flight._calls['key'].waiters == 2)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        # The waiters don't get the timeout of the leader
+        self.assertEqual(sorted(results, key=str), [1, 1, values[0]])
+
+    def test_leader_interrupted(self):
+        class Interrupt(BaseException):
+            pass
+
+        def interrupted():
+            self.calls += 1
+            self.release.wait(5)
+            raise Interrupt()
+
+        def leader():
+            try:
+                self.flight.do('key', interrupted)
+            except Interrupt:
+                pass
+
+        thread = threading.Thread(target=leader)
+        thread.start()
+        _wait_for(lambda: 'key' in self.flight._calls)
+        threads, results = _run_threads(
+            1, lambda: self.flight.do('key', self._func(1)))
+        _wait_for(lambda: self.flight._calls['key'].waiters == 1)
+        self.release.set()
+        for t in [thread] + threads:
+            t.join()
+        # The waiter ran the call again instead of getting None
+        self.assertEqual(results, [1])
+        self.assertEqual(self.calls, 2)
+
+    def test_sequential_calls(self):
+        self.release.set()
+        value = {'id': 1}
+        self.assertIs(self.flight.do('key', self._func(value)), value)
+        self.assertIs(self.flight.do('key', self._func(value)), value)
+        self.assertEqual(self.calls, 2)
+
+
+class TestGitlabSingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.gl = Gitlab("http://localhost", private_token="private_token",
+                         api_version=4, single_flight=True)
+        self.requests = 0
+
+    def _waiters(self):
+        return sum(c.waiters for c in self.gl._single_flight._calls.values())
+
+    def test_concurrent_get(self):
+        @urlmatch(scheme="http", netloc="localhost",
+                  path="/api/v4/projects/1", method="get")
+        def resp_cont(url, request):
+            self.requests += 1
+            _wait_for(lambda: self._waiters() == 3)
+            headers = {'content-type': 'application/json'}
+            content = '{"id": 1, "name": "project1"}'
+            return response(200, content, headers, None, 5, request)
+
+        with HTTMock(resp_cont):
+            threads, results = _run_threads(
+                4, lambda: self.gl.projects.get(1))
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(self.requests, 1)
+        self.assertEqual([p.name for p in results], ['project1'] * 4)
+        results[0].name = 'changed'
+        self.assertEqual(results[1].name, 'project1')
+
+    def test_different_requests(self):
+        @urlmatch(scheme="http", netloc="localhost",
+                  path="/api/v4/projects/1", method="get")
+        def resp_cont(url, request):
+            self.requests += 1
+            headers = {'content-type': 'application/json'}
+            return response(404, '{"message": "Not Found"}', headers, None, 5,
+                            request)
+
+        with HTTMock(resp_cont):
+            self.assertRaises(GitlabGetError, self.gl.projects.get, 1)
+            self.assertRaises(GitlabGetError, self.gl.projects.get, 1,
+                              sudo='user')
+
+        self.assertEqual(self.requests, 2)
+        self.assertNotEqual(
+            self.gl._single_flight_key('/projects/1', {}, {}),
+            self.gl._single_flight_key('/projects/1', {}, {'sudo': 'user'}))
+        self.assertEqual(
+            self.gl._single_flight_key('/projects/1', {}, {}),
+            self.gl._single_flight_key('/projects/1', {},
+                                       {'max_retries': 1}))
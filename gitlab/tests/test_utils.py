@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Gauvain Pocentek <gauvain@pocentek.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import base64
+import io
+import json
+import os
+import shutil
+import tempfile
+try:
+    import unittest
+except ImportError:
+    import unittest2 as unittest
+
+import mock
+
+from gitlab import utils
+
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestParallelMap(unittest.TestCase):
+    def test_order(self):
+        result = list(utils.parallel_map(lambda x: x * 2, range(20), 4))
+        self.assertEqual(result, [x * 2 for x in range(20)])
+
+
+class TestOnStreamEnd(unittest.TestCase):
+    def test_callback(self):
+        response = mock.Mock()
+        response.raw.stream.return_value = iter([b'ab', b'cde'])
+        sizes = []
+        self.assertTrue(utils.on_stream_end(response, sizes.append))
+        self.assertEqual(list(response.raw.stream(10)), [b'ab', b'cde'])
+        self.assertEqual(sizes, [5])
+
+    def test_no_stream(self):
+        response = mock.Mock()
+        response.raw = None
+        self.assertFalse(utils.on_stream_end(response, None))
+
+
+class TestIterJsonArray(unittest.TestCase):
+    def test_chunks(self):
+        items = [{'id': 1, 'name': u'caf\xe9 ]}'},
+                 {'id': 2, 'nested': [1, {'a': [2, 3]}]},
+                 12345, 'string', None]
+        data = json.dumps(items).encode('utf-8')
+        for size in (1, 2, 3, 7, len(data)):
+            result = list(utils.iter_json_array(_chunks(data, size)))
+            self.assertEqual(result, items)
+
+    def test_escapes(self):
+        items = [u'a"b\\', {'diff': u'\\"}]{["\\'}, True, -1.5e3]
+        data = json.dumps(items).encode('utf-8')
+        for size in (1, 2, 3, 7, len(data)):
+            result = list(utils.iter_json_array(_chunks(data, size)))
+            self.assertEqual(result, items)
+
+    def test_decoded_once(self):
+        # Large items are decoded once, not after each chunk
+        item = {'diff': 'x' * 100000, 'lines': list(range(1000))}
+        data = json.dumps([item, item]).encode('utf-8')
+        decode = json.JSONDecoder.decode
+        with mock.patch.object(json.JSONDecoder, 'decode', autospec=True,
+                               side_effect=decode) as m_decode:
+            result = list(utils.iter_json_array(_chunks(data, 100)))
+        self.assertEqual(result, [item, item])
+        self.assertEqual(m_decode.call_count, 2)
+
+    def test_empty(self):
+        self.assertEqual(list(utils.iter_json_array([b' [ ] '])), [])
+
+    def test_lazy(self):
+        chunks = iter([b'[{"id": 1}, ', b'{"id": 2}]'])
+        gen = utils.iter_json_array(chunks)
+        self.assertEqual(next(gen), {'id': 1})
+        # Only the first chunk has been consumed
+        self.assertEqual(next(chunks), b'{"id": 2}]')
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, list,
+                          utils.iter_json_array([b'{"id": 1}']))
+        self.assertRaises(ValueError, list,
+                          utils.iter_json_array([b'[{"id": 1}, {"id"']))
+
+
+class TestBase64(unittest.TestCase):
+    def setUp(self):
+        self.data = bytes(bytearray(range(256))) * 10
+        self.encoded = base64.b64encode(self.data).decode('ascii')
+
+    def test_iter_b64decode(self):
+        for size in (1, 2, 3, 100, 5000):
+            chunks = list(utils.iter_b64decode(self.encoded, size))
+            self.assertEqual(b''.join(chunks), self.data)
+            self.assertTrue(all(len(c) <= max(size, 3) for c in chunks))
+        self.assertEqual(list(utils.iter_b64decode('', 10)), [])
+
+    def test_reader(self):
+        f = io.BufferedReader(utils.Base64Reader(self.encoded, chunk_size=7))
+        self.assertEqual(f.read(10), self.data[:10])
+        self.assertEqual(f.read(1000), self.data[10:1010])
+        self.assertEqual(f.read(), self.data[1010:])
+        self.assertEqual(f.read(), b'')
+
+
+class TestMultipartEncoder(unittest.TestCase):
+    def test_encoding(self):
+        f = io.BytesIO(b'skipped' + b'x' * 5000)
+        f.read(7)
+        progress = []
+        encoder = utils.MultipartEncoder(
+            {'path': u'caf\xe9', 'overwrite': False},
+            {'file': ('file.tar.gz', f)}, chunk_size=1000,
+            callback=lambda sent, total: progress.append((sent, total)))
+
+        body = b''.join(encoder)
+        self.assertEqual(len(encoder), len(body))
+        self.assertEqual(progress[-1], (len(body), len(body)))
+        boundary = encoder.boundary.encode('ascii')
+        self.assertEqual(
+            encoder.content_type,
+            'multipart/form-data; boundary=%s' % encoder.boundary)
+        self.assertIn(b'name="path"\r\n\r\ncaf\xc3\xa9\r\n', body)
+        self.assertIn(b'name="overwrite"\r\n\r\nFalse\r\n', body)
+        self.assertIn(b'name="file"; filename="file.tar.gz"\r\n'
+                      b'Content-Type: application/octet-stream\r\n\r\n' +
+                      b'x' * 5000 + b'\r\n--' + boundary + b'--\r\n', body)
+
+        # The body can be sent again
+        self.assertEqual(body, b''.join(encoder))
+
+    def test_bytes(self):
+        encoder = utils.MultipartEncoder(files={'file': ('a.txt', u'data')})
+        body = b''.join(encoder)
+        self.assertEqual(len(encoder), len(body))
+        self.assertIn(b'\r\n\r\ndata\r\n', body)
+
+    def test_header_escaping(self):
+        encoder = utils.MultipartEncoder(
+            files={'file': (u'a"b\\c\r\nX-Evil: 1.txt', b'data')})
+        body = b''.join(encoder)
+        self.assertIn(b'; filename="a%22b\\\\c%0D%0AX-Evil: 1.txt"\r\n',
+                      body)
+        self.assertNotIn(b'\r\nX-Evil', body)
+
+
+class TestJSONStreamEncoder(unittest.TestCase):
+    def test_encoding(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'data.bin')
+        data = bytes(bytearray(range(256))) * 20
+        with open(path, 'wb') as f:
+            f.write(data)
+
+        encoder = utils.JSONStreamEncoder(
+            {'name': u'caf\xe9', 'files': [{'content': utils.Base64File(path),
+                                            'size': len(data)}]},
+            chunk_size=100)
+        chunks = list(encoder)
+        body = b''.join(chunks)
+        self.assertEqual(len(encoder), len(body))
+        self.assertTrue(max(len(c) for c in chunks) <= 100)
+        decoded = json.loads(body.decode('ascii'))
+        self.assertEqual(decoded['name'], u'caf\xe9')
+        self.assertEqual(base64.b64decode(decoded['files'][0]['content']),
+                         data)
+
+        # The body can be sent again
+        self.assertEqual(body, b''.join(encoder))
@@ -15,14 +15,92 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import base64
+import codecs
+import io
+import json
+from multiprocessing.pool import ThreadPool
+import os
+import re
+import threading
+import uuid
+
 import six
 
+import gitlab.deadline
+
+
+_sha_re = re.compile('^([0-9a-f]{40}|[0-9a-f]{64})$')
+
+# Escaping of the Content-Disposition parameters, as done by urllib3 (HTML5
+# form submission): quotes and control characters are percent-encoded
+_header_param_escapes = dict((six.unichr(c), u'%%%02X' % c)
+                             for c in range(0x20) if c != 0x1B)
+_header_param_escapes.update({u'"': u'%22', u'\\': u'\\\\'})
+_header_param_re = re.compile(u'|'.join(re.escape(c)
+                                        for c in _header_param_escapes))
+
 
 class _StdoutStream(object):
     def __call__(self, chunk):
         print(chunk)
 
 
+class PicklableLocks(object):
+    """Mixin for the objects shared by several threads that can be pickled.
+
+    The locks are created by ``_create_locks()``. They cannot be pickled: the
+    attributes listed in ``_unpickled_attrs`` are left out of the pickled
+    state, and ``_create_locks()`` is called again when unpickling.
+    """
+
+    _unpickled_attrs = ('_lock', )
+
+    def _create_locks(self):
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in self._unpickled_attrs:
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._create_locks()
+
+
+def on_stream_end(response, callback):
+    """Call ``callback`` once the streamed content of a response is read.
+
+    requests reads the streamed content through ``response.raw.stream()``,
+    which is wrapped. ``callback`` is called with the number of bytes read,
+    when the stream is exhausted or closed.
+
+    Args:
+        response (requests.Response): The streamed response
+        callback (callable): The function to call
+
+    Returns:
+        bool: False if the response has no stream to wrap
+    """
+    stream = getattr(response.raw, 'stream', None)
+    if stream is None:
+        return False
+
+    def wrapped_stream(*args, **kwargs):
+        size = 0
+        try:
+            for chunk in stream(*args, **kwargs):
+                size += len(chunk)
+                yield chunk
+        finally:
+            callback(size)
+
+    response.raw.stream = wrapped_stream
+    return True
+
+
 def response_content(response, streamed, action, chunk_size):
     if streamed is False:
         return response.content
@@ -35,6 +113,23 @@ def response_content(response, streamed, action, chunk_size):
             action(chunk)
 
 
+def cached_content(content, streamed, action, chunk_size):
+    """Same as :func:`response_content`, for content already downloaded."""
+    if streamed is False:
+        return content
+
+    if action is None:
+        action = _StdoutStream()
+
+    for i in range(0, len(content), chunk_size):
+        action(content[i:i + chunk_size])
+
+
+def is_full_sha(value):
+    """Whether ``value`` is a complete (not abbreviated) git object ID."""
+    return isinstance(value, six.string_types) and bool(_sha_re.match(value))
+
+
 def copy_dict(dest, src):
     for k, v in src.items():
         if isinstance(v, dict):
@@ -51,3 +146,382 @@ def sanitized_url(url):
     parsed = six.moves.urllib.parse.urlparse(url)
     new_path = parsed.path.replace('.', '%2E')
     return parsed._replace(path=new_path).geturl()
+
+
+def parallel_map(func, iterable, concurrency):
+    """Apply ``func`` to every item of ``iterable`` using a pool of threads.
+
+    Results are yielded in the order of ``iterable``, as soon as they are
+    available. At most ``concurrency`` calls run at the same time. The
+    :func:`~gitlab.deadline.budget` of the calling thread applies to the
+    calls.
+    """
+    func = gitlab.deadline.propagate(func)
+    pool = ThreadPool(concurrency)
+    try:
+        for result in pool.imap(func, iterable):
+            yield result
+    finally:
+        pool.terminate()
+
+
+# Tokens scanned by iter_json_array: the next significant character between
+# the items, the end of a number or literal, a structural character, and the
+# end of a string or an escape sequence
+_json_item_re = re.compile(r'[^\s,]')
+_json_scalar_end_re = re.compile(r'[\s,\]]')
+_json_struct_re = re.compile(r'["{}\[\]]')
+_json_string_re = re.compile(r'["\\]')
+
+
+def iter_json_array(chunks):
+    """Decode the items of a JSON array incrementally.
+
+    The nesting of the data is tracked across the chunks, so that each item
+    is decoded once, when it is complete.
+
+    Args:
+        chunks: An iterable of bytes, for instance the result of
+            ``response.iter_content()``
+
+    Yields:
+        The decoded items of the array, as soon as they are complete.
+
+    Raises:
+        ValueError: If the data is not a valid JSON array
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    started = False
+    pieces = None  # The text of the current item, None between items
+    scalar = False
+    depth = 0
+    in_string = False
+    escape = False
+
+    for chunk in chunks:
+        text = text_decoder.decode(chunk)
+        n = len(text)
+        i = 0
+        item_start = 0
+        while i < n:
+            if not started:
+                m = _json_item_re.search(text, i)
+                if m is None:
+                    break
+                if m.group() != '[':
+                    raise ValueError("Not a JSON array")
+                started = True
+                i = m.end()
+                continue
+
+            if pieces is None:
+                m = _json_item_re.search(text, i)
+                if m is None:
+                    break
+                if m.group() == ']':
+                    return
+                pieces = []
+                i = item_start = m.start()
+                scalar = m.group() not in '{["'
+
+            item_end = None
+            if escape:
+                escape = False
+                i += 1
+            elif in_string:
+                m = _json_string_re.search(text, i)
+                if m is None:
+                    i = n
+                    continue
+                i = m.end()
+                if m.group() == '\\':
+                    escape = True
+                else:
+                    in_string = False
+                    if depth == 0:
+                        item_end = i
+            elif scalar:
+                m = _json_scalar_end_re.search(text, i)
+                if m is None:
+                    i = n
+                    continue
+                i = item_end = m.start()
+            else:
+                m = _json_struct_re.search(text, i)
+                if m is None:
+                    i = n
+                    continue
+                i = m.end()
+                c = m.group()
+                if c == '"':
+                    in_string = True
+                elif c in '{[':
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        item_end = i
+
+            if item_end is not None:
+                pieces.append(text[item_start:item_end])
+                yield decoder.decode(''.join(pieces))
+                pieces = None
+
+        if pieces is not None:
+            pieces.append(text[item_start:])
+
+    raise ValueError("Unterminated JSON array")
+
+
+def iter_b64decode(data, chunk_size):
+    """Decode base64 data by chunks.
+
+    Args:
+        data (str): The encoded data, without line breaks (as sent by the
+            GitLab API)
+        chunk_size (int): Approximate size of the decoded chunks
+
+    Yields:
+        bytes: The decoded chunks
+    """
+    # 4 encoded characters hold 3 bytes, chunks must not split a group
+    step = max(chunk_size // 3, 1) * 4
+    for i in range(0, len(data), step):
+        yield base64.b64decode(data[i:i + step])
+
+
+class Base64Reader(io.RawIOBase):
+    """Read-only file object decoding base64 data incrementally.
+
+    Args:
+        data (str): The encoded data, without line breaks
+        chunk_size (int): Approximate size of the chunks decoded at once
+    """
+
+    def __init__(self, data, chunk_size=64 * 1024):
+        io.RawIOBase.__init__(self)
+        self._chunks = iter_b64decode(data, chunk_size)
+        self._chunk = b''
+        self._offset = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if self._offset == len(self._chunk):
+            self._chunk = next(self._chunks, b'')
+            self._offset = 0
+        size = min(len(b), len(self._chunk) - self._offset)
+        b[:size] = self._chunk[self._offset:self._offset + size]
+        self._offset += size
+        return size
+
+
+class MultipartEncoder(object):
+    """Streaming ``multipart/form-data`` request body.
+
+    The files are read by chunks while the request is sent, so the memory
+    used doesn't depend on the size of the files. The object can be iterated
+    several times (the files are rewound), which allows the request to be
+    retried.
+
+    Args:
+        fields (dict): The form fields
+        files (dict): The files to send, as ``(filename, data)`` tuples.
+            ``data`` can be bytes, text (UTF-8 encoded) or a file object
+            opened in binary mode.
+            Files that cannot be rewound are read in memory.
+        chunk_size (int): Size of the chunks read from the files
+        callback (callable): Called with the number of bytes sent and the
+            total size of the body, after each chunk
+    """
+
+    def __init__(self, fields=None, files=None, chunk_size=1024 * 1024,
+                 callback=None):
+        self.boundary = uuid.uuid4().hex
+        self.chunk_size = chunk_size
+        self.callback = callback
+        self._parts = []
+        for name, value in sorted((fields or {}).items()):
+            self._parts.append(self._header(name) + b'\r\n' +
+                               self._encode(value) + b'\r\n')
+        for name, (filename, data) in sorted((files or {}).items()):
+            header = (self._header(name, filename) +
+                      b'Content-Type: application/octet-stream\r\n\r\n')
+            self._parts.append(header)
+            self._parts.append(self._file_part(data))
+            self._parts.append(b'\r\n')
+        self._parts.append(('--%s--\r\n' % self.boundary).encode('ascii'))
+
+    @staticmethod
+    def _encode(value):
+        if isinstance(value, bytes):
+            return value
+        if not isinstance(value, six.text_type):
+            value = six.text_type(value)
+        return value.encode('utf-8')
+
+    @staticmethod
+    def _quote(value):
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+        elif not isinstance(value, six.text_type):
+            value = six.text_type(value)
+        return _header_param_re.sub(
+            lambda m: _header_param_escapes[m.group(0)], value)
+
+    def _header(self, name, filename=None):
+        disposition = u'form-data; name="%s"' % self._quote(name)
+        if filename is not None:
+            disposition += u'; filename="%s"' % self._quote(filename)
+        header = u'--%s\r\nContent-Disposition: %s\r\n' % (
+            self.boundary, disposition)
+        return self._encode(header)
+
+    def _file_part(self, data):
+        if isinstance(data, (bytes, six.text_type)):
+            return self._encode(data)
+        try:
+            start = data.tell()
+            data.seek(0, os.SEEK_END)
+            size = data.tell() - start
+            data.seek(start)
+        except (AttributeError, IOError, OSError, ValueError):
+            return data.read()
+        return (data, start, size)
+
+    @property
+    def content_type(self):
+        """The value of the Content-Type header."""
+        return 'multipart/form-data; boundary=%s' % self.boundary
+
+    def __len__(self):
+        return sum(len(part) if isinstance(part, bytes) else part[2]
+                   for part in self._parts)
+
+    def __iter__(self):
+        total = len(self)
+        sent = 0
+        for part in self._parts:
+            if isinstance(part, bytes):
+                chunks = [part]
+            else:
+                chunks = self._read_file(*part)
+            for chunk in chunks:
+                sent += len(chunk)
+                yield chunk
+                if self.callback is not None:
+                    self.callback(sent, total)
+
+    def _read_file(self, f, start, size):
+        f.seek(start)
+        remaining = size
+        while remaining > 0:
+            chunk = f.read(min(self.chunk_size, remaining))
+            if not chunk:
+                raise IOError("File truncated while being uploaded")
+            remaining -= len(chunk)
+            yield chunk
+
+
+class Base64File(object):
+    """File sent base64 encoded in a :class:`JSONStreamEncoder` body.
+
+    The file is read when the request is sent, not when the object is
+    created.
+
+    Args:
+        path (str): Path of the file
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def __len__(self):
+        # The encoded content and the quotes of the JSON string
+        return (os.path.getsize(self.path) + 2) // 3 * 4 + 2
+
+    def iter_chunks(self, chunk_size):
+        """Read and encode the file by chunks.
+
+        Args:
+            chunk_size (int): Approximate size of the chunks
+
+        Yields:
+            bytes: The parts of the JSON string holding the encoded content
+        """
+        # Chunks are multiple of 3 bytes, so that they can be encoded
+        # separately
+        chunk_size = max(chunk_size // 4, 1) * 3
+        yield b'"'
+        with open(self.path, 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield base64.b64encode(chunk)
+        yield b'"'
+
+
+class JSONStreamEncoder(object):
+    """Streaming JSON request body.
+
+    ``data`` is encoded as JSON, except the :class:`Base64File` values that
+    are read and encoded while the request is sent. The object can be
+    iterated several times, which allows the request to be retried.
+
+    Args:
+        data: The document to send
+        chunk_size (int): Approximate size of the chunks read from the files
+    """
+
+    content_type = 'application/json'
+
+    def __init__(self, data, chunk_size=1024 * 1024):
+        self.chunk_size = chunk_size
+        self._parts = []
+        buf = []
+        for part in self._encode(data):
+            if isinstance(part, Base64File):
+                self._parts.append(b''.join(buf))
+                self._parts.append(part)
+                buf = []
+            else:
+                buf.append(part)
+        self._parts.append(b''.join(buf))
+
+    def _encode(self, value):
+        if isinstance(value, Base64File):
+            yield value
+        elif isinstance(value, dict):
+            yield b'{'
+            for i, (k, v) in enumerate(sorted(value.items())):
+                if i:
+                    yield b', '
+                yield json.dumps(k).encode('utf-8') + b': '
+                for part in self._encode(v):
+                    yield part
+            yield b'}'
+        elif isinstance(value, (list, tuple)):
+            yield b'['
+            for i, item in enumerate(value):
+                if i:
+                    yield b', '
+                for part in self._encode(item):
+                    yield part
+            yield b']'
+        else:
+            yield json.dumps(value).encode('utf-8')
+
+    def __len__(self):
+        return sum(len(part) for part in self._parts)
+
+    def __iter__(self):
+        for part in self._parts:
+            if isinstance(part, bytes):
+                if part:
+                    yield part
+            else:
+                for chunk in part.iter_chunks(self.chunk_size):
+                    yield chunk
@@ -18,6 +18,12 @@
 from __future__ import print_function
 from __future__ import absolute_import
 import base64
+import io
+import os
+import tempfile
+import threading
+import time
+import zipfile
 
 from gitlab.base import *  # noqa
 from gitlab import cli
@@ -1266,7 +1272,152 @@ class ProjectCustomAttributeManager(RetrieveMixin, SetMixin, DeleteMixin,
     _from_parent_attrs = {'project_id': 'id'}
 
 
+class ArtifactsReader(object):
+    """Read files from the artifacts archive of a job.
+
+    Use :meth:`ProjectJob.artifacts_reader` to create the object. The archive
+    is downloaded on first use into a temporary file, and its members are
+    decompressed only when they are read. :meth:`read_many` doesn't need the
+    archive for a few files: they are downloaded individually from the
+    artifacts API instead.
+
+    Args:
+        job (ProjectJob): The job
+        max_direct_files (int): Maximum number of files downloaded
+            individually by :meth:`read_many`
+        **kwargs: Extra options to send to the server (e.g. sudo)
+    """
+
+    def __init__(self, job, max_direct_files=10, **kwargs):
+        self.job = job
+        self.max_direct_files = max_direct_files
+        self._kwargs = kwargs
+        self._file = None
+        self._zipfile = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close the archive and remove the temporary file."""
+        with self._lock:
+            if self._zipfile is not None:
+                self._zipfile.close()
+                self._file.close()
+                self._zipfile = self._file = None
+
+    @property
+    def zipfile(self):
+        """The :class:`zipfile.ZipFile` object reading the archive.
+
+        The archive is downloaded on the first access.
+
+        Raises:
+            GitlabAuthenticationError: If authentication is not correct
+            GitlabGetError: If the artifacts could not be retrieved
+        """
+        with self._lock:
+            if self._zipfile is None:
+                f = tempfile.TemporaryFile()
+                try:
+                    self.job.artifacts(target=f, **self._kwargs)
+                    f.seek(0)
+                    self._zipfile = zipfile.ZipFile(f)
+                except Exception:
+                    f.close()
+                    raise
+                self._file = f
+            return self._zipfile
+
+    def namelist(self):
+        """Return the names of the archive members."""
+        return self.zipfile.namelist()
+
+    def infolist(self):
+        """Return the :class:`zipfile.ZipInfo` objects of the members."""
+        return self.zipfile.infolist()
+
+    def open(self, name):
+        """Open a member of the archive for reading.
+
+        Args:
+            name (str): Name of the member
+
+        Returns:
+            A binary file object, decompressing the member as it is read
+        """
+        return self.zipfile.open(name)
+
+    def read(self, name):
+        """Return the content of a member of the archive.
+
+        Args:
+            name (str): Name of the member
+
+        Returns:
+            bytes: The content
+        """
+        return self.zipfile.read(name)
+
+    def extract(self, name, path=None):
+        """Extract a member of the archive on disk.
+
+        Args:
+            name (str): Name of the member
+            path (str): Directory to extract into (the current directory by
+                default)
+
+        Returns:
+            str: The path of the extracted file
+        """
+        return self.zipfile.extract(name, path)
+
+    def read_many(self, names, concurrency=1):
+        """Return the content of several files.
+
+        If the archive has not been downloaded yet and at most
+        ``max_direct_files`` files are requested, the files are downloaded
+        in parallel using a pool of ``concurrency`` threads instead.
+
+        Args:
+            names (list): Paths of the files in the archive
+            concurrency (int): Number of requests to run in parallel
+
+        Returns:
+            dict: The file contents, indexed by path. The retrieval of a file
+                can fail without aborting the others: the exception
+                (:class:`~gitlab.exceptions.GitlabGetError` or
+                :class:`KeyError`) is then returned in place of the content.
+        """
+        names = list(names)
+        if self._zipfile is None and len(names) <= self.max_direct_files:
+            def fetch(name):
+                try:
+                    return self.job.artifact(name, **self._kwargs)
+                except exc.GitlabError as e:
+                    return e
+
+            results = utils.parallel_map(fetch, names, concurrency)
+            return dict(zip(names, results))
+
+        contents = {}
+        for name in names:
+            try:
+                contents[name] = self.read(name)
+            except KeyError as e:
+                contents[name] = e
+        return contents
+
+
 class ProjectJob(RESTObject, RefreshMixin):
+    #: Statuses of the jobs that will not run anymore
+    _terminal_statuses = ('success', 'failed', 'canceled', 'skipped',
+                          'manual')
+
     @cli.register_custom_action('ProjectJob')
     @exc.on_http_error(exc.GitlabJobCancelError)
     def cancel(self, **kwargs):
@@ -1345,7 +1496,7 @@ class ProjectJob(RESTObject, RefreshMixin):
     @cli.register_custom_action('ProjectJob')
     @exc.on_http_error(exc.GitlabGetError)
     def artifacts(self, streamed=False, action=None, chunk_size=1024,
-                  **kwargs):
+                  target=None, segments=1, **kwargs):
         """Get the job artifacts.
 
         Args:
@@ -1355,6 +1506,11 @@ class ProjectJob(RESTObject, RefreshMixin):
             action (callable): Callable responsible of dealing with chunk of
                 data
             chunk_size (int): Size of each chunk
+            target (str or file): If set, the data is written to this file
+                path or file object, resuming the transfer if the connection
+                is interrupted
+            segments (int): Number of parts downloaded in parallel when
+                `target` is set
             **kwargs: Extra options to send to the server (e.g. sudo)
 
         Raises:
@@ -1362,13 +1518,33 @@ class ProjectJob(RESTObject, RefreshMixin):
             GitlabGetError: If the artifacts could not be retrieved
 
         Returns:
-            str: The artifacts if `streamed` is False, None otherwise.
+            str: The artifacts if `streamed` is False, None otherwise. The
+                number of bytes written if `target` is set.
         """
         path = '%s/%s/artifacts' % (self.manager.path, self.get_id())
+        if target is not None:
+            return self.manager.gitlab.http_download(path, target,
+                                                     segments=segments,
+                                                     **kwargs)
         result = self.manager.gitlab.http_get(path, streamed=streamed,
                                               raw=True, **kwargs)
         return utils.response_content(result, streamed, action, chunk_size)
 
+    def artifacts_reader(self, max_direct_files=10, **kwargs):
+        """Return an object reading files from the artifacts archive.
+
+        Args:
+            max_direct_files (int): Maximum number of files downloaded
+                individually, without the archive, by
+                :meth:`ArtifactsReader.read_many`
+            **kwargs: Extra options to send to the server (e.g. sudo)
+
+        Returns:
+            ArtifactsReader: The reader
+        """
+        return ArtifactsReader(self, max_direct_files=max_direct_files,
+                               **kwargs)
+
     @cli.register_custom_action('ProjectJob')
     @exc.on_http_error(exc.GitlabGetError)
     def artifact(self, path, streamed=False, action=None, chunk_size=1024,
@@ -1399,7 +1575,8 @@ class ProjectJob(RESTObject, RefreshMixin):
 
     @cli.register_custom_action('ProjectJob')
     @exc.on_http_error(exc.GitlabGetError)
-    def trace(self, streamed=False, action=None, chunk_size=1024, **kwargs):
+    def trace(self, streamed=False, action=None, chunk_size=1024,
+              offset=None, **kwargs):
         """Get the job trace.
 
         Args:
@@ -1409,6 +1586,10 @@ class ProjectJob(RESTObject, RefreshMixin):
             action (callable): Callable responsible of dealing with chunk of
                 data
             chunk_size (int): Size of each chunk
+            offset (int): If set, only the part of the trace starting at this
+                byte offset is requested. The offset of the end of the
+                received data is stored, :meth:`trace_follow` continues from
+                it.
             **kwargs: Extra options to send to the server (e.g. sudo)
 
         Raises:
@@ -1419,9 +1600,83 @@ class ProjectJob(RESTObject, RefreshMixin):
             str: The trace
         """
         path = '%s/%s/trace' % (self.manager.path, self.get_id())
-        result = self.manager.gitlab.http_get(path, streamed=streamed,
-                                              raw=True, **kwargs)
-        return utils.response_content(result, streamed, action, chunk_size)
+        if offset is None:
+            result = self.manager.gitlab.http_get(path, streamed=streamed,
+                                                  raw=True, **kwargs)
+            return utils.response_content(result, streamed, action,
+                                          chunk_size)
+
+        # Byte offsets are meaningless for compressed content
+        headers = {'Range': 'bytes=%d-' % offset,
+                   'Accept-Encoding': 'identity'}
+        try:
+            result = self.manager.gitlab.http_request(
+                'get', path, streamed=streamed, extra_headers=headers,
+                **kwargs)
+        except GitlabHttpError as e:
+            # 416: the trace is not longer than the offset
+            if e.response_code != 416:
+                raise
+            self.__dict__['_trace_offset'] = offset
+            return None if streamed else b''
+
+        # The server can ignore the range and send the whole trace
+        skip = offset if result.status_code != 206 else 0
+        if not streamed:
+            data = result.content[skip:]
+            self.__dict__['_trace_offset'] = offset + len(data)
+            return data
+
+        if action is None:
+            action = utils._StdoutStream()
+        received = 0
+        for chunk in result.iter_content(chunk_size=chunk_size):
+            if skip:
+                chunk, skip = chunk[skip:], max(skip - len(chunk), 0)
+            if chunk:
+                received += len(chunk)
+                action(chunk)
+        self.__dict__['_trace_offset'] = offset + received
+
+    def trace_follow(self, offset=None, interval=1, max_interval=30,
+                     **kwargs):
+        """Follow the job trace until the job is finished.
+
+        Only the new parts of the trace are requested. When no new data is
+        available the polling interval doubles, up to `max_interval`.
+
+        Args:
+            offset (int): Byte offset to start from. By default the trace is
+                followed from the end of the data received by the previous
+                :meth:`trace` or :meth:`trace_follow` calls, or from the
+                beginning.
+            interval (float): Initial polling interval, in seconds
+            max_interval (float): Maximum polling interval, in seconds
+            **kwargs: Extra options to send to the server (e.g. sudo)
+
+        Raises:
+            GitlabAuthenticationError: If authentication is not correct
+            GitlabGetError: If the trace could not be retrieved
+
+        Yields:
+            bytes: The new parts of the trace
+        """
+        if offset is None:
+            offset = self.__dict__.get('_trace_offset', 0)
+        delay = interval
+        while True:
+            finished = self.status in self._terminal_statuses
+            data = self.trace(offset=offset, **kwargs)
+            offset += len(data)
+            if data:
+                delay = interval
+                yield data
+            if finished:
+                return
+            time.sleep(delay)
+            if not data:
+                delay = min(delay * 2, max_interval)
+            self.refresh(**kwargs)
 
 
 class ProjectJobManager(RetrieveMixin, RESTManager):
@@ -1595,6 +1850,171 @@ class ProjectCommit(RESTObject):
         return self.manager.gitlab.http_get(path, **kwargs)
 
 
+class CommitBuilder(object):
+    """Stage file changes and submit them in a single commit.
+
+    Use :meth:`ProjectCommitManager.builder` to create the object. The
+    contents of the local files are read and base64 encoded while the
+    request is sent, they are never fully loaded in memory.
+
+    Args:
+        manager (ProjectCommitManager): The manager creating the commits
+        branch (str): Name of the branch to commit into
+        commit_message (str): The commit message
+        max_payload_size (int): Maximum size of a request body, in bytes.
+            Larger changesets are split in several commits (the changes are
+            then not applied atomically). If None, a single commit is created.
+        **kwargs: Other commit attributes (e.g. author_email, start_branch)
+    """
+
+    # Commit attributes only valid when the branch is created
+    _start_attrs = ('start_branch', 'start_sha', 'start_project')
+
+    def __init__(self, manager, branch, commit_message,
+                 max_payload_size=50 * 1024 * 1024, **kwargs):
+        self.manager = manager
+        self.max_payload_size = max_payload_size
+        self.attrs = dict(kwargs, branch=branch,
+                          commit_message=commit_message)
+        self.actions = []
+
+    def __len__(self):
+        return len(self.actions)
+
+    def _add(self, action, file_path, content=None, source=None, **kwargs):
+        if content is not None and source is not None:
+            raise ValueError("content and source are mutually exclusive")
+        data = dict(kwargs, action=action, file_path=file_path)
+        if source is not None:
+            data['encoding'] = 'base64'
+            data['content'] = utils.Base64File(source)
+        elif isinstance(content, bytes):
+            data['encoding'] = 'base64'
+            data['content'] = base64.b64encode(content).decode('ascii')
+        elif content is not None:
+            data['content'] = content
+        self.actions.append(data)
+        return self
+
+    def create(self, file_path, content=None, source=None, **kwargs):
+        """Stage the creation of a file.
+
+        Args:
+            file_path (str): Path of the file in the repository
+            content (str|bytes): Content of the file. Bytes are sent base64
+                encoded.
+            source (str): Path of a local file holding the content, read when
+                the commit is sent
+            **kwargs: Other action attributes (e.g. execute_filemode)
+
+        Returns:
+            CommitBuilder: The builder itself
+        """
+        return self._add('create', file_path, content, source, **kwargs)
+
+    def update(self, file_path, content=None, source=None, **kwargs):
+        """Stage the update of a file.
+
+        Args:
+            file_path (str): Path of the file in the repository
+            content (str|bytes): New content of the file. Bytes are sent
+                base64 encoded.
+            source (str): Path of a local file holding the content, read when
+                the commit is sent
+            **kwargs: Other action attributes (e.g. last_commit_id)
+
+        Returns:
+            CommitBuilder: The builder itself
+        """
+        return self._add('update', file_path, content, source, **kwargs)
+
+    def delete(self, file_path, **kwargs):
+        """Stage the deletion of a file.
+
+        Args:
+            file_path (str): Path of the file in the repository
+            **kwargs: Other action attributes (e.g. last_commit_id)
+
+        Returns:
+            CommitBuilder: The builder itself
+        """
+        return self._add('delete', file_path, **kwargs)
+
+    def move(self, previous_path, file_path, content=None, source=None,
+             **kwargs):
+        """Stage the move of a file.
+
+        Args:
+            previous_path (str): Current path of the file
+            file_path (str): New path of the file
+            content (str|bytes): New content of the file, if it changes
+            source (str): Path of a local file holding the new content
+            **kwargs: Other action attributes (e.g. last_commit_id)
+
+        Returns:
+            CommitBuilder: The builder itself
+        """
+        return self._add('move', file_path, content, source,
+                         previous_path=previous_path, **kwargs)
+
+    def _batches(self):
+        if self.max_payload_size is None:
+            return [self.actions]
+        # Keep some room for the part number added to the message
+        base = len(utils.JSONStreamEncoder(dict(self.attrs, actions=[]))) + 32
+        batches = []
+        current = []
+        size = base
+        for action in self.actions:
+            action_size = len(utils.JSONStreamEncoder(action)) + 2
+            if current and size + action_size > self.max_payload_size:
+                batches.append(current)
+                current = []
+                size = base
+            current.append(action)
+            size += action_size
+        if current:
+            batches.append(current)
+        return batches
+
+    @exc.on_http_error(exc.GitlabCreateError)
+    def commit(self, **kwargs):
+        """Create the commit(s) and clear the staged changes.
+
+        If the changes are split and a commit fails, the changes of the
+        commits already created are cleared: calling the method again sends
+        the remaining ones.
+
+        Args:
+            **kwargs: Extra options to send to the server (e.g. sudo)
+
+        Raises:
+            GitlabAuthenticationError: If authentication is not correct
+            GitlabCreateError: If the server cannot perform the request
+
+        Returns:
+            list: The created commits (:class:`ProjectCommit` objects)
+        """
+        if not self.actions:
+            return []
+        batches = self._batches()
+        commits = []
+        for i, actions in enumerate(batches):
+            attrs = dict(self.attrs, actions=actions)
+            if len(batches) > 1:
+                attrs['commit_message'] = '%s (%d/%d)' % (
+                    attrs['commit_message'], i + 1, len(batches))
+            body = utils.JSONStreamEncoder(attrs)
+            server_data = self.manager.gitlab.http_post(
+                self.manager.path, post_data=body, **kwargs)
+            commits.append(self.manager._obj_cls(self.manager, server_data))
+            del self.actions[:len(actions)]
+            # The branch exists now
+            for attr in self._start_attrs:
+                self.attrs.pop(attr, None)
+        return commits
+
+
 class ProjectCommitManager(RetrieveMixin, CreateMixin, RESTManager):
     _path = '/projects/%(project_id)s/repository/commits'
     _obj_cls = ProjectCommit
@@ -1602,6 +2022,23 @@ class ProjectCommitManager(RetrieveMixin, CreateMixin, RESTManager):
     _create_attrs = (('branch', 'commit_message', 'actions'),
                      ('author_email', 'author_name'))
 
+    def builder(self, branch, commit_message,
+                max_payload_size=50 * 1024 * 1024, **kwargs):
+        """Return an object staging file changes for a commit.
+
+        Args:
+            branch (str): Name of the branch to commit into
+            commit_message (str): The commit message
+            max_payload_size (int): Maximum size of a request body, in bytes.
+                Larger changesets are split in several commits.
+            **kwargs: Other commit attributes (e.g. author_email)
+
+        Returns:
+            CommitBuilder: The builder
+        """
+        return CommitBuilder(self, branch, commit_message,
+                             max_payload_size=max_payload_size, **kwargs)
+
 
 class ProjectEnvironment(SaveMixin, ObjectDeleteMixin, RESTObject):
     @cli.register_custom_action('ProjectEnvironment')
@@ -1921,6 +2358,7 @@ class ProjectIssueManager(CRUDMixin, RESTManager):
                                'labels', 'state_event', 'updated_at',
                                'due_date', 'discussion_locked'))
     _types = {'labels': types.ListAttribute}
+    _get_many_filter = 'iids'
 
 
 class ProjectMember(SaveMixin, ObjectDeleteMixin, RESTObject):
@@ -2397,6 +2835,7 @@ class ProjectMergeRequestManager(CRUDMixin, RESTManager):
                      'assignee_id', 'my_reaction_emoji', 'source_branch',
                      'target_branch', 'search')
     _types = {'labels': types.ListAttribute}
+    _get_many_filter = 'iids'
 
 
 class ProjectMilestone(SaveMixin, ObjectDeleteMixin, RESTObject):
@@ -2533,6 +2972,43 @@ class ProjectFile(SaveMixin, ObjectDeleteMixin, RESTObject):
         """
         return base64.b64decode(self.content)
 
+    def iter_bytes(self, chunk_size=1024 * 1024):
+        """Decode the content of the file by chunks.
+
+        Unlike :meth:`decode`, the whole decoded content is never held in
+        memory.
+
+        Args:
+            chunk_size (int): Approximate size of the chunks
+
+        Returns:
+            iterator: The decoded chunks (bytes)
+        """
+        return utils.iter_b64decode(self.content, chunk_size)
+
+    def open(self, chunk_size=64 * 1024):
+        """Open the decoded content of the file for reading.
+
+        Args:
+            chunk_size (int): Approximate size of the chunks decoded at once
+
+        Returns:
+            io.BufferedReader: A binary file object, decoding the content as
+                it is read
+        """
+        return io.BufferedReader(utils.Base64Reader(self.content, chunk_size))
+
+    def decode_to(self, path, chunk_size=1024 * 1024):
+        """Write the decoded content of the file to disk.
+
+        Args:
+            path (str): Path of the file to write
+            chunk_size (int): Approximate size of the chunks written
+        """
+        with open(path, 'wb') as f:
+            for chunk in self.iter_bytes(chunk_size):
+                f.write(chunk)
+
     def save(self, branch, commit_message, **kwargs):
         """Save the changes made to the file to the server.
 
@@ -2694,13 +3170,111 @@ class ProjectFileManager(GetMixin, CreateMixin, UpdateMixin, DeleteMixin,
         Returns:
             str: The file content
         """
-        file_path = file_path.replace('/', '%2F').replace('.', '%2E')
-        path = '%s/%s/raw' % (self.path, file_path)
+        blob_cache = self.gitlab.blob_cache
+        commit_key = blob_id = None
+        if blob_cache is not None:
+            # A file at a given commit never changes. For other refs (e.g.
+            # branches) the blob ID is read from the headers of a HEAD request
+            if utils.is_full_sha(ref):
+                commit_key = '%s:%s:%s' % (self.path, ref, file_path)
+                blob_id = blob_cache.get(commit_key)
+                if blob_id is not None:
+                    blob_id = blob_id.decode()
+            else:
+                blob_id = self._blob_id(file_path, ref, **kwargs)
+            content = blob_cache.get(blob_id) if blob_id else None
+            if content is not None:
+                blob_cache.hit()
+                return utils.cached_content(content, streamed, action,
+                                            chunk_size)
+
+        encoded_path = file_path.replace('/', '%2F').replace('.', '%2E')
+        path = '%s/%s/raw' % (self.path, encoded_path)
         query_data = {'ref': ref}
         result = self.gitlab.http_get(path, query_data=query_data,
                                       streamed=streamed, raw=True, **kwargs)
+        blob_id = result.headers.get('X-Gitlab-Blob-Id', blob_id)
+        if blob_cache is not None and not streamed and blob_id:
+            blob_cache.miss()
+            blob_cache.set(blob_id, result.content)
+            if commit_key is not None:
+                blob_cache.set(commit_key, blob_id.encode())
         return utils.response_content(result, streamed, action, chunk_size)
 
+    def get_many(self, file_paths, ref, concurrency=1, dest_dir=None,
+                 chunk_size=1024 * 1024, **kwargs):
+        """Return the content of several files for a commit.
+
+        The files are downloaded in parallel from the raw endpoint, using a
+        pool of ``concurrency`` threads.
+
+        Args:
+            file_paths (list): Paths of the files to return
+            ref (str): Name of the branch, tag or commit
+            concurrency (int): Number of requests to run in parallel
+            dest_dir (str): If set, the files are streamed to this directory
+                (keeping their path in the repository) instead of being read
+                in memory
+            chunk_size (int): Size of the chunks written to disk
+            **kwargs: Extra options to send to the server (e.g. sudo)
+
+        Raises:
+            ValueError: If a file would be written outside of ``dest_dir``
+
+        Returns:
+            dict: The file contents (or the paths of the written files if
+                ``dest_dir`` is set), indexed by file path. The retrieval of a
+                file can fail without aborting the others: the exception
+                (e.g. :class:`~gitlab.exceptions.GitlabGetError`) is then
+                returned in place of the content.
+        """
+        file_paths = list(file_paths)
+        if dest_dir is not None:
+            root = os.path.abspath(dest_dir)
+            targets = {}
+            for file_path in file_paths:
+                target = os.path.abspath(os.path.join(root, file_path))
+                if not target.startswith(root + os.sep):
+                    raise ValueError('Invalid file path: %s' % file_path)
+                targets[file_path] = target
+
+        def fetch(file_path):
+            try:
+                if dest_dir is None:
+                    return self.raw(file_path, ref, **kwargs)
+                return self._raw_to_file(file_path, ref, targets[file_path],
+                                         chunk_size, **kwargs)
+            except exc.GitlabError as e:
+                return e
+
+        results = utils.parallel_map(fetch, file_paths, concurrency)
+        return dict(zip(file_paths, results))
+
+    def _raw_to_file(self, file_path, ref, target, chunk_size, **kwargs):
+        directory = os.path.dirname(target)
+        try:
+            os.makedirs(directory)
+        except OSError:
+            if not os.path.isdir(directory):
+                raise
+        try:
+            with open(target, 'wb') as f:
+                self.raw(file_path, ref, streamed=True, action=f.write,
+                         chunk_size=chunk_size, **kwargs)
+        except Exception:
+            # Don't leave a truncated file behind
+            if os.path.exists(target):
+                os.remove(target)
+            raise
+        return target
+
+    def _blob_id(self, file_path, ref, **kwargs):
+        file_path = file_path.replace('/', '%2F').replace('.', '%2E')
+        path = '%s/%s' % (self.path, file_path)
+        result = self.gitlab.http_request('head', path,
+                                          query_data={'ref': ref}, **kwargs)
+        return result.headers.get('X-Gitlab-Blob-Id')
+
 
 class ProjectPipelineJob(RESTObject):
     pass
@@ -3197,7 +3771,8 @@ class ProjectExport(RefreshMixin, RESTObject):
 
     @cli.register_custom_action('ProjectExport')
     @exc.on_http_error(exc.GitlabGetError)
-    def download(self, streamed=False, action=None, chunk_size=1024, **kwargs):
+    def download(self, streamed=False, action=None, chunk_size=1024,
+                 target=None, segments=1, **kwargs):
         """Download the archive of a project export.
 
         Args:
@@ -3207,6 +3782,11 @@ class ProjectExport(RefreshMixin, RESTObject):
             action (callable): Callable responsible of dealing with chunk of
                 data
             chunk_size (int): Size of each chunk
+            target (str or file): If set, the data is written to this file
+                path or file object, resuming the transfer if the connection
+                is interrupted
+            segments (int): Number of parts downloaded in parallel when
+                `target` is set
             **kwargs: Extra options to send to the server (e.g. sudo)
 
         Raises:
@@ -3214,9 +3794,14 @@ class ProjectExport(RefreshMixin, RESTObject):
             GitlabGetError: If the server failed to perform the request
 
         Returns:
-            str: The blob content if streamed is False, None otherwise
+            str: The blob content if streamed is False, None otherwise. The
+                number of bytes written if `target` is set.
         """
         path = '/projects/%s/export/download' % self.project_id
+        if target is not None:
+            return self.manager.gitlab.http_download(path, target,
+                                                     segments=segments,
+                                                     **kwargs)
         result = self.manager.gitlab.http_get(path, streamed=streamed,
                                               raw=True, **kwargs)
         return utils.response_content(result, streamed, action, chunk_size)
@@ -3315,6 +3900,65 @@ class Project(SaveMixin, ObjectDeleteMixin, RESTObject):
         return self.manager.gitlab.http_list(gl_path, query_data=query_data,
                                              **kwargs)
 
+    def repository_walk(self, ref='', path='', concurrency=1, cache=None,
+                        **kwargs):
+        """Walk the repository tree recursively.
+
+        The top folder is listed first, then each of its subdirectories is
+        listed recursively, in parallel. The subtree listings can be cached
+        by tree SHA: a subdirectory that didn't change between two commits
+        is not requested again.
+
+        Args:
+            ref (str): Reference to a commit or branch
+            path (str): Path of the top folder (/ by default)
+            concurrency (int): Number of subdirectories to list in parallel
+            cache (dict): Listings of the already known subtrees, by tree
+                SHA. Share the same dict between the walks of several refs.
+            **kwargs: Extra options to send to the server (e.g. sudo)
+
+        Raises:
+            GitlabAuthenticationError: If authentication is not correct
+            GitlabGetError: If the server failed to perform the request
+
+        Yields:
+            dict: The entries of the top folder, then the entries of each
+            of its subdirectories
+        """
+        kwargs.setdefault('per_page', 100)
+        path = path.strip('/')
+
+        def join(dir_path, name):
+            return '%s/%s' % (dir_path, name) if dir_path else name
+
+        def fetch(subtree):
+            dir_path, sha = subtree
+            if cache is not None and sha in cache:
+                return cache[sha]
+            items = self.repository_tree(path=dir_path, ref=ref,
+                                         recursive=True, all=True, **kwargs)
+            # Cached listings can be reused for another path (if the tree was
+            # moved), the paths are stored relative to the subtree
+            prefix = len(dir_path) + 1
+            children = [dict(item, path=item['path'][prefix:])
+                        for item in items]
+            if cache is not None:
+                cache[sha] = children
+            return children
+
+        subtrees = []
+        for item in self.repository_tree(path=path, ref=ref, all=True,
+                                         **kwargs):
+            entry = dict(item, path=join(path, item['name']))
+            yield entry
+            if entry['type'] == 'tree':
+                subtrees.append((entry['path'], entry['id']))
+
+        listings = utils.parallel_map(fetch, subtrees, concurrency)
+        for (dir_path, sha), children in zip(subtrees, listings):
+            for child in children:
+                yield dict(child, path=join(dir_path, child['path']))
+
     @cli.register_custom_action('Project', ('sha', ))
     @exc.on_http_error(exc.GitlabGetError)
     def repository_blob(self, sha, **kwargs):
@@ -3332,8 +3976,21 @@ class Project(SaveMixin, ObjectDeleteMixin, RESTObject):
             dict: The blob content and metadata
         """
 
+        blob_cache = self.manager.gitlab.blob_cache
+        if blob_cache is not None and utils.is_full_sha(sha):
+            content = blob_cache.get(sha)
+            if content is not None:
+                blob_cache.hit()
+                return {'sha': sha, 'size': len(content),
+                        'encoding': 'base64',
+                        'content': base64.b64encode(content).decode()}
+
         path = '/projects/%s/repository/blobs/%s' % (self.get_id(), sha)
-        return self.manager.gitlab.http_get(path, **kwargs)
+        result = self.manager.gitlab.http_get(path, **kwargs)
+        if blob_cache is not None and result.get('encoding') == 'base64':
+            blob_cache.miss()
+            blob_cache.set(result['sha'], base64.b64decode(result['content']))
+        return result
 
     @cli.register_custom_action('Project', ('sha', ))
     @exc.on_http_error(exc.GitlabGetError)
@@ -3358,9 +4015,22 @@ class Project(SaveMixin, ObjectDeleteMixin, RESTObject):
         Returns:
             str: The blob content if streamed is False, None otherwise
         """
+        blob_cache = self.manager.gitlab.blob_cache
+        if blob_cache is None or not utils.is_full_sha(sha):
+            blob_cache = None
+        else:
+            content = blob_cache.get(sha)
+            if content is not None:
+                blob_cache.hit()
+                return utils.cached_content(content, streamed, action,
+                                            chunk_size)
+
         path = '/projects/%s/repository/blobs/%s/raw' % (self.get_id(), sha)
         result = self.manager.gitlab.http_get(path, streamed=streamed,
                                               raw=True, **kwargs)
+        if blob_cache is not None and not streamed:
+            blob_cache.miss()
+            blob_cache.set(sha, result.content)
         return utils.response_content(result, streamed, action, chunk_size)
 
     @cli.register_custom_action('Project', ('from_', 'to'))
@@ -3411,7 +4081,8 @@ class Project(SaveMixin, ObjectDeleteMixin, RESTObject):
     @cli.register_custom_action('Project', tuple(), ('sha', ))
     @exc.on_http_error(exc.GitlabListError)
     def repository_archive(self, sha=None, streamed=False, action=None,
-                           chunk_size=1024, **kwargs):
+                           chunk_size=1024, target=None, segments=1,
+                           **kwargs):
         """Return a tarball of the repository.
 
         Args:
@@ -3422,6 +4093,11 @@ class Project(SaveMixin, ObjectDeleteMixin, RESTObject):
             action (callable): Callable responsible of dealing with chunk of
                 data
             chunk_size (int): Size of each chunk
+            target (str or file): If set, the data is written to this file
+                path or file object, resuming the transfer if the connection
+                is interrupted
+            segments (int): Number of parts downloaded in parallel when
+                `target` is set
             **kwargs: Extra options to send to the server (e.g. sudo)
 
         Raises:
@@ -3429,12 +4105,18 @@ class Project(SaveMixin, ObjectDeleteMixin, RESTObject):
             GitlabListError: If the server failed to perform the request
 
         Returns:
-            str: The binary data of the archive
+            str: The binary data of the archive. The number of bytes
+                written if `target` is set.
         """
         path = '/projects/%s/repository/archive' % self.get_id()
         query_data = {}
         if sha:
             query_data['sha'] = sha
+        if target is not None:
+            return self.manager.gitlab.http_download(path, target,
+                                                     query_data=query_data,
+                                                     segments=segments,
+                                                     **kwargs)
         result = self.manager.gitlab.http_get(path, query_data=query_data,
                                               raw=True, streamed=streamed,
                                               **kwargs)
@@ -3645,7 +4327,8 @@ class Project(SaveMixin, ObjectDeleteMixin, RESTObject):
     # see #56 - add file attachment features
     @cli.register_custom_action('Project', ('filename', 'filepath'))
     @exc.on_http_error(exc.GitlabUploadError)
-    def upload(self, filename, filedata=None, filepath=None, **kwargs):
+    def upload(self, filename, filedata=None, filepath=None,
+               progress_callback=None, **kwargs):
         """Upload the specified file into the project.
 
         .. note::
@@ -3654,8 +4337,11 @@ class Project(SaveMixin, ObjectDeleteMixin, RESTObject):
 
         Args:
             filename (str): The name of the file being uploaded
-            filedata (bytes): The raw data of the file being uploaded
+            filedata (bytes): The raw data of the file being uploaded, or a
+                file object opened in binary mode
             filepath (str): The path to a local file to upload (optional)
+            progress_callback (callable): Called with the number of bytes
+                sent and the total size of the request during the upload
 
         Raises:
             GitlabConnectionError: If the server cannot be reached
@@ -3679,7 +4365,9 @@ class Project(SaveMixin, ObjectDeleteMixin, RESTObject):
 
         if filepath is not None:
             with open(filepath, "rb") as f:
-                filedata = f.read()
+                return self.upload(filename, filedata=f,
+                                   progress_callback=progress_callback,
+                                   **kwargs)
 
         url = ('/projects/%(id)s/uploads' % {
             'id': self.id,
@@ -3687,7 +4375,9 @@ class Project(SaveMixin, ObjectDeleteMixin, RESTObject):
         file_info = {
             'file': (filename, filedata),
         }
-        data = self.manager.gitlab.http_post(url, files=file_info)
+        body = utils.MultipartEncoder(files=file_info,
+                                      callback=progress_callback)
+        data = self.manager.gitlab.http_post(url, post_data=body)
 
         return {
             "alt": data['alt'],
@@ -3698,7 +4388,7 @@ class Project(SaveMixin, ObjectDeleteMixin, RESTObject):
     @cli.register_custom_action('Project', optional=('wiki',))
     @exc.on_http_error(exc.GitlabGetError)
     def snapshot(self, wiki=False, streamed=False, action=None,
-                 chunk_size=1024, **kwargs):
+                 chunk_size=1024, target=None, segments=1, **kwargs):
         """Return a snapshot of the repository.
 
         Args:
@@ -3709,6 +4399,11 @@ class Project(SaveMixin, ObjectDeleteMixin, RESTObject):
             action (callable): Callable responsible of dealing with chunk of
                 data
             chunk_size (int): Size of each chunk
+            target (str or file): If set, the data is written to this file
+                path or file object, resuming the transfer if the connection
+                is interrupted
+            segments (int): Number of parts downloaded in parallel when
+                `target` is set
             **kwargs: Extra options to send to the server (e.g. sudo)
 
         Raises:
@@ -3716,9 +4411,14 @@ class Project(SaveMixin, ObjectDeleteMixin, RESTObject):
             GitlabGetError: If the content could not be retrieved
 
         Returns:
-            str: The uncompressed tar archive of the repository
+            str: The uncompressed tar archive of the repository. The number
+                of bytes written if `target` is set.
         """
         path = '/projects/%s/snapshot' % self.get_id()
+        if target is not None:
+            return self.manager.gitlab.http_download(path, target,
+                                                     segments=segments,
+                                                     **kwargs)
         result = self.manager.gitlab.http_get(path, streamed=streamed,
                                               raw=True, **kwargs)
         return utils.response_content(result, streamed, action, chunk_size)
@@ -3810,17 +4510,21 @@ class ProjectManager(CRUDMixin, RESTManager):
                      'with_custom_attributes')
 
     def import_project(self, file, path, namespace=None, overwrite=False,
-                       override_params=None, **kwargs):
+                       override_params=None, progress_callback=None,
+                       **kwargs):
         """Import a project from an archive file.
 
         Args:
-            file: Data or file object containing the project
+            file: Data or file object containing the project. The file is
+                read by chunks during the upload.
             path (str): Name and path for the new project
             namespace (str): The ID or path of the namespace that the project
                 will be imported to
             overwrite (bool): If True overwrite an existing project with the
                 same path
             override_params (dict): Set the specific settings for the project
+            progress_callback (callable): Called with the number of bytes
+                sent and the total size of the request during the upload
             **kwargs: Extra options to send to the server (e.g. sudo)
 
         Raises:
@@ -3842,8 +4546,9 @@ class ProjectManager(CRUDMixin, RESTManager):
                 data['override_params[%s]' % k] = v
         if namespace:
             data['namespace'] = namespace
-        return self.gitlab.http_post('/projects/import', post_data=data,
-                                     files=files, **kwargs)
+        body = utils.MultipartEncoder(data, files, callback=progress_callback)
+        return self.gitlab.http_post('/projects/import', post_data=body,
+                                     **kwargs)
 
 
 class RunnerJob(RESTObject):